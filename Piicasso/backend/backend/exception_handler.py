@@ -35,6 +35,12 @@ def enterprise_exception_handler(exc, context):
     request = context.get('request')
     request_id = getattr(request, 'request_id', 'N/A') if request else 'N/A'
 
+    if isinstance(exc, Throttled):
+        from backend.metrics import THROTTLE_REJECTIONS
+        view = context.get('view')
+        endpoint = type(view).__name__ if view is not None else 'unknown'
+        THROTTLE_REJECTIONS.labels(endpoint=endpoint).inc()
+
     # ── DRF already handled it ──────────────────────────────────────────────
     if response is not None:
         error_payload = _build_payload(exc, response.status_code, request_id)
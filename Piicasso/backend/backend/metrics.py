@@ -0,0 +1,175 @@
+"""
+Application metrics
+===================
+Prometheus metrics for every app, exported on the default
+``prometheus_client`` registry — the same registry ``django_prometheus``
+serves at ``/metrics``.
+
+Two groups live here:
+
+  - span-style stage timing for hot request paths (histograms, also logged
+    as a ``stages_ms`` dict on the structured audit log line)
+  - business / pipeline metrics: in-flight synchronous generations, LLM
+    latency and fallbacks, cache hit/miss per namespace, RockYou load,
+    websocket connections and throttle rejections
+
+This module belongs to the project package rather than an app, so
+low-level code (``password_security.hibp``, the DRF exception handler) can
+record metrics without depending on ``wordgen``.  Everything is incremented
+at the call site, so a scrape never touches the database, cache or broker.
+Label values are fixed, low-cardinality strings.
+
+Only the web processes are scraped.  Gunicorn workers share their values
+through ``prometheus_client``'s multiprocess mode (``gunicorn.conf.py``
+sets ``PROMETHEUS_MULTIPROC_DIR``; each gauge says how workers combine).
+The Celery worker has no exporter: tasks define no metrics of their own,
+and LLM calls made from a task stay in the worker process, unexported.
+
+Stage timing inside a view::
+
+    timer = attach_stage_timer(request, "submit")
+    with timer.span("llm"):
+        wordlist_raw = call_gemini_api(...)
+
+``SecurityLoggingMiddleware`` picks the timer up from the request once the
+response is ready, observes every recorded span and logs the per-stage
+milliseconds next to the total ``duration_ms``.
+"""
+
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# ---------------------------------------------------------------------------
+# Stage timing
+# ---------------------------------------------------------------------------
+
+# Spans range from sub-millisecond cache hits to 30 s LLM timeouts.
+_STAGE_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "piicasso_pipeline_stage_seconds",
+    "Wall time spent in each stage of an instrumented request pipeline.",
+    ["pipeline", "stage"],
+    buckets=_STAGE_BUCKETS,
+)
+
+# Attribute on the underlying Django HttpRequest that carries the timer.
+REQUEST_ATTR = "stage_timer"
+
+
+class StageTimer:
+    """Accumulates wall time per named stage for a single request."""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.spans = {}
+        self._exported = False
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[stage] = self.spans.get(stage, 0.0) + (time.perf_counter() - started)
+
+    def as_ms(self):
+        return {stage: round(seconds * 1000, 2) for stage, seconds in self.spans.items()}
+
+    def export(self):
+        """Observe every span once and return the per-stage milliseconds."""
+        if not self._exported:
+            self._exported = True
+            for stage, seconds in self.spans.items():
+                STAGE_SECONDS.labels(pipeline=self.pipeline, stage=stage).observe(seconds)
+        return self.as_ms()
+
+
+def attach_stage_timer(request, pipeline):
+    """Create a StageTimer and attach it to the Django request for the middleware."""
+    timer = StageTimer(pipeline)
+    # DRF's Request proxies reads to the wrapped HttpRequest but not writes.
+    setattr(getattr(request, "_request", request), REQUEST_ATTR, timer)
+    return timer
+
+
+def get_stage_timer(request):
+    return getattr(request, REQUEST_ATTR, None)
+
+
+# ---------------------------------------------------------------------------
+# Business / pipeline metrics
+# ---------------------------------------------------------------------------
+
+GENERATIONS_IN_FLIGHT = Gauge(
+    "piicasso_sync_generations_in_flight",
+    "Synchronous wordlist generations running in the submit view, all workers.",
+    multiprocess_mode="livesum",
+)
+
+LLM_CALL_SECONDS = Histogram(
+    "piicasso_llm_call_seconds",
+    "Latency of the LLM wordlist call, including the offline fallback.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+)
+
+LLM_CALLS = Counter(
+    "piicasso_llm_calls",
+    "LLM wordlist calls by outcome (ok / fallback).",
+    ["outcome"],
+)
+
+CACHE_REQUESTS = Counter(
+    "piicasso_cache_requests",
+    "Cache lookups by namespace and result (hit / miss).",
+    ["namespace", "result"],
+)
+
+ROCKYOU_LOAD_SECONDS = Gauge(
+    "piicasso_rockyou_load_seconds",
+    "Wall time of the most recent RockYou reservoir load in any worker.",
+    multiprocess_mode="mostrecent",
+)
+
+ROCKYOU_ENTRIES = Gauge(
+    "piicasso_rockyou_entries",
+    "Entries held in the in-memory RockYou sample (largest across workers).",
+    multiprocess_mode="max",
+)
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    "piicasso_websocket_connections",
+    "Open websocket connections per consumer.",
+    ["consumer"],
+    multiprocess_mode="livesum",
+)
+
+THROTTLE_REJECTIONS = Counter(
+    "piicasso_throttle_rejections",
+    "Requests rejected by DRF throttling, per endpoint (view name).",
+    ["endpoint"],
+)
+
+
+def record_cache(namespace, hit):
+    CACHE_REQUESTS.labels(namespace=namespace, result="hit" if hit else "miss").inc()
+
+
+def record_llm_call(seconds, fallback):
+    LLM_CALL_SECONDS.observe(seconds)
+    LLM_CALLS.labels(outcome="fallback" if fallback else "ok").inc()
+
+
+def record_rockyou_load(seconds, entries):
+    ROCKYOU_LOAD_SECONDS.set(seconds)
+    ROCKYOU_ENTRIES.set(entries)
+
+
+def generation_in_flight():
+    """Context manager counting a running synchronous generation."""
+    return GENERATIONS_IN_FLIGHT.track_inprogress()
@@ -291,6 +291,16 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
+    # Rendered PDF reports (wordgen.services.report_service), Fernet-encrypted
+    # and named by content hash. Not served directly.
+    "reports": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": os.getenv(
+                "REPORT_ARTIFACT_ROOT", os.path.join(BASE_DIR, "report_artifacts")
+            ),
+        },
+    },
 }
 
 MEDIA_URL = "/media/"
@@ -358,7 +368,11 @@ if not _fek:
         "Generate one with: python -c \"from cryptography.fernet import Fernet; "
         "print(Fernet.generate_key().decode())\""
     )
-FIELD_ENCRYPTION_KEY = _fek
+# Comma-separated keys enable rotation: the first encrypts, any decrypts.
+FIELD_ENCRYPTION_KEY = [k.strip() for k in _fek.split(",")] if "," in _fek else _fek
+# Keys the blind index of searchable PII (generator.blind_index); falls back
+# to SECRET_KEY.  Changing it requires `manage.py rebuild_blind_index`.
+BLIND_INDEX_KEY = os.getenv("BLIND_INDEX_KEY", "")
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = [
     "accept",
@@ -397,6 +411,9 @@ REST_FRAMEWORK = {
         "login": "5/minute",
         "pii_submit": "10/hour",
         "breach_search": "3/minute",
+        "breach_scan": "5/hour",
+        "batch_report": "10/hour",
+        "batch_generation": "5/hour",
         "otp_verify": "5/hour",
         "password_reset": "3/hour",
         "register": "5/hour",
@@ -508,6 +525,37 @@ LOGGING = {
 }
 
 # ─── PIICASSO APPLICATION SETTINGS ───────────────────────────────────────────
+
+
+def _parse_merge_weights(raw):
+    """
+    "ai=3,rockyou=1" -> {"ai": 3.0, "rockyou": 1.0}.  A malformed value must
+    not keep the app from starting: it is reported and the priority merge
+    (no weights) is used instead.
+    """
+    import math
+    import warnings
+
+    weights = {}
+    for part in raw.split(","):
+        name, _, weight = (s.strip() for s in part.partition("="))
+        if not name and not weight:
+            continue
+        try:
+            value = float(weight)
+        except ValueError:
+            value = math.nan
+        if not name or not math.isfinite(value) or value < 0:
+            warnings.warn(
+                f"Ignoring malformed CANDIDATE_MERGE_WEIGHTS={raw!r}; "
+                "using the priority merge.",
+                RuntimeWarning,
+            )
+            return {}
+        weights[name] = value
+    return weights
+
+
 PIICASSO_SETTINGS = {
     "MAX_WORDLIST_SIZE": int(os.getenv("MAX_WORDLIST_SIZE", "1000")),
     "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY"),
@@ -515,6 +563,64 @@ PIICASSO_SETTINGS = {
     in ("1", "true", "yes"),
     "DATA_RETENTION_DAYS": int(os.getenv("DATA_RETENTION_DAYS", "30")),
     "ENABLE_AUDIT_LOG": True,
+    # Candidate ranking engine (wordgen.services.ranking_service). "markov"
+    # falls back to "heuristic" until `manage.py train_ranking_model` has
+    # written the table file below.
+    "RANKING_ENGINE": os.getenv("RANKING_ENGINE", "markov"),
+    "RANKING_MODEL_PATH": os.getenv(
+        "RANKING_MODEL_PATH", str(BASE_DIR / "data" / "ranking_model.json.gz")
+    ),
+    # Interleave weights for the candidate merge stage, e.g. "ai=3,rockyou=1".
+    # Empty = priority merge (every AI candidate first, then RockYou).
+    "CANDIDATE_MERGE_WEIGHTS": _parse_merge_weights(
+        os.getenv("CANDIDATE_MERGE_WEIGHTS", "")
+    ),
+    # Breach checks (password_security.hibp): "auto" answers from the local
+    # Pwned Passwords mirror when it exists and the remote API otherwise;
+    # "local" never calls HIBP; "remote" ignores the mirror.
+    "HIBP_MODE": os.getenv("HIBP_MODE", "auto"),
+    "HIBP_LOCAL_DB": os.getenv(
+        "HIBP_LOCAL_DB", str(BASE_DIR / "data" / "pwned-passwords.bin")
+    ),
+    # Annotate this many top-ranked candidates with breach counts after
+    # generation (background; 0 disables the stage).
+    "BREACH_ENRICHMENT_TOP_N": int(os.getenv("BREACH_ENRICHMENT_TOP_N", "0")),
+    # Overall deadline (seconds) for BreachSearchView's concurrent sources;
+    # sources still running then are reported in "timed_out".
+    "BREACH_SEARCH_DEADLINE": float(os.getenv("BREACH_SEARCH_DEADLINE", "10")),
+    # Email breach lookup cache (operations.breach_search), in seconds: found
+    # breaches / 404s stay fresh this long, then are served stale for
+    # BREACH_CACHE_STALE_TTL more while a background refresh runs.
+    "BREACH_CACHE_TTL": int(os.getenv("BREACH_CACHE_TTL", str(6 * 60 * 60))),
+    "BREACH_CACHE_NEGATIVE_TTL": int(os.getenv("BREACH_CACHE_NEGATIVE_TTL", str(60 * 60))),
+    "BREACH_CACHE_STALE_TTL": int(os.getenv("BREACH_CACHE_STALE_TTL", str(24 * 60 * 60))),
+    # Batch breach scan (operations.breach_scan): requests per minute the
+    # HIBP key allows (the scheduler paces lookups to exactly this), worker
+    # threads, and the most addresses one job may hold.
+    "HIBP_RATE_LIMIT_RPM": float(os.getenv("HIBP_RATE_LIMIT_RPM", "10")),
+    "BREACH_SCAN_WORKERS": int(os.getenv("BREACH_SCAN_WORKERS", "4")),
+    "BREACH_SCAN_MAX_EMAILS": int(os.getenv("BREACH_SCAN_MAX_EMAILS", "1000")),
+    # Seconds a PasswordAnalyzeView result is reused for the same user,
+    # password and PII context (0 disables; clients can send force_refresh).
+    "PASSWORD_ANALYSIS_CACHE_TTL": int(os.getenv("PASSWORD_ANALYSIS_CACHE_TTL", "3600")),
+    # Bulk password audit (password_security.bulk_audit). Workers 0 = auto.
+    "BULK_AUDIT_MAX_PASSWORDS": int(os.getenv("BULK_AUDIT_MAX_PASSWORDS", "10000")),
+    "BULK_AUDIT_WORKERS": int(os.getenv("BULK_AUDIT_WORKERS", "0")),
+    # Batch dossier reports (wordgen.services.dossier_service): most reports
+    # per request, and render processes per request (0 = 2; at most 4).  A
+    # merged PDF renders in the request thread, so it takes fewer reports.
+    "BATCH_REPORT_MAX": int(os.getenv("BATCH_REPORT_MAX", "100")),
+    "BATCH_REPORT_WORKERS": int(os.getenv("BATCH_REPORT_WORKERS", "0")),
+    "BATCH_REPORT_MERGED_MAX": int(os.getenv("BATCH_REPORT_MERGED_MAX", "20")),
+    # Most profiles one batch generation request may hold (one Celery task
+    # each; wordgen.services.batch_generation_service).
+    "BATCH_GENERATION_MAX_PROFILES": int(os.getenv("BATCH_GENERATION_MAX_PROFILES", "200")),
+    # One-per-line common-password list for the strength analyser; point this
+    # at another list to widen the check (default: the bundled 20k list).
+    "COMMON_PASSWORDS_PATH": os.getenv(
+        "COMMON_PASSWORDS_PATH",
+        str(BASE_DIR / "piicasso_strength" / "data" / "common-passwords.txt"),
+    ),
 }
 
 # ─── EMAIL ───────────────────────────────────────────────────────────────────
@@ -0,0 +1,40 @@
+"""
+Background dispatch
+===================
+``dispatch(task, *args)`` runs a Celery task off the request: ``.delay``
+with a broker, otherwise — CELERY_BROKER_URL "disabled://", the
+single-container deployment — on a daemon thread beside the request.
+
+``run_in_thread`` is the thread half on its own, for work that has no
+single-task equivalent (e.g. the sequential fallback of a chord).  Threads
+close their database connection when the work returns: the connection is
+thread-local and nothing else would close it.
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+
+def broker_disabled():
+    return str(getattr(settings, "CELERY_BROKER_URL", "")).startswith("disabled")
+
+
+def _run(func, args):
+    try:
+        func(*args)
+    finally:
+        connection.close()
+
+
+def run_in_thread(func, *args):
+    threading.Thread(target=_run, args=(func, args), daemon=True).start()
+
+
+def dispatch(task, *args):
+    """Queue *task* (Celery with a broker, else a daemon thread)."""
+    if broker_disabled():
+        run_in_thread(task, *args)
+    else:
+        task.delay(*args)
@@ -60,3 +60,30 @@ class TerminalRateThrottle(UserRateThrottle):
     Default: 10 requests per minute per user.
     """
     scope = 'terminal'
+
+
+class BreachScanRateThrottle(UserRateThrottle):
+    """
+    Throttle for starting batch breach scans; each job can spend the HIBP
+    key's whole rate limit for a long time.
+    Default: 5 requests per hour per user.
+    """
+    scope = 'breach_scan'
+
+
+class BatchReportRateThrottle(UserRateThrottle):
+    """
+    Throttle for batch dossier reports; each request renders up to
+    BATCH_REPORT_MAX PDFs on a process pool.
+    Default: 10 requests per hour per user.
+    """
+    scope = 'batch_report'
+
+
+class BatchGenerationRateThrottle(UserRateThrottle):
+    """
+    Throttle for batch wordlist generation; each request queues up to
+    BATCH_GENERATION_MAX_PROFILES LLM generations.
+    Default: 5 requests per hour per user.
+    """
+    scope = 'batch_generation'
@@ -0,0 +1,139 @@
+"""
+Blind index — exact-match search over encrypted ``pii_data``.
+
+Every email, username and name a generation profile holds is normalized and
+HMAC-SHA256'd with ``BLIND_INDEX_KEY`` into a ``PiiBlindIndex`` row when the
+profile is saved.  A search term gets the same treatment and is looked up
+by digest: one indexed query, no decryption, and the table holds nothing a
+reader without the key can reverse.
+
+The kind is part of the HMAC input, so "alice" the username and "Alice"
+the name never collide.  Multi-value fields (``child_names`` etc.) are
+indexed per comma-separated entry.
+"""
+
+import hashlib
+import hmac
+import re
+import unicodedata
+
+from django.conf import settings
+
+EMAIL = "email"
+USERNAME = "username"
+NAME = "name"
+
+# pii_data key → kind.  Canonical Piiserializer names only; legacy aliases
+# are folded into these before a profile is stored.
+INDEXED_FIELDS = {
+    "email": EMAIL,
+    "username": USERNAME,
+    "social_handles": USERNAME,
+    "social_media_handle": USERNAME,
+    "full_name": NAME,
+    "spouse_name": NAME,
+    "father_name": NAME,
+    "mother_maiden": NAME,
+    "boss_name": NAME,
+    "best_friend": NAME,
+    "child_names": NAME,
+    "sibling_names": NAME,
+}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def _key():
+    key = getattr(settings, "BLIND_INDEX_KEY", "") or settings.SECRET_KEY
+    return key.encode() if isinstance(key, str) else key
+
+
+def normalize(kind, value):
+    value = _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", str(value))).strip().casefold()
+    if kind == USERNAME:
+        value = value.lstrip("@")
+    if kind == EMAIL and not _EMAIL_RE.match(value):
+        return ""
+    return value
+
+
+def digest(kind, value):
+    """Blind-index digest of *value*, or None if it normalizes to nothing."""
+    value = normalize(kind, value)
+    if not value:
+        return None
+    return hmac.new(_key(), f"{kind}:{value}".encode(), hashlib.sha256).hexdigest()
+
+
+def profile_digests(pii_data):
+    """``{(kind, digest), ...}`` for every indexable value of a profile."""
+    if not isinstance(pii_data, dict):
+        return set()
+    found = set()
+    for field, kind in INDEXED_FIELDS.items():
+        raw = pii_data.get(field)
+        if not raw or not isinstance(raw, str):
+            continue
+        for part in raw.split(",") if field != "email" else (raw,):
+            d = digest(kind, part)
+            if d:
+                found.add((kind, d))
+    return found
+
+
+def query_digests(query):
+    """Digests a free-text search term could match, one per applicable kind."""
+    kinds = (EMAIL,) if "@" in query and _EMAIL_RE.match(query.strip()) else (USERNAME, NAME)
+    return [d for d in (digest(kind, query) for kind in kinds) if d]
+
+
+def reindex(history):
+    """Replace the blind-index rows of one GenerationHistory."""
+    from .models import PiiBlindIndex
+
+    PiiBlindIndex.objects.filter(history=history).delete()
+    PiiBlindIndex.objects.bulk_create([
+        PiiBlindIndex(history=history, kind=kind, digest=d)
+        for kind, d in sorted(profile_digests(history.pii_data))
+    ])
+
+
+def rebuild(history_model=None, index_model=None, batch_size=500):
+    """
+    Recompute the whole index (after a BLIND_INDEX_KEY change, or from a
+    migration with historical models).  Returns the number of profiles.
+    """
+    if history_model is None:
+        from .models import GenerationHistory as history_model, PiiBlindIndex as index_model
+
+    index_model.objects.all().delete()
+    rows = []
+    count = 0
+    for history in history_model.objects.only("id", "pii_data").iterator(chunk_size=batch_size):
+        count += 1
+        rows.extend(
+            index_model(history_id=history.pk, kind=kind, digest=d)
+            for kind, d in profile_digests(history.pii_data)
+        )
+        if len(rows) >= batch_size:
+            index_model.objects.bulk_create(rows)
+            rows = []
+    index_model.objects.bulk_create(rows)
+    return count
+
+
+def match_count(query, user=None):
+    """
+    Generation profiles holding *query* as an email, username or name;
+    limited to *user*'s own history unless that user is a superuser.
+    """
+    from .models import PiiBlindIndex
+
+    digests = query_digests(query)
+    if not digests:
+        return 0
+    qs = PiiBlindIndex.objects.filter(digest__in=digests)
+    if user is not None and not user.is_superuser:
+        qs = qs.filter(history__user=user)
+    return qs.values("history").distinct().count()
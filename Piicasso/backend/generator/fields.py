@@ -1,36 +1,141 @@
 import json
-from cryptography.fernet import Fernet
+from functools import lru_cache
+
+from cryptography.fernet import Fernet, MultiFernet
 from django.conf import settings
 from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+
+@lru_cache(maxsize=4)
+def _build_fernet(keys):
+    fernets = [Fernet(k.encode() if isinstance(k, str) else k) for k in keys]
+    return fernets[0] if len(fernets) == 1 else MultiFernet(fernets)
 
 
 def _get_fernet():
+    """
+    Cipher for FIELD_ENCRYPTION_KEY, built once per key set.  A list of keys
+    gives a MultiFernet: encrypts with the first, decrypts with any of them.
+    """
     key = settings.FIELD_ENCRYPTION_KEY
-    if isinstance(key, (list, tuple)):
-        key = key[0]
-    return Fernet(key.encode() if isinstance(key, str) else key)
+    keys = tuple(key) if isinstance(key, (list, tuple)) else (key,)
+    return _build_fernet(keys)
+
+
+def decrypt_value(ciphertext):
+    return json.loads(_get_fernet().decrypt(ciphertext.encode()).decode())
+
+
+_FORWARDED = frozenset(n for n in dir(dict) + dir(list) if not n.startswith("_"))
+
+
+class EncryptedValue:
+    """
+    Ciphertext loaded from the database, decrypted on first use.
+
+    Model attributes never expose this: the field descriptor swaps in the
+    plain value on first access.  ``.values()`` / ``.values_list()`` rows get
+    it as-is and it forwards the usual dict/list operations.
+    """
+
+    __slots__ = ("ciphertext", "_value", "_decrypted")
+
+    def __init__(self, ciphertext):
+        self.ciphertext = ciphertext
+        self._decrypted = False
+
+    @property
+    def value(self):
+        if not self._decrypted:
+            self._value = decrypt_value(self.ciphertext)
+            self._decrypted = True
+        return self._value
+
+    def __getattr__(self, name):
+        # Only dict/list methods; ORM (``resolve_expression``) and copy/pickle
+        # probes must not trigger a decrypt.
+        if name not in _FORWARDED:
+            raise AttributeError(name)
+        return getattr(self.value, name)
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __contains__(self, item):
+        return item in self.value
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __eq__(self, other):
+        if isinstance(other, EncryptedValue):
+            other = other.value
+        return self.value == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        state = repr(self._value) if self._decrypted else "<encrypted>"
+        return f"EncryptedValue({state})"
+
+
+class EncryptedAttribute(DeferredAttribute):
+    """Replaces a loaded ``EncryptedValue`` with its plaintext on first read."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, EncryptedValue):
+            value = value.value
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
 
 
 class EncryptedJSONField(models.TextField):
     """
     TextField that transparently Fernet-encrypts JSON data using FIELD_ENCRYPTION_KEY.
     Ciphertext is stored as base64 text; the database never sees plaintext PII.
+
+    Values are decrypted lazily: rows whose field is never read are never
+    decrypted, and saving such a row writes the stored ciphertext back as is.
     """
 
+    descriptor_class = EncryptedAttribute
+
     def from_db_value(self, value, expression, connection):
         if value is None:
             return None
-        return json.loads(_get_fernet().decrypt(value.encode()).decode())
+        return EncryptedValue(value)
+
+    def pre_save(self, model_instance, add):
+        # Past the descriptor, so saving does not decrypt an untouched value.
+        return model_instance.__dict__.get(self.attname)
 
     def get_prep_value(self, value):
         if value is None:
             return None
+        if isinstance(value, EncryptedValue):
+            # Never read — still the ciphertext it was loaded with.
+            return value.ciphertext
         if isinstance(value, str):
             # Already encrypted string — pass through without double-encoding
             return value
         return _get_fernet().encrypt(json.dumps(value, ensure_ascii=False).encode()).decode()
 
     def to_python(self, value):
+        if isinstance(value, EncryptedValue):
+            return value.value
         if isinstance(value, (dict, list)):
             return value
         if value is None:
@@ -39,3 +144,66 @@ class EncryptedJSONField(models.TextField):
             return json.loads(value)
         except (json.JSONDecodeError, TypeError):
             return value
+
+
+# ─── Field-presence mask ─────────────────────────────────────────────────────
+# Which keys of an encrypted PII dict held a value, stored in the clear next
+# to it so history summaries and "used employer data" filters need no
+# decryption.  Stored as ",key1,key2," (sorted) so a key matches with
+# ``__contains=",key,"`` on any database.  That is a LIKE '%,key,%' scan no
+# B-tree index can serve, so the column is not indexed: callers narrow to
+# one user's rows first (the user indexes) and the mask filters those.
+
+PII_MASK_EXCLUDED = frozenset({"pattern_mode"})  # generation config, not PII
+_MASK_MAX_LENGTH = 1024
+_MASK_KEY_MAX_LENGTH = 64
+
+
+def pii_fields_mask(pii_data):
+    if not isinstance(pii_data, dict):
+        return ""
+    mask = ","
+    for key in sorted(k for k, v in pii_data.items() if v and k not in PII_MASK_EXCLUDED):
+        if "," in key or len(key) > _MASK_KEY_MAX_LENGTH:
+            continue
+        if len(mask) + len(key) + 1 > _MASK_MAX_LENGTH:
+            break
+        mask += key + ","
+    return mask if mask != "," else ""
+
+
+def pii_fields_from_mask(mask):
+    return [k for k in (mask or "").split(",") if k]
+
+
+def pii_field_q(key, field="pii_fields_mask"):
+    """Filter for rows whose mask includes *key*."""
+    return models.Q(**{f"{field}__contains": f",{key},"})
+
+
+class PiiFieldsMaskField(models.CharField):
+    """
+    Plaintext field-presence mask of the EncryptedJSONField named *source*,
+    recomputed on every save (and bulk_create) in which that value was set
+    or read; an untouched value keeps its stored mask.
+    """
+
+    def __init__(self, *args, source="pii_data", **kwargs):
+        self.source = source
+        kwargs.setdefault("max_length", _MASK_MAX_LENGTH)
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("default", "")
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.source != "pii_data":
+            kwargs["source"] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        data = model_instance.__dict__
+        if self.source in data and not isinstance(data[self.source], EncryptedValue):
+            setattr(model_instance, self.attname, pii_fields_mask(data[self.source]))
+        return getattr(model_instance, self.attname)
@@ -0,0 +1,196 @@
+"""
+Re-encrypt every EncryptedJSONField column under the primary key of
+FIELD_ENCRYPTION_KEY (``manage.py rotate_encryption_key``).
+
+Tokens are rotated with ``MultiFernet.rotate`` — decrypted with whichever
+configured key works and re-encrypted with the first — without JSON
+parsing.  Each column's primary-key span is split into ranges, one per
+worker process; a worker streams its range in pk order with a server-side
+cursor (``.iterator``) and writes each batch back in its own short
+transaction, so only the batch's rows are locked at a time.  Each row is
+written only if it still holds the token that was read: a row the
+application saved in the meantime already carries a token under the
+primary key and is left as it is.  The batch is locked with
+``select_for_update``, compared in Python and written with one
+``bulk_update``, not one UPDATE per row.
+
+Progress is checkpointed per range in a directory: ``plan.json`` fixes the
+ranges (and the primary key they rotate to), and each range records the
+last pk it committed.  Re-running with the same checkpoint resumes; a plan
+for a different primary key is discarded and the rotation starts over.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+from .fields import EncryptedJSONField, _get_fernet
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def encrypted_columns():
+    """``[(label, model, field_name)]`` for every EncryptedJSONField."""
+    columns = []
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, EncryptedJSONField):
+                columns.append((f"{model._meta.label_lower}.{field.name}", model, field.name))
+    return columns
+
+
+def primary_key_fingerprint():
+    key = settings.FIELD_ENCRYPTION_KEY
+    primary = key[0] if isinstance(key, (list, tuple)) else key
+    primary = primary.encode() if isinstance(primary, str) else primary
+    return hashlib.sha256(primary).hexdigest()[:16]
+
+
+def _write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def plan_ranges(workers):
+    """Split each column's pk span into up to *workers* contiguous ranges."""
+    plan = []
+    for label, model, _ in encrypted_columns():
+        bounds = model.objects.aggregate(lo=Min("pk"), hi=Max("pk"))
+        if bounds["lo"] is None:
+            continue
+        lo, hi = bounds["lo"], bounds["hi"]
+        step = max(1, -(-(hi - lo + 1) // workers))
+        for start in range(lo, hi + 1, step):
+            plan.append({"column": label, "lo": start, "hi": min(hi, start + step - 1)})
+    return plan
+
+
+def load_plan(checkpoint_dir, workers):
+    """The checkpointed plan for the current primary key, or a new one."""
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    plan_path = os.path.join(checkpoint_dir, "plan.json")
+    fingerprint = primary_key_fingerprint()
+    saved = _read_json(plan_path)
+    if saved and saved.get("key") == fingerprint:
+        return saved["ranges"], True
+
+    for name in os.listdir(checkpoint_dir):
+        if name.startswith("range-"):
+            os.remove(os.path.join(checkpoint_dir, name))
+    ranges = plan_ranges(workers)
+    for i, r in enumerate(ranges):
+        r["id"] = i
+    _write_json(plan_path, {"key": fingerprint, "ranges": ranges})
+    return ranges, False
+
+
+def _progress_path(checkpoint_dir, range_id):
+    return os.path.join(checkpoint_dir, f"range-{range_id}.json")
+
+
+def _write_batch(model, field_name, batch):
+    """
+    Write ``(pk, old_token, new_token)`` rows still holding *old_token*: the
+    batch's rows are locked, compared here and written in one bulk update.
+    """
+    with transaction.atomic():
+        current = dict(
+            model.objects.select_for_update()
+            .filter(pk__in=[pk for pk, _, _ in batch])
+            .values_list("pk", field_name)
+        )
+        changed = []
+        for pk, old, new in batch:
+            value = current.get(pk)
+            if value is not None and value.ciphertext == old:
+                # A token string is stored as is (see get_prep_value).
+                changed.append(model(pk=pk, **{field_name: new}))
+        model.objects.bulk_update(changed, [field_name], batch_size=len(batch))
+    return len(changed)
+
+
+def rotate_range(checkpoint_dir, r, batch_size=DEFAULT_BATCH_SIZE):
+    """Rotate one planned range from its checkpoint; returns rows rewritten."""
+    columns = {label: (model, name) for label, model, name in encrypted_columns()}
+    model, field_name = columns[r["column"]]
+    progress_path = _progress_path(checkpoint_dir, r["id"])
+    last_pk = (_read_json(progress_path) or {}).get("last_pk", r["lo"] - 1)
+    fernet = _get_fernet()  # a MultiFernet: the command requires 2+ keys
+
+    rows = (
+        model.objects.filter(pk__gt=last_pk, pk__lte=r["hi"])
+        .exclude(**{field_name: None})
+        .order_by("pk")
+        .values_list("pk", field_name)
+        .iterator(chunk_size=batch_size)
+    )
+    rewritten = 0
+    batch = []
+
+    def flush():
+        nonlocal rewritten
+        rewritten += _write_batch(model, field_name, batch)
+        _write_json(progress_path, {"last_pk": batch[-1][0]})
+        batch.clear()
+
+    for pk, value in rows:
+        # Values come back unread (EncryptedValue), i.e. as raw tokens.
+        token = fernet.rotate(value.ciphertext.encode()).decode()
+        batch.append((pk, value.ciphertext, token))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    _write_json(progress_path, {"last_pk": r["hi"], "done": True})
+    return rewritten
+
+
+def _rotate_range_in_worker(args):
+    # Forked workers must not reuse the parent's database connections.
+    connections.close_all()
+    return args[1]["column"], rotate_range(*args)
+
+
+def pending_ranges(checkpoint_dir, ranges):
+    return [
+        r for r in ranges
+        if not (_read_json(_progress_path(checkpoint_dir, r["id"])) or {}).get("done")
+    ]
+
+
+def rotate_all(checkpoint_dir, workers=1, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Rotate every encrypted column, resuming from *checkpoint_dir*.  Returns
+    ``({column: rows_rewritten}, resumed)``.
+    """
+    ranges, resumed = load_plan(checkpoint_dir, workers)
+    todo = pending_ranges(checkpoint_dir, ranges)
+    totals = {}
+    if workers <= 1 or len(todo) <= 1:
+        for r in todo:
+            totals[r["column"]] = totals.get(r["column"], 0) + rotate_range(checkpoint_dir, r, batch_size)
+        return totals, resumed
+
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for column, count in pool.map(
+            _rotate_range_in_worker, [(checkpoint_dir, r, batch_size) for r in todo]
+        ):
+            totals[column] = totals.get(column, 0) + count
+    return totals, resumed
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.15 on 2026-10-19 18:39
+
+import generator.fields
+from django.db import migrations
+
+
+def backfill_pii_fields_mask(apps, schema_editor):
+    # One decrypt per existing row, so listings never have to.
+    from generator.fields import pii_fields_mask
+
+    Model = apps.get_model("generator", "GenerationHistory")
+    batch = []
+    for row in Model.objects.only("id", "pii_data").iterator(chunk_size=500):
+        row.pii_fields_mask = pii_fields_mask(row.pii_data)
+        batch.append(row)
+        if len(batch) >= 500:
+            Model.objects.bulk_update(batch, ["pii_fields_mask"])
+            batch = []
+    if batch:
+        Model.objects.bulk_update(batch, ["pii_fields_mask"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0004_alter_generationhistory_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationhistory',
+            name='pii_fields_mask',
+            field=generator.fields.PiiFieldsMaskField(blank=True, default='', editable=False, max_length=1024),
+        ),
+        migrations.RunPython(backfill_pii_fields_mask, migrations.RunPython.noop),
+    ]
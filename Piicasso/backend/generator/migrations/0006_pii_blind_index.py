@@ -0,0 +1,36 @@
+# Generated by Django 5.2.15 on 2026-10-19 18:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_blind_index(apps, schema_editor):
+    from generator.blind_index import rebuild
+
+    rebuild(
+        apps.get_model("generator", "GenerationHistory"),
+        apps.get_model("generator", "PiiBlindIndex"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0005_generationhistory_pii_fields_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PiiBlindIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('email', 'Email'), ('username', 'Username'), ('name', 'Name')], max_length=10)),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('history', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blind_index', to='generator.generationhistory')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('history', 'kind', 'digest'), name='unique_blind_index_entry')],
+            },
+        ),
+        migrations.RunPython(build_blind_index, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
-from .fields import EncryptedJSONField
+from .fields import EncryptedJSONField, EncryptedValue, PiiFieldsMaskField
 
 User = get_user_model()
 
@@ -11,6 +11,7 @@ class GenerationHistory(models.Model):
     team_membership = property(lambda self: self.user.generation_history if self.user else None)
     timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
     pii_data = EncryptedJSONField()  # Fernet-encrypted at rest; never stored as plaintext
+    pii_fields_mask = PiiFieldsMaskField()  # which pii_data keys were non-empty
     wordlist = models.JSONField()
     wordlist_count = models.PositiveIntegerField(default=0, db_index=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True, db_index=True)
@@ -27,7 +28,101 @@ class GenerationHistory(models.Model):
     def save(self, *args, **kwargs):
         if self.wordlist:
             self.wordlist_count = len(self.wordlist)
+        update_fields = kwargs.get("update_fields")
+        pii_data = self.__dict__.get("pii_data")
+        # Reindex only when pii_data was assigned or read (an untouched value
+        # is still the ciphertext it was loaded with).
+        reindex = (
+            "pii_data" in self.__dict__
+            and not isinstance(pii_data, EncryptedValue)
+            and (update_fields is None or "pii_data" in update_fields)
+        )
         super().save(*args, **kwargs)
+        if reindex:
+            from .blind_index import reindex as reindex_blind_index
+
+            reindex_blind_index(self)
 
     def __str__(self):
         return f"Generated @ {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+
+
+class PiiBlindIndex(models.Model):
+    """Keyed HMAC of one normalized PII value of a generation (generator.blind_index)."""
+    KIND_CHOICES = [
+        ('email', 'Email'),
+        ('username', 'Username'),
+        ('name', 'Name'),
+    ]
+
+    history = models.ForeignKey(GenerationHistory, on_delete=models.CASCADE, related_name='blind_index')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    digest = models.CharField(max_length=64, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['history', 'kind', 'digest'], name='unique_blind_index_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} index for generation {self.history_id}"
+
+
+class ReportArtifact(models.Model):
+    """
+    Rendered PDF report of a generation, per report layout version
+    (wordgen.services.report_service).  The file lives in the "reports"
+    storage under its SHA-256.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+
+    history = models.ForeignKey(GenerationHistory, on_delete=models.CASCADE, related_name='report_artifacts')
+    version = models.PositiveSmallIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    size = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['history', 'version'], name='unique_report_artifact'),
+        ]
+
+    def __str__(self):
+        return f"Report v{self.version} of generation {self.history_id} ({self.status})"
+
+
+class GenerationBatch(models.Model):
+    """
+    One multi-profile generation request: a Celery chord of one task per
+    profile (wordgen.services.batch_generation_service).  Profiles are not
+    stored here; each becomes a GenerationHistory listed in ``results``.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='generation_batches')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # [{"index", "history_id", "count"} | {"index", "error"}], set by the chord callback
+    results = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Generation batch {self.pk} ({self.completed}/{self.total}, {self.status})"
+
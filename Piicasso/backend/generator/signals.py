@@ -0,0 +1,23 @@
+"""
+Model signal handlers, connected in ``GeneratorConfig.ready``.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ReportArtifact
+
+
+@receiver(post_delete, sender=ReportArtifact)
+def delete_report_file(sender, instance, **kwargs):
+    """
+    A report prints the profile's PII, so its stored file goes with the last
+    artifact that references it — including artifacts cascaded away with
+    their generation.  Runs after commit, so a rolled-back delete keeps it.
+    """
+    if instance.sha256:
+        from wordgen.services.report_service import delete_pdf_if_unused
+
+        sha256 = instance.sha256
+        transaction.on_commit(lambda: delete_pdf_if_unused(sha256))
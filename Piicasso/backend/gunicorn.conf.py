@@ -0,0 +1,27 @@
+"""
+Gunicorn settings, read from the working directory by ``start.sh`` and the
+Procfile alike (command-line flags still set workers, threads and so on).
+
+Workers are separate processes, so Prometheus metrics (``backend.metrics``)
+use ``prometheus_client``'s multiprocess mode: every worker writes its
+values under ``PROMETHEUS_MULTIPROC_DIR`` and ``/metrics`` aggregates the
+directory, whichever worker serves the scrape.
+"""
+
+import os
+import shutil
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/piicasso-prometheus")
+
+
+def on_starting(server):
+    # Values left by a previous master would be counted again.
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
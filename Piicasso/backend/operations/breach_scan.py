@@ -0,0 +1,266 @@
+"""
+Batch breach scan — org-wide exposure assessment from a CSV of emails.
+
+A ``BreachScanJob`` holds the (encrypted) address list; the scan runs in the
+background and works through it with a small thread pool:
+
+  - every lookup waits for a slot of the API key's shared ``RateLimiter``
+    (operations.breach_search), which also paces breach searches and other
+    running scans, so the pool keeps the key saturated without tripping
+    its limit
+  - a 429 pushes every caller's next slot past ``Retry-After`` and the
+    address is retried (up to ``_MAX_ATTEMPTS``)
+  - addresses already in the breach cache (operations.breach_search) are
+    answered without spending a slot
+
+Results are persisted in batches as they complete and each flush pushes a
+``breach_scan_progress`` event to the user's ``gen_user_{id}`` channel
+group.  A run skips lines that already have an OK result and rescans the
+rest, so ``retry_breach_scan`` resumes a failed job, retries the
+rate-limited and failed lines of a completed one, and takes over a job
+whose worker died (no flush for ``RUNNING_STALE_AFTER``).  Stored results
+carry only a masked address and its keyed hash.
+"""
+
+import csv
+import io
+import logging
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from backend.tasks_util import dispatch
+
+logger = logging.getLogger("operations")
+
+DEFAULT_MAX_EMAILS = 1000
+DEFAULT_WORKERS = 4
+FLUSH_EVERY = 25
+_MAX_ATTEMPTS = 3
+# A PENDING or RUNNING job not flushed for this long lost its worker.
+RUNNING_STALE_AFTER = timedelta(minutes=15)
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def get_max_emails():
+    return int(settings.PIICASSO_SETTINGS.get("BREACH_SCAN_MAX_EMAILS", DEFAULT_MAX_EMAILS))
+
+
+def get_worker_count():
+    return max(1, int(settings.PIICASSO_SETTINGS.get("BREACH_SCAN_WORKERS", DEFAULT_WORKERS)))
+
+
+# ---------------------------------------------------------------------------
+# Input
+# ---------------------------------------------------------------------------
+
+
+def parse_email_csv(uploaded):
+    """
+    Every email-shaped cell of the CSV, in order, de-duplicated
+    case-insensitively; header rows and other columns are ignored.
+    """
+    text = uploaded.read().decode("utf-8-sig", errors="ignore")
+    return normalize_emails(
+        cell for row in csv.reader(io.StringIO(text)) for cell in row
+    )
+
+
+def normalize_emails(values):
+    emails = {}
+    for value in values:
+        email = str(value).strip()
+        if len(email) <= 254 and _EMAIL_RE.match(email):
+            emails.setdefault(email.lower(), email)
+    return list(emails.values())
+
+
+def mask_email(email):
+    local, _, domain = email.partition("@")
+    if len(local) <= 2:
+        masked = "*" * len(local)
+    else:
+        masked = local[0] + "*" * (len(local) - 2) + local[-1]
+    return f"{masked}@{domain}"
+
+
+# ---------------------------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------------------------
+
+
+def scan_email(email, api_key):
+    """
+    ``(status, breaches, cached)`` for one address; spends a rate-limit slot
+    only when the cache cannot answer.
+    """
+    from .breach_search import fetch_account_breaches, get_deadline, get_fresh_account_breaches
+
+    breaches = get_fresh_account_breaches(email)
+    if breaches is not None:
+        return "OK", breaches, True
+
+    for _ in range(_MAX_ATTEMPTS):
+        try:
+            result = fetch_account_breaches(email, api_key, get_deadline())
+        except Exception as e:
+            logger.warning(f"Breach scan lookup failed: {e}")
+            return "ERROR", [], False
+        if result.get("rate_limited"):
+            continue
+        if "breaches" not in result:
+            return "ERROR", [], False
+        return "OK", result["breaches"], False
+    return "RATE_LIMITED", [], False
+
+
+# ---------------------------------------------------------------------------
+# Job
+# ---------------------------------------------------------------------------
+
+
+def _send_progress(job, event_type="breach_scan_progress"):
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            f"gen_user_{job.user_id}",
+            {
+                "type": event_type,
+                "job_id": job.pk,
+                "status": job.status,
+                "processed": job.processed,
+                "total": job.total,
+                "breached": job.breached,
+            },
+        )
+    except Exception as e:
+        logger.warning(f"Could not push breach scan progress: {e}")
+
+
+def _flush(job, buffer):
+    from .models import BreachScanJob, BreachScanResult
+
+    BreachScanResult.objects.bulk_create(buffer, ignore_conflicts=True)
+    job.processed = job.results.count()
+    job.breached = job.results.filter(breach_count__gt=0).count()
+    BreachScanJob.objects.filter(pk=job.pk).update(
+        processed=job.processed, breached=job.breached, updated_at=timezone.now()
+    )
+    buffer.clear()
+    _send_progress(job)
+
+
+def run_breach_scan(job_id):
+    """Scan every address of the job that has no OK result yet."""
+    from .breach_search import account_cache_key
+    from .models import BreachScanJob, BreachScanResult
+
+    job = BreachScanJob.objects.get(pk=job_id)
+    if job.status == "COMPLETED":
+        return job
+
+    api_key = os.environ.get("HIBP_API_KEY", "")
+    job.results.exclude(status="OK").delete()
+    done = set(job.results.values_list("line", flat=True))
+    pending = [
+        (line, email) for line, email in enumerate(job.emails, start=1) if line not in done
+    ]
+
+    job.status = "RUNNING"
+    job.started_at = job.started_at or timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    buffer = []
+    try:
+        with ThreadPoolExecutor(
+            max_workers=get_worker_count(), thread_name_prefix="breach-scan"
+        ) as pool:
+            futures = {
+                pool.submit(scan_email, email, api_key): (line, email)
+                for line, email in pending
+            }
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    line, email = futures.pop(future)
+                    status, breaches, cached = future.result()
+                    buffer.append(BreachScanResult(
+                        job=job,
+                        line=line,
+                        email_masked=mask_email(email),
+                        email_hash=account_cache_key(email).rsplit(":", 1)[1],
+                        status=status,
+                        breach_count=len(breaches),
+                        breaches=[b.get("name", "Unknown") for b in breaches],
+                        cached=cached,
+                    ))
+                if len(buffer) >= FLUSH_EVERY:
+                    _flush(job, buffer)
+        _flush(job, buffer)
+    except Exception as e:
+        logger.error(f"Breach scan job {job.pk} failed: {e}")
+        if buffer:
+            _flush(job, buffer)
+        job.status = "FAILED"
+        job.error = "Scan interrupted; retry the job to resume."
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        _send_progress(job, "breach_scan_complete")
+        return job
+
+    job.status = "COMPLETED"
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at"])
+    _send_progress(job, "breach_scan_complete")
+
+    from .views import create_notification
+
+    create_notification(
+        job.user,
+        "SECURITY",
+        "Batch breach scan completed",
+        f"{job.breached} of {job.total} addresses found in breaches.",
+        link="/darkweb",
+    )
+    return job
+
+
+def is_retryable(job):
+    """Failed, stale, or completed with lines that are not OK."""
+    if job.status in ("PENDING", "RUNNING"):
+        return timezone.now() - job.updated_at > RUNNING_STALE_AFTER
+    if job.status == "FAILED":
+        return True
+    return job.results.exclude(status="OK").exists()
+
+
+def retry_breach_scan(job):
+    """
+    Re-queue *job* for its lines without an OK result.  False when it is not
+    retryable or another request has just re-queued it.
+    """
+    from .models import BreachScanJob
+
+    if not is_retryable(job):
+        return False
+    claimed = BreachScanJob.objects.filter(pk=job.pk, updated_at=job.updated_at).update(
+        status="PENDING", error="", finished_at=None, updated_at=timezone.now()
+    )
+    if not claimed:
+        return False
+    schedule_breach_scan(job.pk)
+    return True
+
+
+def schedule_breach_scan(job_id):
+    """Run the scan off the request (Celery with a broker, else a daemon thread)."""
+    from .tasks import breach_scan_job_task
+
+    dispatch(breach_scan_job_task, job_id)
@@ -0,0 +1,353 @@
+"""
+Breach search — concurrent source fan-out for ``BreachSearchView``.
+
+Every breach source for a query runs at once, each on its own small thread
+pool (so a slow source cannot starve the others), over one pooled HTTP
+session, under a single overall deadline (PIICASSO_SETTINGS
+``BREACH_SEARCH_DEADLINE``, seconds).  Whatever has not finished by then is
+reported in ``timed_out`` and the rest is returned, so the worst case is the
+deadline rather than the sum of every source's timeout.  Lookups still
+queued at the deadline are cancelled rather than left to run for nobody.
+
+Sources:
+
+  breaches    HIBP ``breachedaccount`` (emails only; needs HIBP_API_KEY)
+  password    HIBP Pwned Passwords via k-anonymity (password_security.hibp)
+  internal    generation profiles holding the query as an email, username or
+              name, via the blind index (generator.blind_index); runs on the
+              request thread while the remote sources are in flight
+
+Email lookups are cached (``breach_account:{hmac}``, an HMAC of the
+normalized address keyed with SECRET_KEY, so the cache never holds the
+address itself).  Found breaches stay fresh for ``BREACH_CACHE_TTL``;
+404s are cached as an empty list for ``BREACH_CACHE_NEGATIVE_TTL``.  After
+that an entry is still served for ``BREACH_CACHE_STALE_TTL`` more seconds
+while a single background refresh replaces it (stale-while-revalidate).
+Rate-limited and failed lookups are never cached.
+
+Every ``breachedaccount`` call — searches, background refreshes and batch
+scans (operations.breach_scan) alike — takes a slot from one ``RateLimiter``
+per API key, kept in the shared cache, so together they stay under the
+key's rate (PIICASSO_SETTINGS ``HIBP_RATE_LIMIT_RPM``) however many
+workers, jobs and processes are running.
+
+The scan notification is written off the request path (Celery when a
+broker is configured, a daemon thread otherwise).
+"""
+
+import hashlib
+import hmac
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.tasks_util import dispatch
+from password_security.hibp import k_anonymity_breach_count
+
+logger = logging.getLogger("operations")
+
+BREACHED_ACCOUNT_URL = "https://haveibeenpwned.com/api/v3/breachedaccount/{account}"
+DEFAULT_DEADLINE = 10.0
+DEFAULT_RATE_LIMIT_RPM = 10
+# Threads per source pool; "refresh" runs the stale-while-revalidate fetches.
+_SOURCE_WORKERS = {"password": 4, "breaches": 2, "refresh": 2}
+
+BREACH_CACHE_TTL = 6 * 60 * 60  # 6 hours
+BREACH_CACHE_NEGATIVE_TTL = 60 * 60  # 1 hour
+BREACH_CACHE_STALE_TTL = 24 * 60 * 60  # 24 hours
+_REFRESH_LOCK_TTL = 60
+
+_lock = threading.Lock()
+_session = None
+_executors = {}
+
+
+def get_deadline():
+    return float(settings.PIICASSO_SETTINGS.get("BREACH_SEARCH_DEADLINE", DEFAULT_DEADLINE))
+
+
+def get_rate_limit_rpm():
+    return float(settings.PIICASSO_SETTINGS.get("HIBP_RATE_LIMIT_RPM", DEFAULT_RATE_LIMIT_RPM))
+
+
+def get_session():
+    """Process-wide pooled session shared by every source lookup."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                session.mount("https://", requests.adapters.HTTPAdapter(
+                    pool_connections=2, pool_maxsize=sum(_SOURCE_WORKERS.values())
+                ))
+                _session = session
+    return _session
+
+
+def get_executor(source):
+    """Process-wide thread pool for one breach *source*."""
+    executor = _executors.get(source)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(source)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=_SOURCE_WORKERS[source],
+                    thread_name_prefix=f"breach-search-{source}",
+                )
+                _executors[source] = executor
+    return executor
+
+
+# ---------------------------------------------------------------------------
+# Rate limit
+# ---------------------------------------------------------------------------
+
+
+class RateLimiter:
+    """
+    Evenly spaced HIBP request slots for one API key, shared through the
+    cache.  Slot *n* is the *n*-th ``interval`` of wall-clock time and is
+    taken with an atomic ``cache.add``, so at most one request starts per
+    interval across every process; ``penalize`` defers all later slots.
+    """
+
+    def __init__(self, api_key, per_minute=None, clock=time.time, sleep=time.sleep):
+        self.interval = 60.0 / (per_minute or get_rate_limit_rpm())
+        digest = hmac.new(settings.SECRET_KEY.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+        self._prefix = f"hibp_rate:{digest[:32]}"
+        self._clock = clock
+        self._sleep = sleep
+
+    def acquire(self, max_wait=None):
+        """Wait for the next free slot; False if none starts within *max_wait* seconds."""
+        now = self._clock()
+        start = max(now, cache.get(f"{self._prefix}:blocked", 0))
+        slot = math.floor(start / self.interval)
+        while True:
+            at = max(start, slot * self.interval)
+            if max_wait is not None and at - now > max_wait:
+                return False
+            if cache.add(f"{self._prefix}:{slot}", 1, at - now + self.interval + 60):
+                break
+            slot += 1
+        if at > now:
+            self._sleep(at - now)
+        return True
+
+    def penalize(self, seconds):
+        until = self._clock() + seconds
+        if until > cache.get(f"{self._prefix}:blocked", 0):
+            cache.set(f"{self._prefix}:blocked", until, seconds + 60)
+
+
+# ---------------------------------------------------------------------------
+# Sources — each returns a dict merged into the response
+# ---------------------------------------------------------------------------
+
+
+def _format_breach(breach):
+    return {
+        "name": breach.get("Name", "Unknown"),
+        "domain": breach.get("Domain", "N/A"),
+        "breach_date": breach.get("BreachDate", "N/A"),
+        "data_classes": breach.get("DataClasses", []),
+        "is_verified": breach.get("IsVerified", False),
+        "description": breach.get("Description", ""),
+    }
+
+
+def _cache_setting(name, default):
+    return int(settings.PIICASSO_SETTINGS.get(name, default))
+
+
+def account_cache_key(email):
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), email.strip().lower().encode(), hashlib.sha256
+    ).hexdigest()
+    return f"breach_account:{digest}"
+
+
+def fetch_account_breaches(email, api_key, timeout, max_wait=None):
+    """
+    Call HIBP and cache 200/404 answers; other statuses are not cached.
+    Waits for a rate-limit slot first — at most *max_wait* seconds, else the
+    lookup is reported as rate limited without a request.
+    """
+    limiter = RateLimiter(api_key)
+    if not limiter.acquire(max_wait):
+        return {"rate_limited": True}
+
+    resp = get_session().get(
+        BREACHED_ACCOUNT_URL.format(account=quote(email, safe="")),
+        params={"truncateResponse": "true"},
+        headers={
+            "User-Agent": "PIIcasso-SecurityAudit",
+            "hibp-api-key": api_key,
+        },
+        timeout=timeout,
+    )
+    if resp.status_code == 200:
+        breaches = [_format_breach(b) for b in resp.json()]
+        fresh_for = _cache_setting("BREACH_CACHE_TTL", BREACH_CACHE_TTL)
+    elif resp.status_code == 404:
+        # No breaches found — good news, and worth remembering.
+        breaches = []
+        fresh_for = _cache_setting("BREACH_CACHE_NEGATIVE_TTL", BREACH_CACHE_NEGATIVE_TTL)
+    elif resp.status_code == 429:
+        result = {"rate_limited": True}
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            try:
+                result["retry_after"] = float(retry_after)
+            except ValueError:
+                pass
+        limiter.penalize(result.get("retry_after", limiter.interval))
+        return result
+    else:
+        return {}
+
+    stale_for = _cache_setting("BREACH_CACHE_STALE_TTL", BREACH_CACHE_STALE_TTL)
+    cache.set(
+        account_cache_key(email),
+        {"breaches": breaches, "fetched_at": time.time(), "fresh_for": fresh_for},
+        fresh_for + stale_for,
+    )
+    return {"breaches": breaches}
+
+
+def get_fresh_account_breaches(email):
+    """Cached breach list for *email* if still fresh, else None (no API call)."""
+    entry = cache.get(account_cache_key(email))
+    if entry is not None and time.time() - entry["fetched_at"] < entry["fresh_for"]:
+        return entry["breaches"]
+    return None
+
+
+def _refresh_account_breaches(email, api_key, lock_key):
+    try:
+        fetch_account_breaches(email, api_key, get_deadline(), max_wait=get_deadline())
+    except Exception as e:
+        logger.warning(f"Background breach refresh failed: {e}")
+    finally:
+        cache.delete(lock_key)
+
+
+def _schedule_refresh(email, api_key):
+    """Start one background refresh per address; concurrent callers skip."""
+    lock_key = f"{account_cache_key(email)}:refreshing"
+    if cache.add(lock_key, 1, _REFRESH_LOCK_TTL):
+        get_executor("refresh").submit(_refresh_account_breaches, email, api_key, lock_key)
+
+
+def lookup_email_breaches(email, timeout=DEFAULT_DEADLINE):
+    """HIBP breachedaccount lookup (requires the paid HIBP_API_KEY), cached."""
+    from backend.metrics import record_cache
+
+    api_key = os.environ.get("HIBP_API_KEY", "")
+    if not api_key:
+        return {"hibp_note": "Email breach lookup requires HIBP API key configuration."}
+
+    entry = cache.get(account_cache_key(email))
+    record_cache("breach_account", entry is not None)
+    if entry is not None:
+        if time.time() - entry["fetched_at"] < entry["fresh_for"]:
+            return {"breaches": entry["breaches"], "breach_cache": "hit"}
+        _schedule_refresh(email, api_key)
+        return {"breaches": entry["breaches"], "breach_cache": "stale"}
+
+    try:
+        return fetch_account_breaches(email, api_key, timeout, max_wait=timeout)
+    except Exception as e:
+        logger.warning(f"HIBP breachedaccount lookup failed: {e}")
+        return {"hibp_error": "Breach lookup temporarily unavailable."}
+
+
+def lookup_password_exposures(query):
+    """Pwned Passwords count for the query itself (only a 5-hex prefix leaves)."""
+    count = k_anonymity_breach_count(query)
+    return {"password_exposures": count} if count >= 0 else {}
+
+
+def risk_score(results):
+    return round(min(
+        100,
+        (len(results["breaches"]) * 15)
+        + (min(results["password_exposures"], 100) * 0.5)
+        + (results["internal_matches"] * 5),
+    ))
+
+
+def lookup_internal_matches(query, user=None):
+    from generator.blind_index import match_count
+
+    return {"internal_matches": match_count(query, user)}
+
+
+def run_breach_search(query, deadline=None, user=None):
+    """
+    Query every applicable source concurrently; returns the response dict.
+    Internal matches cover *user*'s own history (all of it for superusers).
+    """
+    deadline = get_deadline() if deadline is None else deadline
+    results = {
+        "breaches": [],
+        "password_exposures": 0,
+        "internal_matches": 0,
+        "query": query,
+    }
+
+    sources = {"password": (lookup_password_exposures, query)}
+    if "@" in query:
+        sources["breaches"] = (lookup_email_breaches, query, deadline)
+
+    pending = {
+        get_executor(name).submit(fn, *args): name for name, (fn, *args) in sources.items()
+    }
+    started = time.monotonic()
+    try:
+        results.update(lookup_internal_matches(query, user))
+    except Exception as e:
+        logger.warning(f"Breach source internal failed: {e}")
+
+    while pending:
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = pending.pop(future)
+            try:
+                results.update(future.result())
+            except Exception as e:
+                logger.warning(f"Breach source {name} failed: {e}")
+
+    if pending:
+        # Lookups still queued are cancelled; ones already running finish on
+        # their pool and their results are dropped.
+        for future in pending:
+            future.cancel()
+        results["timed_out"] = sorted(pending.values())
+
+    results["risk_score"] = risk_score(results)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Deferred notification
+# ---------------------------------------------------------------------------
+
+
+def schedule_scan_notification(user_id, breach_count, password_exposures):
+    """Write the "Breach scan completed" notification after the response."""
+    from .tasks import breach_scan_notification_task
+
+    dispatch(breach_scan_notification_task, user_id, breach_count, password_exposures)
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.15 on 2026-10-19 18:30
+
+import django.db.models.deletion
+import generator.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0006_add_sender_recipient_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BreachScanJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('emails', generator.fields.EncryptedJSONField(default=list)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('breached', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='breach_scan_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BreachScanResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.PositiveIntegerField()),
+                ('email_masked', models.CharField(max_length=254)),
+                ('email_hash', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('OK', 'OK'), ('RATE_LIMITED', 'Rate limited'), ('ERROR', 'Error')], default='OK', max_length=20)),
+                ('breach_count', models.PositiveIntegerField(default=0)),
+                ('breaches', models.JSONField(blank=True, default=list)),
+                ('cached', models.BooleanField(default=False)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='operations.breachscanjob')),
+            ],
+            options={
+                'ordering': ['line'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='breachscanjob',
+            index=models.Index(fields=['user', 'created_at'], name='operations__user_id_c29364_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='breachscanresult',
+            constraint=models.UniqueConstraint(fields=('job', 'line'), name='unique_breach_scan_line'),
+        ),
+    ]
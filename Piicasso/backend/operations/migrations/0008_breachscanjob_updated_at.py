@@ -0,0 +1,18 @@
+# Generated by Django 5.2.15 on 2026-10-19 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0007_breach_scan_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='breachscanjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from generator.fields import EncryptedJSONField
+
 User = get_user_model()
 
 class SystemLog(models.Model):
@@ -111,3 +113,61 @@ class SystemSetting(models.Model):
             defaults={'value': str(value), 'updated_by': user, 'description': description}
         )
         return obj
+
+
+class BreachScanJob(models.Model):
+    """Batch email breach scan (operations.breach_scan)."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='breach_scan_jobs')
+    emails = EncryptedJSONField(default=list)  # Fernet-encrypted input list
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    breached = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # also bumped on every progress flush
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"BreachScanJob {self.pk} ({self.status}, {self.processed}/{self.total})"
+
+
+class BreachScanResult(models.Model):
+    """One scanned address; only a masked form and a keyed hash are stored."""
+    STATUS_CHOICES = [
+        ('OK', 'OK'),
+        ('RATE_LIMITED', 'Rate limited'),
+        ('ERROR', 'Error'),
+    ]
+
+    job = models.ForeignKey(BreachScanJob, on_delete=models.CASCADE, related_name='results')
+    line = models.PositiveIntegerField()
+    email_masked = models.CharField(max_length=254)
+    email_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='OK')
+    breach_count = models.PositiveIntegerField(default=0)
+    breaches = models.JSONField(default=list, blank=True)  # breach names
+    cached = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['line']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'line'], name='unique_breach_scan_line'),
+        ]
+
+    def __str__(self):
+        return f"{self.email_masked}: {self.breach_count} breaches"
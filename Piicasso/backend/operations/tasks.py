@@ -0,0 +1,21 @@
+from celery import shared_task
+
+from .models import Notification
+
+
+@shared_task(ignore_result=True)
+def breach_scan_notification_task(user_id, breach_count, password_exposures):
+    Notification.objects.create(
+        user_id=user_id,
+        notification_type="SECURITY",
+        title="Breach scan completed",
+        description=f"Found {breach_count} breaches, {password_exposures} password exposures.",
+        link="/darkweb",
+    )
+
+
+@shared_task(ignore_result=True)
+def breach_scan_job_task(job_id):
+    from .breach_scan import run_breach_scan
+
+    run_breach_scan(job_id)
@@ -4,6 +4,7 @@ PIIcasso Backend Tests — operations app
 Tests for notifications, messaging, breach search, and system settings.
 """
 
+from django.conf import settings
 from django.test import TestCase
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
@@ -103,6 +104,8 @@ class MessagingTest(TestCase):
 
 class BreachSearchTest(TestCase):
     def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
         self.user = User.objects.create_user("breachuser", password="Pass1234!")
         self.client = APIClient()
         self.client.force_authenticate(user=self.user)
@@ -119,7 +122,7 @@ class BreachSearchTest(TestCase):
         self.assertEqual(response.status_code, 400)
 
     @patch.dict(os.environ, {}, clear=False)
-    @patch("operations.views.k_anonymity_breach_count", return_value=0)
+    @patch("operations.breach_search.k_anonymity_breach_count", return_value=0)
     def test_breach_search_valid_email_does_not_500(self, mock_breach_count):
         os.environ.pop("HIBP_API_KEY", None)
         response = self.client.post(
@@ -132,8 +135,8 @@ class BreachSearchTest(TestCase):
         self.assertEqual(response.data["internal_matches"], 0)
 
     @patch.dict(os.environ, {"HIBP_API_KEY": "test-key"}, clear=False)
-    @patch("requests.get")
-    @patch("operations.views.k_anonymity_breach_count", return_value=0)
+    @patch("requests.Session.get")
+    @patch("operations.breach_search.k_anonymity_breach_count", return_value=0)
     def test_breach_search_email_uses_hibp_account_path(
         self, mock_breach_count, mock_get
     ):
@@ -156,7 +159,7 @@ class BreachSearchTest(TestCase):
             timeout=10,
         )
 
-    @patch("operations.views.k_anonymity_breach_count", return_value=42)
+    @patch("operations.breach_search.k_anonymity_breach_count", return_value=42)
     def test_breach_search_password_check(self, mock_breach_count):
         """Test password exposure handling without relying on the live HIBP API."""
         response = self.client.post(
@@ -166,7 +169,7 @@ class BreachSearchTest(TestCase):
         self.assertIn("password_exposures", response.data)
         self.assertEqual(response.data["password_exposures"], 42)
 
-    @patch("operations.views.k_anonymity_breach_count", return_value=0)
+    @patch("operations.breach_search.k_anonymity_breach_count", return_value=0)
     def test_breach_search_non_email_uses_internal_matches_safely(
         self, mock_breach_count
     ):
@@ -177,6 +180,23 @@ class BreachSearchTest(TestCase):
         self.assertEqual(response.data["internal_matches"], 0)
         self.assertEqual(response.data["risk_score"], 0)
 
+    @patch("operations.breach_search.k_anonymity_breach_count", return_value=0)
+    def test_breach_search_counts_internal_profile_matches(self, mock_breach_count):
+        from generator.models import GenerationHistory
+
+        GenerationHistory.objects.create(
+            user=self.user, pii_data={"full_name": "Jane Doe"}, wordlist=["pass1"]
+        )
+        GenerationHistory.objects.create(
+            user=self.user, pii_data={"spouse_name": "jane  doe"}, wordlist=["pass2"]
+        )
+        response = self.client.post(
+            "/api/operations/breach-search/", {"query": "Jane Doe"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["internal_matches"], 2)
+        self.assertEqual(response.data["risk_score"], 10)
+
     def test_unauthenticated_breach_search(self):
         client = APIClient()
         response = client.post(
@@ -217,3 +237,383 @@ class SystemSettingsTest(TestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(SystemSetting.get("maintenance_mode"), "true")
+
+
+class ConcurrentBreachSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("fanoutuser", password="Pass1234!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        patcher = patch("operations.views.BreachSearchView.get_throttles", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _search(self, query):
+        return self.client.post("/api/operations/breach-search/", {"query": query}, format="json")
+
+    @patch.dict(os.environ, {"HIBP_API_KEY": "test-key"}, clear=False)
+    def test_sources_run_concurrently(self):
+        import time
+
+        def slow_breaches(*args):
+            time.sleep(0.4)
+            return {"breaches": [{"name": "Adobe"}]}
+
+        def slow_exposures(*args):
+            time.sleep(0.4)
+            return {"password_exposures": 7}
+
+        with patch("operations.breach_search.lookup_email_breaches", side_effect=slow_breaches), \
+                patch("operations.breach_search.lookup_password_exposures", side_effect=slow_exposures):
+            started = time.monotonic()
+            response = self._search("person@example.com")
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, 0.75)
+        self.assertEqual(len(response.data["breaches"]), 1)
+        self.assertEqual(response.data["password_exposures"], 7)
+        self.assertNotIn("timed_out", response.data)
+        self.assertEqual(response.data["risk_score"], 18)
+
+    def test_deadline_returns_finished_sources(self):
+        import threading
+        import time
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        with self.settings(PIICASSO_SETTINGS={**settings.PIICASSO_SETTINGS, "BREACH_SEARCH_DEADLINE": 0.2}), \
+                patch("operations.breach_search.lookup_email_breaches",
+                      side_effect=lambda *a: release.wait(5) and {}), \
+                patch("operations.breach_search.lookup_password_exposures",
+                      return_value={"password_exposures": 3}):
+            started = time.monotonic()
+            response = self._search("person@example.com")
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(response.data["timed_out"], ["breaches"])
+        self.assertEqual(response.data["password_exposures"], 3)
+
+    def test_deadline_cancels_queued_lookups(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+        busy = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(busy.shutdown)
+        busy.submit(release.wait, 5)
+
+        with self.settings(PIICASSO_SETTINGS={**settings.PIICASSO_SETTINGS, "BREACH_SEARCH_DEADLINE": 0.2}), \
+                patch.dict("operations.breach_search._executors", {"breaches": busy}), \
+                patch("operations.breach_search.lookup_email_breaches", return_value={}) as lookup, \
+                patch("operations.breach_search.lookup_password_exposures",
+                      return_value={"password_exposures": 3}):
+            response = self._search("person@example.com")
+            release.set()
+            busy.shutdown(wait=True)
+
+        self.assertEqual(response.data["timed_out"], ["breaches"])
+        lookup.assert_not_called()
+
+    @patch("operations.breach_search.k_anonymity_breach_count", return_value=5)
+    def test_notification_written_by_task(self, mock_breach_count):
+        response = self._search("password123")
+        self.assertEqual(response.status_code, 200)
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(notification.title, "Breach scan completed")
+        self.assertIn("5 password exposures", notification.description)
+
+
+@patch.dict(os.environ, {"HIBP_API_KEY": "test-key"}, clear=False)
+class BreachAccountCacheTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from django.test import override_settings
+
+        cache.clear()
+        fast = override_settings(PIICASSO_SETTINGS={**settings.PIICASSO_SETTINGS, "HIBP_RATE_LIMIT_RPM": 60000})
+        fast.enable()
+        self.addCleanup(fast.disable)
+
+    def _response(self, status_code, payload=None):
+        from unittest.mock import MagicMock
+        resp = MagicMock(status_code=status_code, headers={})
+        resp.json.return_value = payload or []
+        return resp
+
+    @patch("requests.Session.get")
+    def test_repeat_lookup_served_from_cache(self, mock_get):
+        from operations.breach_search import lookup_email_breaches
+
+        mock_get.return_value = self._response(200, [{"Name": "Adobe"}])
+        first = lookup_email_breaches("Person@Example.com")
+        second = lookup_email_breaches(" person@example.com")
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertNotIn("breach_cache", first)
+        self.assertEqual(second["breach_cache"], "hit")
+        self.assertEqual(second["breaches"][0]["name"], "Adobe")
+
+    @patch("requests.Session.get")
+    def test_not_found_is_negatively_cached(self, mock_get):
+        from operations.breach_search import lookup_email_breaches
+
+        mock_get.return_value = self._response(404)
+        lookup_email_breaches("clean@example.com")
+        result = lookup_email_breaches("clean@example.com")
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(result, {"breaches": [], "breach_cache": "hit"})
+
+    @patch("requests.Session.get")
+    def test_rate_limited_and_failed_lookups_are_not_cached(self, mock_get):
+        from operations.breach_search import lookup_email_breaches
+
+        mock_get.return_value = self._response(429)
+        self.assertEqual(lookup_email_breaches("busy@example.com"), {"rate_limited": True})
+        mock_get.side_effect = ConnectionError("offline")
+        self.assertIn("hibp_error", lookup_email_breaches("busy@example.com"))
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_stale_entry_served_while_refreshing(self, mock_get):
+        import time
+        from django.core.cache import cache
+        from operations.breach_search import account_cache_key, lookup_email_breaches
+
+        key = account_cache_key("old@example.com")
+        cache.set(key, {"breaches": [{"name": "Old"}], "fetched_at": time.time() - 10, "fresh_for": 1}, 60)
+        mock_get.return_value = self._response(200, [{"Name": "New"}])
+
+        result = lookup_email_breaches("old@example.com")
+        self.assertEqual(result["breach_cache"], "stale")
+        self.assertEqual(result["breaches"], [{"name": "Old"}])
+
+        deadline = time.monotonic() + 2
+        while cache.get(key)["breaches"][0]["name"] != "New" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(cache.get(key)["breaches"][0]["name"], "New")
+        self.assertEqual(lookup_email_breaches("old@example.com")["breach_cache"], "hit")
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_cache_key_does_not_contain_address(self):
+        from operations.breach_search import account_cache_key
+
+        self.assertNotIn("example", account_cache_key("person@example.com"))
+        self.assertEqual(account_cache_key("A@B.co"), account_cache_key("a@b.co "))
+
+
+@patch.dict(os.environ, {"HIBP_API_KEY": "test-key"}, clear=False)
+class BreachScanJobTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from django.test import override_settings
+
+        cache.clear()
+        self.user = User.objects.create_user("scanuser", password="Pass1234!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        patcher = patch("operations.views.BreachScanView.get_throttles", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        fast = override_settings(PIICASSO_SETTINGS={**settings.PIICASSO_SETTINGS, "HIBP_RATE_LIMIT_RPM": 60000})
+        fast.enable()
+        self.addCleanup(fast.disable)
+
+    def _response(self, status_code, payload=None, headers=None):
+        from unittest.mock import MagicMock
+        resp = MagicMock(status_code=status_code, headers=headers or {})
+        resp.json.return_value = payload or []
+        return resp
+
+    def _hibp(self, url, **kwargs):
+        if "breached%40" in url:
+            return self._response(200, [{"Name": "Adobe"}, {"Name": "LinkedIn"}])
+        return self._response(404)
+
+    @patch("requests.Session.get")
+    def test_csv_upload_scans_every_address(self, mock_get):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from operations.models import BreachScanJob
+
+        mock_get.side_effect = self._hibp
+        csv_file = SimpleUploadedFile(
+            "staff.csv",
+            b"name,email\nAlice,breached@corp.com\nBob,clean@corp.com\nDup,BREACHED@corp.com\nx,not-an-email\n",
+            content_type="text/csv",
+        )
+        response = self.client.post("/api/operations/breach-scan/", {"file": csv_file}, format="multipart")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["total"], 2)
+        job = BreachScanJob.objects.get(pk=response.data["job_id"])
+        self.assertEqual((job.status, job.processed, job.breached), ("COMPLETED", 2, 1))
+        self.assertEqual(mock_get.call_count, 2)
+
+        detail = self.client.get(f"/api/operations/breach-scan/{job.pk}/")
+        self.assertEqual(detail.status_code, 200)
+        first = detail.data["results"][0]
+        self.assertEqual(first["email_masked"], "b******d@corp.com")
+        self.assertEqual(first["breaches"], ["Adobe", "LinkedIn"])
+        self.assertNotIn("breached@corp.com", str(detail.data))
+        self.assertTrue(Notification.objects.filter(user=self.user, title="Batch breach scan completed").exists())
+
+    @patch("requests.Session.get")
+    def test_cached_addresses_skip_the_api(self, mock_get):
+        from operations.breach_search import lookup_email_breaches
+
+        mock_get.side_effect = self._hibp
+        lookup_email_breaches("clean@corp.com")
+        response = self.client.post(
+            "/api/operations/breach-scan/", {"emails": ["clean@corp.com", "breached@corp.com"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(mock_get.call_count, 2)
+        results = self.client.get(f"/api/operations/breach-scan/{response.data['job_id']}/").data["results"]
+        self.assertEqual([r["cached"] for r in results], [True, False])
+
+    @patch("requests.Session.get")
+    def test_rate_limited_lookup_is_retried(self, mock_get):
+        from operations.models import BreachScanResult
+
+        mock_get.side_effect = [
+            self._response(429, headers={"Retry-After": "0"}),
+            self._response(404),
+        ]
+        response = self.client.post(
+            "/api/operations/breach-scan/", {"emails": ["busy@corp.com"]}, format="json"
+        )
+        result = BreachScanResult.objects.get(job_id=response.data["job_id"])
+        self.assertEqual(result.status, "OK")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_rerun_resumes_from_stored_results(self, mock_get):
+        from operations.breach_scan import mask_email, run_breach_scan
+        from operations.models import BreachScanJob, BreachScanResult
+
+        mock_get.side_effect = self._hibp
+        job = BreachScanJob.objects.create(
+            user=self.user, emails=["a1@corp.com", "breached@corp.com"], total=2, status="FAILED"
+        )
+        BreachScanResult.objects.create(job=job, line=1, email_masked=mask_email("a1@corp.com"), email_hash="x")
+
+        job = run_breach_scan(job.pk)
+        self.assertEqual((job.status, job.processed, job.breached), ("COMPLETED", 2, 1))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("requests.Session.get")
+    def test_retry_rescans_lines_that_are_not_ok(self, mock_get):
+        from operations.breach_scan import mask_email
+        from operations.models import BreachScanJob, BreachScanResult
+
+        mock_get.side_effect = self._hibp
+        job = BreachScanJob.objects.create(
+            user=self.user, emails=["a1@corp.com", "breached@corp.com"], total=2, status="COMPLETED"
+        )
+        BreachScanResult.objects.create(job=job, line=1, email_masked=mask_email("a1@corp.com"), email_hash="x")
+        BreachScanResult.objects.create(
+            job=job, line=2, email_masked=mask_email("breached@corp.com"), email_hash="y", status="RATE_LIMITED"
+        )
+
+        response = self.client.post(f"/api/operations/breach-scan/{job.pk}/retry/")
+        self.assertEqual(response.status_code, 202)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.breached), ("COMPLETED", 2, 1))
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(list(job.results.values_list("status", flat=True)), ["OK", "OK"])
+
+        response = self.client.post(f"/api/operations/breach-scan/{job.pk}/retry/")
+        self.assertEqual(response.status_code, 409)
+
+    @patch("operations.breach_scan.schedule_breach_scan")
+    def test_retry_takes_over_only_stale_running_jobs(self, schedule):
+        from django.utils import timezone
+        from operations.breach_scan import RUNNING_STALE_AFTER
+        from operations.models import BreachScanJob
+
+        job = BreachScanJob.objects.create(user=self.user, emails=["a@corp.com"], total=1, status="RUNNING")
+        response = self.client.post(f"/api/operations/breach-scan/{job.pk}/retry/")
+        self.assertEqual(response.status_code, 409)
+        schedule.assert_not_called()
+
+        BreachScanJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - RUNNING_STALE_AFTER * 2
+        )
+        response = self.client.post(f"/api/operations/breach-scan/{job.pk}/retry/")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "PENDING")
+        schedule.assert_called_once_with(job.pk)
+
+    def test_progress_is_pushed_to_the_user_group(self):
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from operations.breach_scan import run_breach_scan
+        from operations.models import BreachScanJob
+
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(f"gen_user_{self.user.id}", channel)
+        job = BreachScanJob.objects.create(user=self.user, emails=["a@corp.com"], total=1)
+
+        with patch("operations.breach_search.fetch_account_breaches", return_value={"breaches": []}):
+            run_breach_scan(job.pk)
+
+        progress = async_to_sync(layer.receive)(channel)
+        complete = async_to_sync(layer.receive)(channel)
+        self.assertEqual(progress["type"], "breach_scan_progress")
+        self.assertEqual((progress["processed"], progress["total"]), (1, 1))
+        self.assertEqual(complete["type"], "breach_scan_complete")
+        self.assertEqual(complete["status"], "COMPLETED")
+
+    def test_requires_api_key_and_valid_addresses(self):
+        response = self.client.post("/api/operations/breach-scan/", {"emails": ["nope"]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        with patch.dict(os.environ, {"HIBP_API_KEY": ""}):
+            response = self.client.post(
+                "/api/operations/breach-scan/", {"emails": ["a@corp.com"]}, format="json"
+            )
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_cannot_read_a_job(self):
+        from operations.models import BreachScanJob
+
+        other = User.objects.create_user("other", password="Pass1234!")
+        job = BreachScanJob.objects.create(user=other, emails=["a@corp.com"], total=1)
+        response = self.client.get(f"/api/operations/breach-scan/{job.pk}/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_rate_limiter_spaces_slots_and_honours_retry_after(self):
+        from operations.breach_search import RateLimiter
+
+        now = [100.0]
+        sleeps = []
+        limiter = RateLimiter("test-key", 60, clock=lambda: now[0], sleep=sleeps.append)
+        limiter.acquire()
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual(sleeps, [1.0, 2.0])
+        limiter.penalize(30)
+        limiter.acquire()
+        self.assertEqual(sleeps[-1], 30.0)
+
+    def test_rate_limiter_slots_are_shared_per_api_key(self):
+        from operations.breach_search import RateLimiter
+
+        sleeps = []
+        for key in ("test-key", "test-key", "other-key"):
+            RateLimiter(key, 60, clock=lambda: 100.0, sleep=sleeps.append).acquire()
+        self.assertEqual(sleeps, [1.0])
+        self.assertFalse(RateLimiter("test-key", 60, clock=lambda: 100.0).acquire(max_wait=1.5))
+
+    @patch("requests.Session.get")
+    def test_breach_search_waits_for_the_scan_bucket(self, mock_get):
+        from operations.breach_search import RateLimiter, lookup_email_breaches
+
+        mock_get.side_effect = self._hibp
+        RateLimiter("test-key").penalize(60)
+        self.assertEqual(lookup_email_breaches("clean@corp.com", timeout=0.1), {"rate_limited": True})
+        mock_get.assert_not_called()
@@ -5,6 +5,9 @@ from .views import (
     NotificationListView,
     SystemSettingsView,
     BreachSearchView,
+    BreachScanView,
+    BreachScanDetailView,
+    BreachScanRetryView,
     FinancialRiskView,
 )
 
@@ -16,5 +19,8 @@ urlpatterns = [
     path('notifications/', NotificationListView.as_view(), name='notifications'),
     path('settings/', SystemSettingsView.as_view(), name='system-settings'),
     path('breach-search/', BreachSearchView.as_view(), name='breach-search'),
+    path('breach-scan/', BreachScanView.as_view(), name='breach-scan'),
+    path('breach-scan/<int:job_id>/', BreachScanDetailView.as_view(), name='breach-scan-detail'),
+    path('breach-scan/<int:job_id>/retry/', BreachScanRetryView.as_view(), name='breach-scan-retry'),
     path('financial-risk/', FinancialRiskView.as_view(), name='financial-risk'),
 ]
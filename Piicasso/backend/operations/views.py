@@ -1,6 +1,6 @@
+import logging
 import re
 import html as html_module
-from urllib.parse import quote
 from rest_framework import viewsets, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -16,7 +16,8 @@ from .serializers import (
     SystemSettingSerializer,
 )
 from backend.permissions import IsActiveUserOrMessagesOnly
-from password_security.hibp import k_anonymity_breach_count
+
+logger = logging.getLogger("operations")
 
 User = get_user_model()
 
@@ -228,7 +229,8 @@ class SystemSettingsView(APIView):
 class BreachSearchView(APIView):
     """
     Search for data breaches using the Have I Been Pwned API
-    and internal generation history.
+    and internal generation history.  Sources are queried concurrently
+    under one deadline (see operations.breach_search).
 
     NOTE (5.5): The /api/v3/breachedaccount/ endpoint requires a paid HIBP API key.
     Set the HIBP_API_KEY environment variable to enable email breach lookups.
@@ -244,7 +246,7 @@ class BreachSearchView(APIView):
         return [BreachSearchRateThrottle()]
 
     def post(self, request):
-        import requests as http_requests
+        from .breach_search import run_breach_search, schedule_scan_notification
 
         query = request.data.get("query", "").strip()
         if not query:
@@ -263,84 +265,174 @@ class BreachSearchView(APIView):
         if any(c in query for c in ["\n", "\r", "\x00", "/", "\\", "..", "<", ">"]):
             return Response({"error": "Invalid characters in query."}, status=400)
 
-        results = {
-            "breaches": [],
-            "password_exposures": 0,
-            "internal_matches": 0,
-            "query": query,
-        }
-
-        # 1. Check HIBP Breaches API for email
-        if "@" in query:
-            hibp_api_key = __import__("os").environ.get("HIBP_API_KEY", "")
-            if hibp_api_key:
-                try:
-                    headers = {
-                        "User-Agent": "PIIcasso-SecurityAudit",
-                        "hibp-api-key": hibp_api_key,
-                    }
-                    resp = http_requests.get(
-                        f"https://haveibeenpwned.com/api/v3/breachedaccount/{quote(query, safe='')}",
-                        params={"truncateResponse": "true"},
-                        headers=headers,
-                        timeout=10,
-                    )
-                    if resp.status_code == 200:
-                        breach_data = resp.json()
-                        for breach in breach_data:
-                            results["breaches"].append(
-                                {
-                                    "name": breach.get("Name", "Unknown"),
-                                    "domain": breach.get("Domain", "N/A"),
-                                    "breach_date": breach.get("BreachDate", "N/A"),
-                                    "data_classes": breach.get("DataClasses", []),
-                                    "is_verified": breach.get("IsVerified", False),
-                                    "description": breach.get("Description", ""),
-                                }
-                            )
-                    elif resp.status_code == 404:
-                        pass  # No breaches found — good news
-                    elif resp.status_code == 429:
-                        results["rate_limited"] = True
-                except Exception as e:
-                    results["hibp_error"] = "Breach lookup temporarily unavailable."
-            else:
-                # No HIBP API key configured — skip email breach lookup
-                results["hibp_note"] = (
-                    "Email breach lookup requires HIBP API key configuration."
+        results = run_breach_search(query, user=request.user)
+
+        try:
+            schedule_scan_notification(
+                request.user.id, len(results["breaches"]), results["password_exposures"]
+            )
+        except Exception as e:
+            logger.warning(f"Could not queue breach scan notification: {e}")
+
+        return Response(results)
+
+
+class BreachScanView(APIView):
+    """
+    Start a batch breach scan: a multipart ``file`` (CSV; every email-shaped
+    cell is scanned) or a JSON ``emails`` array.  The scan runs in the
+    background (operations.breach_scan) and reports progress on the user's
+    WebSocket; returns 202 with the job id.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_throttles(self):
+        from backend.throttles import BreachScanRateThrottle
+
+        return [BreachScanRateThrottle()]
+
+    def post(self, request):
+        import os
+
+        from .breach_scan import get_max_emails, normalize_emails, parse_email_csv, schedule_breach_scan
+        from .models import BreachScanJob
+
+        if not os.environ.get("HIBP_API_KEY", ""):
+            return Response(
+                {"error": "Batch breach scans require HIBP API key configuration."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        uploaded = request.FILES.get("file")
+        if uploaded is not None:
+            emails = parse_email_csv(uploaded)
+        else:
+            emails = request.data.get("emails")
+            if not isinstance(emails, list) or not all(isinstance(e, str) for e in emails):
+                return Response(
+                    {"error": "Provide a CSV 'file' upload or an 'emails' array of strings"},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
+            emails = normalize_emails(emails)
+
+        if not emails:
+            return Response(
+                {"error": "No valid email addresses to scan"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_emails = get_max_emails()
+        if len(emails) > max_emails:
+            return Response(
+                {"error": f"At most {max_emails} addresses per scan"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        job = BreachScanJob.objects.create(user=request.user, emails=emails, total=len(emails))
+        try:
+            schedule_breach_scan(job.pk)
+        except Exception as e:
+            logger.error(f"Could not queue breach scan job {job.pk}: {e}")
+            job.status = "FAILED"
+            job.error = "Could not queue the scan."
+            job.save(update_fields=["status", "error"])
+            return Response(
+                {"error": "Could not start the scan, try again later."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        return Response(
+            {"job_id": job.pk, "status": job.status, "total": job.total},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
 
-        # 2. Check HIBP Passwords API using k-anonymity (SHA-1 prefix)
-        # This checks if the query itself (as a password) has been exposed.
-        # k_anonymity_breach_count() only sends the first 5 hex chars to HIBP.
-        exposure_count = k_anonymity_breach_count(query)
-        if exposure_count >= 0:
-            results["password_exposures"] = exposure_count
-
-        # 3. Internal generation history check is intentionally disabled.
-        # pii_data is stored via EncryptedJSONField (Fernet ciphertext) and
-        # cannot be searched at the DB layer without decrypting every row.
-        results["internal_matches"] = 0
-
-        # Calculate risk score
-        breach_count = len(results["breaches"])
-        risk_score = min(
-            100,
-            (breach_count * 15)
-            + (min(results["password_exposures"], 100) * 0.5)
-            + (results["internal_matches"] * 5),
+class BreachScanDetailView(APIView):
+    """Status and (masked) per-address results of one batch breach scan."""
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        from .models import BreachScanJob
+
+        job = (
+            BreachScanJob.objects.filter(pk=job_id, user=request.user)
+            .defer("emails")
+            .first()
         )
-        results["risk_score"] = round(risk_score)
-
-        Notification.objects.create(
-            user=request.user,
-            notification_type="SECURITY",
-            title="Breach scan completed",
-            description=f"Found {breach_count} breaches, {results['password_exposures']} password exposures.",
-            link="/darkweb",
+        if job is None:
+            return Response({"error": "Scan not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "job_id": job.pk,
+            "status": job.status,
+            "total": job.total,
+            "processed": job.processed,
+            "breached": job.breached,
+            "error": job.error,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "results": list(job.results.values(
+                "line", "email_masked", "status", "breach_count", "breaches", "cached"
+            )),
+        })
+
+
+class BreachScanRetryView(APIView):
+    """
+    Resume a failed or stalled batch breach scan, or retry the rate-limited
+    and failed addresses of a completed one; returns 202 like a new scan.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_throttles(self):
+        from backend.throttles import BreachScanRateThrottle
+
+        return [BreachScanRateThrottle()]
+
+    def post(self, request, job_id):
+        import os
+
+        from .breach_scan import retry_breach_scan
+        from .models import BreachScanJob
+
+        job = (
+            BreachScanJob.objects.filter(pk=job_id, user=request.user)
+            .defer("emails")
+            .first()
         )
+        if job is None:
+            return Response({"error": "Scan not found."}, status=status.HTTP_404_NOT_FOUND)
+        if not os.environ.get("HIBP_API_KEY", ""):
+            return Response(
+                {"error": "Batch breach scans require HIBP API key configuration."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        return Response(results)
+        try:
+            retried = retry_breach_scan(job)
+        except Exception as e:
+            logger.error(f"Could not re-queue breach scan job {job.pk}: {e}")
+            return Response(
+                {"error": "Could not restart the scan, try again later."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        if not retried:
+            return Response(
+                {"error": "Scan is still running or has nothing left to retry."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        job.refresh_from_db(fields=["status"])
+        return Response(
+            {"job_id": job.pk, "status": job.status, "total": job.total},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
 
 # Helper function to create notifications from anywhere in the codebase
@@ -0,0 +1,232 @@
+"""
+Bulk password audit.
+
+Runs ``analyze_password_strength`` over thousands of passwords as a
+background job: the view stores the input on a ``BulkAuditJob`` and answers
+202, and ``run_audit_job`` (Celery, or a daemon thread without a broker)
+does the work.  Duplicates are analysed once, large batches are spread
+across a spawned process pool (the analyser is pure-Python CPU work, so
+threads would not help), breach counts come from one batched
+``hibp.breach_counts`` call, and ``PasswordAnalysis`` rows are written with
+``bulk_create``.  The plaintext input is cleared from the job once it has
+run.
+
+The per-password report never contains plaintext — each row carries the
+input line number and a masked preview so the auditor can map results back
+to their own export.
+"""
+
+import csv
+import io
+import os
+import logging
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import current_process, get_context
+
+from django.conf import settings
+from django.utils import timezone
+
+from backend.tasks_util import dispatch
+
+logger = logging.getLogger("password_security")
+
+DEFAULT_MAX_PASSWORDS = 10_000
+BULK_CREATE_BATCH = 500
+REPORT_TTL = 60 * 60  # 1 hour
+
+# Below this many unique passwords a process pool costs more than it saves.
+_POOL_MIN = 500
+_POOL_CHUNK = 250
+
+_CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def get_max_passwords():
+    return int(settings.PIICASSO_SETTINGS.get("BULK_AUDIT_MAX_PASSWORDS", DEFAULT_MAX_PASSWORDS))
+
+
+def get_worker_count():
+    configured = settings.PIICASSO_SETTINGS.get("BULK_AUDIT_WORKERS")
+    if configured:
+        return int(configured)
+    return min(4, os.cpu_count() or 1)
+
+
+def parse_password_file(uploaded):
+    """One password per line; trailing newlines are stripped, blanks skipped."""
+    text = uploaded.read().decode("utf-8", errors="ignore")
+    return [line for line in text.splitlines() if line]
+
+
+def mask_password(password):
+    if len(password) <= 2:
+        preview = "*" * len(password)
+    else:
+        preview = password[0] + "*" * (len(password) - 2) + password[-1]
+    if preview.startswith(_CSV_FORMULA_PREFIXES):
+        preview = "'" + preview
+    return preview
+
+
+def _analyze_chunk(args):
+    passwords, pii_data = args
+    from .strength import analyze_password_strength
+
+    return [analyze_password_strength(p, pii_data) for p in passwords]
+
+
+def analyze_many(passwords, pii_data=None, workers=None, pool_min=_POOL_MIN):
+    """Return ``{password: analysis}`` for the unique *passwords*."""
+    unique = list(dict.fromkeys(passwords))
+    workers = get_worker_count() if workers is None else workers
+
+    # Celery's prefork children are daemonic and may not start processes.
+    if workers <= 1 or len(unique) < pool_min or current_process().daemon:
+        from .strength import analyze_password_strength
+
+        return {p: analyze_password_strength(p, pii_data) for p in unique}
+
+    chunks = [
+        (unique[i:i + _POOL_CHUNK], pii_data)
+        for i in range(0, len(unique), _POOL_CHUNK)
+    ]
+    results = {}
+    # Spawned, not forked: the caller may be a threaded web worker holding
+    # DB connections.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        for (chunk, _), analyses in zip(chunks, pool.map(_analyze_chunk, chunks)):
+            results.update(zip(chunk, analyses))
+    return results
+
+
+def run_bulk_audit(user, passwords, pii_data=None, workers=None):
+    """
+    Analyse *passwords*, persist one ``PasswordAnalysis`` per input line and
+    return ``(summary, report_rows)``.
+    """
+    from .hibp import breach_counts
+    from .models import PasswordAnalysis
+    from .views import apply_breach_count, hash_password
+
+    pii_data = pii_data or {}
+    analyses = analyze_many(passwords, pii_data, workers)
+    counts = breach_counts(list(analyses))
+
+    for password, analysis in analyses.items():
+        apply_breach_count(analysis, counts.get(password, -1))
+
+    rows = []
+    report = []
+    hashes = {}
+    for line, password in enumerate(passwords, start=1):
+        analysis = analyses[password]
+        if password not in hashes:
+            hashes[password] = hash_password(password)
+        rows.append(PasswordAnalysis(
+            user=user,
+            pii_data=pii_data,
+            password_hash=hashes[password],
+            vulnerability_level=analysis["level"],
+            strength_score=analysis["score"],
+            crack_time_estimate=analysis["crack_time"],
+            breach_count=analysis.get("breach_count", 0),
+            recommendations=analysis["recommendations"],
+            vulnerabilities_found=analysis["vulnerabilities"],
+        ))
+        report.append({
+            "line": line,
+            "password": mask_password(password),
+            "score": analysis["score"],
+            "level": analysis["level"],
+            "crack_time": analysis["crack_time"],
+            "breach_count": analysis.get("breach_count", 0),
+            "vulnerabilities": "; ".join(analysis["vulnerabilities"]),
+        })
+
+    PasswordAnalysis.objects.bulk_create(rows, batch_size=BULK_CREATE_BATCH)
+    return summarize(passwords, analyses), report
+
+
+def run_audit_job(job_id, workers=None):
+    """Worker: audit a ``BulkAuditJob`` and store its summary and report."""
+    from .models import BulkAuditJob
+
+    job = BulkAuditJob.objects.filter(pk=job_id, status="PENDING").first()
+    if job is None:
+        return None
+    job.status = "RUNNING"
+    job.save(update_fields=["status"])
+
+    try:
+        summary, report = run_bulk_audit(job.user, job.passwords, job.pii_data, workers)
+        job.report_id = store_report(job.user_id, report)
+        job.summary = {**summary, "report_id": job.report_id}
+        job.status = "COMPLETED"
+    except Exception as e:
+        logger.error(f"Bulk audit job {job_id} failed: {e}", exc_info=True)
+        job.error = "The audit failed."
+        job.status = "FAILED"
+    job.passwords = []
+    job.finished_at = timezone.now()
+    job.save(update_fields=[
+        "passwords", "report_id", "summary", "status", "error", "finished_at",
+    ])
+    return job
+
+
+def schedule_bulk_audit(job_id):
+    """Run the audit off the request (Celery with a broker, else a daemon thread)."""
+    from .tasks import bulk_audit_task
+
+    dispatch(bulk_audit_task, job_id)
+
+
+def summarize(passwords, analyses):
+    total = len(passwords)
+    levels = Counter(analyses[p]["level"] for p in passwords)
+    vulnerabilities = Counter(
+        v for p in passwords for v in analyses[p]["vulnerabilities"]
+        if not v.startswith("Found in ")
+    )
+    scores = [analyses[p]["score"] for p in passwords]
+    return {
+        "total": total,
+        "unique": len(analyses),
+        "duplicates": total - len(analyses),
+        "levels": {level: levels.get(level, 0) for level in ("critical", "high", "medium", "low")},
+        "mean_score": round(sum(scores) / total, 1) if total else 0.0,
+        "breached": sum(1 for p in passwords if analyses[p].get("breach_count", 0) > 0),
+        "top_vulnerabilities": [
+            {"vulnerability": v, "count": n} for v, n in vulnerabilities.most_common(5)
+        ],
+    }
+
+
+# ─── Downloadable report ─────────────────────────────────────────────────────
+
+_REPORT_FIELDS = ("line", "password", "score", "level", "crack_time", "breach_count", "vulnerabilities")
+
+
+def _report_key(user_id, report_id):
+    return f"bulk_audit_report:{user_id}:{report_id}"
+
+
+def store_report(user_id, report):
+    from django.core.cache import cache
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=_REPORT_FIELDS)
+    writer.writeheader()
+    writer.writerows(report)
+
+    report_id = uuid.uuid4().hex
+    cache.set(_report_key(user_id, report_id), buf.getvalue(), REPORT_TTL)
+    return report_id
+
+
+def load_report(user_id, report_id):
+    from django.core.cache import cache
+
+    return cache.get(_report_key(user_id, report_id))
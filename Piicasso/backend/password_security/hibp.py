@@ -5,11 +5,33 @@ Only the first 5 hex characters of the SHA-1 hash are ever sent to the
 HIBP API.  The full hash never leaves this process, so the plaintext
 password is never exposed to the third-party service.
 
+Each ``/range/{prefix}`` response is cached as a whole, per prefix, in a
+compact sorted table (fixed-width binary records: 18-byte suffix key +
+4-byte count) so every password sharing that prefix is answered from the
+cache by binary search.  ``breach_counts()`` checks a batch of passwords,
+fetching each distinct uncached prefix once through a bounded thread pool.
+
+When a local Pwned Passwords mirror is configured (PIICASSO_SETTINGS
+``HIBP_LOCAL_DB``, built by ``manage.py import_pwned_passwords``) lookups
+are answered from it by mmap + binary search and nothing is sent to HIBP.
+``HIBP_MODE`` selects the backend:
+
+  auto    local mirror when the file exists, remote API otherwise (default)
+  local   local mirror only — air-gapped engagements; -1 if it is missing
+  remote  always use the remote API
+
 Reference: https://haveibeenpwned.com/API/v3#PwnedPasswords
 """
 
 import hashlib
+import heapq
 import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
@@ -18,6 +40,20 @@ logger = logging.getLogger("password_security")
 _RANGE_URL = "https://api.pwnedpasswords.com/range/{prefix}"
 _TIMEOUT = 10
 _CACHE_TTL = 86_400  # 24 hours
+_MAX_WORKERS = 8
+
+_HEADERS = {
+    "User-Agent": "PIIcasso-SecurityAudit/2.0",
+    # Ask HIBP to pad the response so response length doesn't
+    # leak information about whether the prefix is common.
+    "Add-Padding": "true",
+}
+
+# Range table record: 35-hex suffix left-padded to 36 hex = 18 bytes, then a
+# big-endian uint32 count.  Byte order of the key matches hex order, so the
+# records sort exactly like the suffix strings.
+_KEY_BYTES = 18
+_RECORD = struct.Struct(">18sI")
 
 
 def k_anonymity_breach_count(password: str) -> int:
@@ -30,64 +66,350 @@ def k_anonymity_breach_count(password: str) -> int:
         int >= 0   — exposure count (0 means not found in the corpus)
         -1         — API or network error; caller should treat as "unknown"
     """
-    cached = _get_cached(password)
-    if cached is not None:
-        return cached
+    local = get_local_db()
+    if local is not None:
+        return local.count(_sha1(password))
+    if _mode() == "local":
+        return -1
+
+    prefix, suffix = _split_hash(password)
+    table = _get_cached_range(prefix)
+    if table is None:
+        try:
+            table = _fetch_range(prefix)
+        except Exception as e:
+            logger.warning(f"HIBP k-anonymity lookup failed: {e}")
+            return -1
+        _set_cached_range(prefix, table)
+    return lookup_suffix(table, suffix)
+
+
+def breach_counts(passwords, max_workers: int = _MAX_WORKERS) -> dict:
+    """
+    Batch variant of :func:`k_anonymity_breach_count`.
+
+    Passwords are grouped by hash prefix; cached ranges are read in one
+    ``get_many`` and each distinct missing prefix is fetched once, with at
+    most *max_workers* requests in flight.
+
+    Returns ``{password: count}`` with the same semantics as the single
+    lookup (-1 where that password's range could not be fetched).
+    """
+    local = get_local_db()
+    if local is not None:
+        return {p: local.count(_sha1(p)) for p in dict.fromkeys(passwords)}
+    if _mode() == "local":
+        return {p: -1 for p in dict.fromkeys(passwords)}
+
+    by_prefix = {}
+    for password in dict.fromkeys(passwords):
+        prefix, suffix = _split_hash(password)
+        by_prefix.setdefault(prefix, []).append((password, suffix))
+    if not by_prefix:
+        return {}
+
+    tables = _get_cached_ranges(list(by_prefix))
+    missing = [prefix for prefix in by_prefix if prefix not in tables]
+
+    if missing:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=max(1, max_workers)
+        )
+        session.mount("https://", adapter)
+
+        def fetch(prefix):
+            try:
+                return prefix, _fetch_range(prefix, session)
+            except Exception as e:
+                logger.warning(f"HIBP range fetch failed for {prefix}: {e}")
+                return prefix, None
+
+        fetched = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+                for prefix, table in pool.map(fetch, missing):
+                    if table is not None:
+                        fetched[prefix] = table
+        finally:
+            session.close()
 
-    sha1 = hashlib.sha1(
+        _set_cached_ranges(fetched)
+        tables.update(fetched)
+
+    counts = {}
+    for prefix, entries in by_prefix.items():
+        table = tables.get(prefix)
+        for password, suffix in entries:
+            counts[password] = -1 if table is None else lookup_suffix(table, suffix)
+    return counts
+
+
+# ─── Range tables ────────────────────────────────────────────────────────────
+
+
+def _sha1(password: str) -> str:
+    return hashlib.sha1(
         password.encode("utf-8"), usedforsecurity=False
     ).hexdigest().upper()
-    prefix, suffix = sha1[:5], sha1[5:]
 
+
+def _split_hash(password: str):
+    sha1 = _sha1(password)
+    return sha1[:5], sha1[5:]
+
+
+def _suffix_key(suffix: str) -> bytes:
+    return bytes.fromhex("0" + suffix)
+
+
+def pack_range(body: str) -> bytes:
+    """
+    Convert a ``SUFFIX:COUNT`` range body into the sorted binary table.
+    Padding entries (count 0) are dropped.
+    """
+    records = []
+    for line in body.splitlines():
+        line_suffix, _, line_count = line.strip().partition(":")
+        if len(line_suffix) != 35 or not line_count:
+            continue
+        count = int(line_count)
+        if count > 0:
+            records.append((_suffix_key(line_suffix.upper()), min(count, 0xFFFFFFFF)))
+    records.sort()
+    return b"".join(_RECORD.pack(key, count) for key, count in records)
+
+
+def lookup_suffix(table: bytes, suffix: str) -> int:
+    """Binary-search a packed range table; 0 when the suffix is absent."""
+    key = _suffix_key(suffix)
+    size = _RECORD.size
+    lo, hi = 0, len(table) // size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        offset = mid * size
+        probe = table[offset:offset + _KEY_BYTES]
+        if probe < key:
+            lo = mid + 1
+        elif probe > key:
+            hi = mid
+        else:
+            return _RECORD.unpack_from(table, offset)[1]
+    return 0
+
+
+def _fetch_range(prefix: str, session=None) -> bytes:
+    resp = (session or requests).get(
+        _RANGE_URL.format(prefix=prefix), headers=_HEADERS, timeout=_TIMEOUT
+    )
+    resp.raise_for_status()
+    return pack_range(resp.text)
+
+
+# ─── Local mirror ────────────────────────────────────────────────────────────
+# File layout: 8-byte magic, then fixed-width records sorted by hash —
+# 20-byte raw SHA-1 + big-endian uint32 count (24 bytes each).
+
+LOCAL_MAGIC = b"PIIPWN01"
+_LOCAL_RECORD = struct.Struct(">20sI")
+_SORT_CHUNK = 2_000_000  # records per in-memory sort run during import
+
+
+class LocalPwnedDB:
+    """Read-only, memory-mapped view of an imported Pwned Passwords file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not a Pwned Passwords mirror")
+        if self._map[:len(LOCAL_MAGIC)] != LOCAL_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a Pwned Passwords mirror")
+        self.records = (len(self._map) - len(LOCAL_MAGIC)) // _LOCAL_RECORD.size
+
+    def count(self, sha1_hex: str) -> int:
+        """Exposure count for an upper/lower-case hex SHA-1 (0 when absent)."""
+        key = bytes.fromhex(sha1_hex)
+        data, base, size = self._map, len(LOCAL_MAGIC), _LOCAL_RECORD.size
+        lo, hi = 0, self.records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = base + mid * size
+            probe = data[offset:offset + 20]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return _LOCAL_RECORD.unpack_from(data, offset)[1]
+        return 0
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _parse_hash_lines(lines):
+    for line in lines:
+        digest, _, count = line.strip().partition(":")
+        if len(digest) != 40 or not count:
+            continue
+        try:
+            yield bytes.fromhex(digest), min(int(count), 0xFFFFFFFF)
+        except ValueError:
+            continue
+
+
+def build_local_db(lines, dest) -> int:
+    """
+    Write ``SHA1:COUNT`` lines into a sorted fixed-width mirror at *dest*.
+
+    Input need not be sorted: records are sorted in bounded chunks spilled
+    to temporary run files and k-way merged, so memory stays flat for the
+    full multi-gigabyte download.  Duplicate hashes keep the larger count.
+    Returns the number of records written.
+    """
+    tmp_dir = os.path.dirname(os.path.abspath(dest)) or "."
+    runs = []
     try:
-        resp = requests.get(
-            _RANGE_URL.format(prefix=prefix),
-            headers={
-                "User-Agent": "PIIcasso-SecurityAudit/2.0",
-                # Ask HIBP to pad the response so response length doesn't
-                # leak information about whether the prefix is common.
-                "Add-Padding": "true",
-            },
-            timeout=_TIMEOUT,
-        )
-        resp.raise_for_status()
+        chunk = []
+        for record in _parse_hash_lines(lines):
+            chunk.append(record)
+            if len(chunk) >= _SORT_CHUNK:
+                runs.append(_spill_run(chunk, tmp_dir))
+                chunk = []
+        chunk.sort()
+        sources = [_read_run(f) for f in runs] + [iter(chunk)]
 
-        count = 0
-        for line in resp.text.splitlines():
-            line_suffix, _, line_count = line.strip().partition(":")
-            if line_suffix == suffix:
-                count = int(line_count)
-                break
+        written = 0
+        partial = dest + ".partial"
+        with open(partial, "wb") as out:
+            out.write(LOCAL_MAGIC)
+            pending = None
+            for digest, count in heapq.merge(*sources):
+                if pending is not None and pending[0] == digest:
+                    pending = (digest, max(pending[1], count))
+                    continue
+                if pending is not None:
+                    out.write(_LOCAL_RECORD.pack(*pending))
+                    written += 1
+                pending = (digest, count)
+            if pending is not None:
+                out.write(_LOCAL_RECORD.pack(*pending))
+                written += 1
+        if not written:
+            os.remove(partial)  # never clobber an existing mirror with nothing
+            return 0
+        os.replace(partial, dest)
+        return written
+    finally:
+        for f in runs:
+            f.close()
 
-        _set_cached(password, count)
-        return count
 
-    except Exception as e:
-        logger.warning(f"HIBP k-anonymity lookup failed: {e}")
-        return -1
+def _spill_run(chunk, tmp_dir):
+    chunk.sort()
+    f = tempfile.TemporaryFile(dir=tmp_dir)
+    f.write(b"".join(_LOCAL_RECORD.pack(d, c) for d, c in chunk))
+    f.seek(0)
+    return f
+
+
+def _read_run(f):
+    size = _LOCAL_RECORD.size
+    while True:
+        buf = f.read(size * 4096)
+        if not buf:
+            return
+        for offset in range(0, len(buf), size):
+            yield _LOCAL_RECORD.unpack_from(buf, offset)
+
+
+_LOCAL_DB = None        # None = not yet opened, False = unavailable
+_LOCAL_LOCK = threading.Lock()
+
+
+def _settings():
+    from django.conf import settings
+    return settings.PIICASSO_SETTINGS
+
+
+def _mode() -> str:
+    return _settings().get("HIBP_MODE", "auto")
+
+
+def get_local_db():
+    """Return the opened local mirror, or None (remote mode / file missing)."""
+    global _LOCAL_DB
+    if _mode() == "remote":
+        return None
+    if _LOCAL_DB is None:
+        with _LOCAL_LOCK:
+            if _LOCAL_DB is None:  # second check under the lock
+                path = _settings().get("HIBP_LOCAL_DB", "")
+                db = False
+                if path and os.path.exists(path):
+                    try:
+                        db = LocalPwnedDB(path)
+                        logger.info(f"Pwned Passwords mirror opened: {path} ({db.records} hashes)")
+                    except Exception as e:
+                        logger.warning(f"Pwned Passwords mirror unusable: {e}")
+                _LOCAL_DB = db
+    return _LOCAL_DB or None
+
+
+def reset_local_db():
+    """Close the mirror so the next lookup re-reads HIBP_LOCAL_DB."""
+    global _LOCAL_DB
+    with _LOCAL_LOCK:
+        if _LOCAL_DB:
+            _LOCAL_DB.close()
+        _LOCAL_DB = None
 
 
 # ─── Internal cache helpers ──────────────────────────────────────────────────
 
 
-def _cache_key(password: str) -> str:
-    sha1 = hashlib.sha1(
-        password.encode("utf-8"), usedforsecurity=False
-    ).hexdigest().upper()
-    return f"hibp_breach:{sha1}"
+def _cache_key(prefix: str) -> str:
+    return f"hibp_range:{prefix}"
+
 
+def _get_cached_range(prefix: str):
+    return _get_cached_ranges([prefix]).get(prefix)
 
-def _get_cached(password: str):
+
+def _get_cached_ranges(prefixes) -> dict:
     try:
         from django.core.cache import cache
-        return cache.get(_cache_key(password))
+        from backend.metrics import record_cache
+
+        found = cache.get_many([_cache_key(p) for p in prefixes])
+        tables = {}
+        for prefix in prefixes:
+            table = found.get(_cache_key(prefix))
+            record_cache("hibp", table is not None)
+            if table is not None:
+                tables[prefix] = table
+        return tables
     except Exception:
-        return None
+        return {}
+
 
+def _set_cached_range(prefix: str, table: bytes) -> None:
+    _set_cached_ranges({prefix: table})
 
-def _set_cached(password: str, count: int) -> None:
+
+def _set_cached_ranges(tables: dict) -> None:
+    if not tables:
+        return
     try:
         from django.core.cache import cache
-        cache.set(_cache_key(password), count, _CACHE_TTL)
+        cache.set_many(
+            {_cache_key(prefix): table for prefix, table in tables.items()}, _CACHE_TTL
+        )
     except Exception:
         pass
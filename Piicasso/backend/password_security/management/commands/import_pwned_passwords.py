@@ -0,0 +1,57 @@
+"""
+Import a downloaded Pwned Passwords SHA-1 file into the local breach mirror.
+
+The source is the ``SHA1:COUNT`` text produced by the official
+PwnedPasswordsDownloader (plain or .gz).  It is converted into the sorted,
+fixed-width binary file that password_security.hibp memory-maps, after
+which breach checks never leave this host.
+
+Usage:
+    python manage.py import_pwned_passwords pwnedpasswords.txt
+    python manage.py import_pwned_passwords pwnedpasswords.txt.gz --output /data/pwned.bin
+"""
+import gzip
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from password_security.hibp import build_local_db, reset_local_db
+
+
+class Command(BaseCommand):
+    help = "Build the local Pwned Passwords mirror from a SHA-1 hash file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='SHA1:COUNT hash file (.txt or .gz).')
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Mirror file to write (default: PIICASSO_SETTINGS HIBP_LOCAL_DB).',
+        )
+
+    def handle(self, *args, **options):
+        source = options['source']
+        output = options['output'] or settings.PIICASSO_SETTINGS.get('HIBP_LOCAL_DB', '')
+
+        if not os.path.exists(source):
+            raise CommandError(f"Hash file not found: {source}")
+        if not output:
+            raise CommandError("No output path: pass --output or set HIBP_LOCAL_DB.")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+        opener = gzip.open if source.endswith('.gz') else open
+        started = time.time()
+        with opener(source, 'rt', encoding='ascii', errors='ignore') as f:
+            written = build_local_db(f, output)
+
+        if not written:
+            raise CommandError("No SHA1:COUNT records found in the source file.")
+
+        reset_local_db()
+        size_mb = os.path.getsize(output) / (1024 * 1024)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {written} hashes into {output} "
+            f"({size_mb:.1f} MB, {time.time() - started:.1f}s)"
+        ))
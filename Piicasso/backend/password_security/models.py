@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from generator.fields import EncryptedJSONField
+from generator.fields import EncryptedJSONField, PiiFieldsMaskField
 
 User = get_user_model()
 
@@ -34,6 +34,7 @@ class PasswordAnalysis(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='password_analyses')
     pii_data = EncryptedJSONField(blank=True, null=True)
+    pii_fields_mask = PiiFieldsMaskField()
     password_hash = models.CharField(max_length=128, help_text="SHA-256 of password for duplicate detection only (not for auth)")
     vulnerability_level = models.CharField(max_length=20, choices=VULNERABILITY_LEVELS)
     strength_score = models.PositiveIntegerField(default=0)
@@ -81,3 +82,34 @@ class PasswordAuditLog(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.action} - {self.timestamp}"
+
+
+class BulkAuditJob(models.Model):
+    """Background bulk password audit (password_security.bulk_audit)."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bulk_audit_jobs')
+    # Fernet-encrypted input, cleared once the audit has run
+    passwords = EncryptedJSONField(default=list)
+    pii_data = EncryptedJSONField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    total = models.PositiveIntegerField(default=0)
+    summary = models.JSONField(default=dict, blank=True)
+    report_id = models.CharField(max_length=32, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"BulkAuditJob {self.pk} ({self.status}, {self.total} passwords)"
@@ -0,0 +1,31 @@
+"""
+Password strength analyser.
+
+The implementation lives in the shared, dependency-free ``piicasso_strength``
+core (also used by the CLI): one rule set, of which this is the analyser
+shape.  This module binds it to Django settings: the common-password list
+comes from PIICASSO_SETTINGS ``COMMON_PASSWORDS_PATH`` (default: the list
+bundled with the core).
+
+``data/strength_golden.jsonl`` pins the results down.
+"""
+
+from django.conf import settings
+
+from piicasso_strength import (  # noqa: F401 — re-exported for existing importers
+    DEFAULT_COMMON_PASSWORDS_PATH,
+    GUESSES_PER_SECOND,
+    analyze,
+    calculate_entropy,
+    char_classes,
+    estimate_crack_time,
+    load_common_passwords,
+)
+
+COMMON_PASSWORDS = load_common_passwords(
+    settings.PIICASSO_SETTINGS.get("COMMON_PASSWORDS_PATH", DEFAULT_COMMON_PASSWORDS_PATH)
+)
+
+
+def analyze_password_strength(password, pii_data=None):
+    return analyze(password, pii_data, common_passwords=COMMON_PASSWORDS)
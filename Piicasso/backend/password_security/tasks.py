@@ -0,0 +1,8 @@
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def bulk_audit_task(job_id):
+    from .bulk_audit import run_audit_job
+
+    run_audit_job(job_id)
@@ -1,3 +1,8 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
@@ -39,3 +44,393 @@ class PasswordSecurityTests(TestCase):
         response = self.client.get('/api/password/preferences/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['default_mode'], 'security')
+
+
+class HibpRangeCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    @staticmethod
+    def _range_response(counts):
+        from unittest.mock import MagicMock
+        from password_security.hibp import _split_hash
+
+        def get(url, **kwargs):
+            prefix = url.rsplit('/', 1)[1]
+            lines = ['0' * 35 + ':0']  # padding entry
+            for password, count in counts.items():
+                p, suffix = _split_hash(password)
+                if p == prefix:
+                    lines.append(f'{suffix}:{count}')
+            resp = MagicMock()
+            resp.text = '\r\n'.join(lines)
+            return resp
+        return get
+
+    def test_pack_and_lookup(self):
+        from password_security.hibp import lookup_suffix, pack_range
+
+        body = 'FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF:7\n00000000000000000000000000000000001:3\n'
+        table = pack_range(body)
+        self.assertEqual(lookup_suffix(table, '00000000000000000000000000000000001'), 3)
+        self.assertEqual(lookup_suffix(table, 'FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF'), 7)
+        self.assertEqual(lookup_suffix(table, '1' * 35), 0)
+
+    def test_batch_fetches_each_prefix_once_and_caches_ranges(self):
+        from unittest.mock import patch
+        from password_security.hibp import _split_hash, breach_counts, k_anonymity_breach_count
+
+        counts = {f'candidate{i}': i for i in range(1, 40)}
+        prefixes = {_split_hash(p)[0] for p in counts}
+
+        with patch('requests.Session.get', side_effect=self._range_response(counts)) as mock_get:
+            result = breach_counts(list(counts) + ['candidate1'], max_workers=4)
+        self.assertEqual(result, counts)
+        self.assertEqual(mock_get.call_count, len(prefixes))
+
+        with patch('requests.get') as mock_single, patch('requests.Session.get') as mock_batch:
+            self.assertEqual(k_anonymity_breach_count('candidate7'), 7)
+            self.assertEqual(breach_counts(['candidate3']), {'candidate3': 3})
+        mock_single.assert_not_called()
+        mock_batch.assert_not_called()
+
+    def test_failed_prefix_reports_unknown(self):
+        from unittest.mock import patch
+        from password_security.hibp import breach_counts
+
+        with patch('requests.Session.get', side_effect=ConnectionError('offline')):
+            self.assertEqual(breach_counts(['hunter2']), {'hunter2': -1})
+
+
+class LocalPwnedMirrorTests(TestCase):
+    FIXTURE = os.path.join(os.path.dirname(__file__), 'data', 'pwned-passwords-sample.txt')
+
+    def setUp(self):
+        from password_security.hibp import reset_local_db
+
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, 'pwned.bin')
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.addCleanup(reset_local_db)
+        reset_local_db()
+
+    def _settings(self, mode):
+        from django.conf import settings
+        return {**settings.PIICASSO_SETTINGS, 'HIBP_MODE': mode, 'HIBP_LOCAL_DB': self.db_path}
+
+    def test_import_and_lookup_without_network(self):
+        from unittest.mock import patch
+        from django.core.management import call_command
+        from django.test import override_settings
+        from password_security.hibp import breach_counts, k_anonymity_breach_count
+
+        call_command('import_pwned_passwords', self.FIXTURE, output=self.db_path, stdout=StringIO())
+        self.assertEqual(os.path.getsize(self.db_path), 8 + 8 * 24)
+
+        with override_settings(PIICASSO_SETTINGS=self._settings('auto')), \
+                patch('requests.get') as mock_get, patch('requests.Session.get') as mock_batch:
+            self.assertEqual(k_anonymity_breach_count('password'), 9545824)
+            self.assertEqual(k_anonymity_breach_count('not-in-the-fixture'), 0)
+            self.assertEqual(
+                breach_counts(['123456', 'Summer2024!', 'zz-unique']),
+                {'123456': 37359195, 'Summer2024!': 312, 'zz-unique': 0},
+            )
+        mock_get.assert_not_called()
+        mock_batch.assert_not_called()
+
+    def test_local_mode_without_mirror_reports_unknown(self):
+        from unittest.mock import patch
+        from django.test import override_settings
+        from password_security.hibp import k_anonymity_breach_count
+
+        with override_settings(PIICASSO_SETTINGS=self._settings('local')), \
+                patch('requests.get') as mock_get:
+            self.assertEqual(k_anonymity_breach_count('password'), -1)
+        mock_get.assert_not_called()
+
+
+class BulkPasswordAuditTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='bulkuser', password='testpassword123')
+        self.client.force_authenticate(user=self.user)
+
+    def _breach(self, passwords):
+        return {p: (1000 if p == 'password' else 0) for p in passwords}
+
+    def test_json_array_audit_with_report(self):
+        from unittest.mock import patch
+        from password_security.models import PasswordAnalysis, PasswordAuditLog
+
+        passwords = ['password', 'CorrectHorseBatteryStaple!@#123', 'password', 'qwerty99']
+        with patch('password_security.hibp.breach_counts', side_effect=self._breach) as mock_counts:
+            response = self.client.post('/api/password/bulk-audit/', {'passwords': passwords}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        mock_counts.assert_called_once()
+
+        # Eager Celery has already run the job; its detail view has the summary.
+        response = self.client.get(f"/api/password/bulk-audit/{response.data['job_id']}/")
+        self.assertEqual(response.data['status'], 'COMPLETED')
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['unique'], 3)
+        self.assertEqual(response.data['breached'], 2)
+        self.assertEqual(sum(response.data['levels'].values()), 4)
+        self.assertEqual(PasswordAnalysis.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(PasswordAuditLog.objects.filter(user=self.user).count(), 1)
+
+        report = self.client.get(f"/api/password/bulk-audit/{response.data['report_id']}/report/")
+        self.assertEqual(report.status_code, status.HTTP_200_OK)
+        body = report.content.decode()
+        self.assertNotIn('password,', body.splitlines()[1])
+        self.assertIn('p******d', body)
+        self.assertEqual(len(body.strip().splitlines()), 5)
+
+        other = APIClient()
+        other.force_authenticate(user=User.objects.create_user(username='other', password='x-pass-123'))
+        self.assertEqual(
+            other.get(f"/api/password/bulk-audit/{response.data['job_id']}/").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            other.get(f"/api/password/bulk-audit/{response.data['report_id']}/report/").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_file_upload_and_limits(self):
+        from unittest.mock import patch
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.test import override_settings
+        from django.conf import settings
+
+        upload = SimpleUploadedFile('export.txt', b'letmein\r\nSummer2024!\r\n\r\ndragon\n')
+        with patch('password_security.hibp.breach_counts', side_effect=self._breach):
+            response = self.client.post('/api/password/bulk-audit/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['total'], 3)
+
+        with override_settings(PIICASSO_SETTINGS={**settings.PIICASSO_SETTINGS, 'BULK_AUDIT_MAX_PASSWORDS': 2}):
+            response = self.client.post('/api/password/bulk-audit/', {'passwords': ['a1', 'b2', 'c3']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_job_input_is_cleared_after_the_audit(self):
+        from unittest.mock import patch
+        from password_security.models import BulkAuditJob
+
+        with patch('password_security.hibp.breach_counts', side_effect=self._breach):
+            response = self.client.post('/api/password/bulk-audit/', {'passwords': ['hunter2']}, format='json')
+        job = BulkAuditJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertEqual(job.passwords, [])
+        self.assertEqual(job.summary['total'], 1)
+
+    def test_process_pool_matches_serial(self):
+        from password_security.bulk_audit import analyze_many
+
+        passwords = [f'Pass{i}word!' for i in range(40)] + ['qwerty']
+        serial = analyze_many(passwords, workers=1)
+        pooled = analyze_many(passwords, workers=2, pool_min=0)
+        self.assertEqual(
+            {p: (r['score'], r['level']) for p, r in serial.items()},
+            {p: (r['score'], r['level']) for p, r in pooled.items()},
+        )
+
+
+class StrengthAnalyzerParityTests(TestCase):
+    """``data/strength_golden.jsonl`` was recorded from the baseline
+    ``analyze_password_strength`` (with its built-in common-password list)."""
+
+    GOLDEN = os.path.join(os.path.dirname(__file__), 'data', 'strength_golden.jsonl')
+
+    def _cases(self):
+        import json
+
+        with open(self.GOLDEN, encoding='utf-8') as f:
+            cases = [json.loads(line) for line in f]
+        self.assertGreater(len(cases), 400)
+        return cases
+
+    def test_matches_baseline_analyser(self):
+        from piicasso_strength import LEGACY_COMMON_PASSWORDS, analyze
+
+        for case in self._cases():
+            result = analyze(case['password'], case['pii_data'], common_passwords=LEGACY_COMMON_PASSWORDS)
+            with self.subTest(password=case['password']):
+                self.assertEqual(result, case['expected'])
+
+    def test_bundled_list_only_adds_common_password_hits(self):
+        from password_security.strength import analyze_password_strength
+
+        common = 'Password is in common password lists'
+        widened = set()
+        for case in self._cases():
+            result = analyze_password_strength(case['password'], case['pii_data'])
+            if result == case['expected']:
+                continue
+            with self.subTest(password=case['password']):
+                self.assertIn(common, result['vulnerabilities'])
+                self.assertNotIn(common, case['expected']['vulnerabilities'])
+            widened.add(case['password'])
+        self.assertIn('P@ssw0rd', widened)
+        self.assertNotIn('correct horse battery staple', widened)
+
+    def test_bundled_list_contains_the_legacy_list(self):
+        from piicasso_strength import COMMON_PASSWORDS, LEGACY_COMMON_PASSWORDS
+
+        self.assertGreater(len(COMMON_PASSWORDS), 10000)
+        self.assertLessEqual(LEGACY_COMMON_PASSWORDS, COMMON_PASSWORDS)
+
+
+class SharedStrengthCoreTests(TestCase):
+    """password_security.strength is a thin adapter over piicasso_strength's one rule set."""
+
+    def test_core_imports_without_django(self):
+        import subprocess
+        import sys
+        code = "import sys, piicasso_strength; sys.exit('django' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(__file__)))
+        self.assertEqual(result.returncode, 0)
+
+    def test_adapter_matches_core(self):
+        import piicasso_strength
+        from password_security.strength import analyze_password_strength
+
+        pii = {'full_name': 'John Smith', 'dob': '1990-05-01'}
+        for password in ('JohnSmith1990!', 'P@ssw0rd', 'correct horse battery staple', ''):
+            self.assertEqual(analyze_password_strength(password, pii), piicasso_strength.analyze(password, pii))
+
+    def test_custom_common_password_list(self):
+        from piicasso_strength import analyze, load_common_passwords
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write('Hunter2Hunter2\n\n')
+        self.addCleanup(os.unlink, f.name)
+        common = load_common_passwords(f.name)
+        self.assertEqual(common, frozenset({'hunter2hunter2'}))
+        self.assertIn('Password is in common password lists',
+                      analyze('hunter2hunter2', common_passwords=common)['vulnerabilities'])
+        self.assertNotIn('Password is in common password lists',
+                         analyze('hunter2hunter2')['vulnerabilities'])
+
+    def test_both_shapes_report_one_assessment(self):
+        from piicasso_strength import analyze, score
+
+        pii = {'full_name': 'John Smith', 'dob': '1990-05-01'}
+        for password in ('JohnSmith1990!', 'P@ssw0rd', 'aaa111', 'correct horse battery staple'):
+            analyzed = analyze(password, pii)
+            scored = score(password, pii)
+            self.assertEqual((analyzed['score'], analyzed['entropy']), (scored['score'], scored['entropy']))
+            self.assertEqual(analyzed['vulnerabilities'], [r['label'] for r in scored['reasons']][:5])
+
+    def test_keyboard_walks_and_birth_year(self):
+        from piicasso_strength import analyze
+
+        for password in ('zxcvbnm!', 'mnbvcx123', 'ytrewq99'):
+            result = analyze(password)
+            self.assertIn('Contains keyboard pattern', result['vulnerabilities'])
+            self.assertEqual(result['level'], 'critical')
+        result = analyze('Rover1990!', {'dob': '1990-05-01'})
+        self.assertIn('Contains birth year', result['vulnerabilities'])
+        self.assertNotIn('Contains birth year', analyze('Rover1990!', {'dob': '1991-05-01'})['vulnerabilities'])
+
+    def test_char_classes(self):
+        from piicasso_strength import classes
+
+        mask = classes.char_classes('aZ/é٣')
+        for bit in (classes.LOWER, classes.UPPER, classes.DIGIT, classes.SPECIAL):
+            self.assertTrue(mask & bit, bit)
+        self.assertFalse(mask & classes.ENTROPY_SPECIAL)
+        self.assertEqual(classes.char_classes('abc'), classes.LOWER)
+
+
+class PasswordAnalysisCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='cacheuser', password='testpassword123')
+        self.client.force_authenticate(user=self.user)
+
+    def _analyze(self, payload, breach_count=3):
+        from unittest.mock import patch
+        from password_security.strength import analyze_password_strength
+
+        with patch('password_security.views.k_anonymity_breach_count', return_value=breach_count) as lookup, \
+                patch('password_security.views.analyze_password_strength',
+                      wraps=analyze_password_strength) as analyzer:
+            response = self.client.post('/api/password/analyze/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data, lookup.call_count + analyzer.call_count
+
+    def test_repeat_check_is_served_from_cache(self):
+        from password_security.models import PasswordAnalysis, PasswordAuditLog
+
+        payload = {'password': 'Summer2024!', 'pii_data': {'name': 'Jane'}}
+        first, calls = self._analyze(payload)
+        self.assertFalse(first['cached'])
+        self.assertEqual(calls, 2)
+
+        second, calls = self._analyze(payload)
+        self.assertTrue(second['cached'])
+        self.assertEqual(calls, 0)
+        self.assertEqual(second['id'], first['id'])
+        self.assertEqual(second['breach_count'], 3)
+        self.assertEqual(PasswordAnalysis.objects.filter(user=self.user).count(), 1)
+        self.assertTrue(PasswordAuditLog.objects.filter(user=self.user, details__cached=True).exists())
+
+    def test_pii_context_and_force_refresh_bypass_cache(self):
+        payload = {'password': 'Summer2024!', 'pii_data': {'name': 'Jane'}}
+        self._analyze(payload)
+
+        other, calls = self._analyze({**payload, 'pii_data': {'name': 'Summer'}})
+        self.assertFalse(other['cached'])
+        self.assertEqual(calls, 2)
+
+        refreshed, calls = self._analyze({**payload, 'force_refresh': True}, breach_count=9)
+        self.assertFalse(refreshed['cached'])
+        self.assertEqual(calls, 2)
+        self.assertEqual(self._analyze(payload)[0]['breach_count'], 9)
+
+    def test_cache_entry_holds_no_findings(self):
+        from django.core.cache import cache
+        from password_security.views import analysis_cache_key
+
+        payload = {'password': 'Janedoe1990', 'pii_data': {'name': 'Janedoe'}}
+        first, _ = self._analyze(payload)
+        self.assertIn('Contains personal information: janedoe...', first['vulnerabilities'])
+
+        entry = cache.get(analysis_cache_key(self.user.id, 'Janedoe1990', {'name': 'Janedoe'}))
+        self.assertNotIn('vulnerabilities', entry)
+        self.assertNotIn('recommendations', entry)
+        self.assertNotIn('jane', repr(entry).lower())
+
+        second, _ = self._analyze(payload)
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['vulnerabilities'], first['vulnerabilities'])
+        self.assertEqual(second['recommendations'], first['recommendations'])
+
+    def test_unsaved_analysis_is_not_cached(self):
+        from unittest.mock import patch
+
+        payload = {'password': 'Summer2024!'}
+        with patch('password_security.models.PasswordAnalysis.objects.create', side_effect=Exception('db down')):
+            self._analyze(payload)
+        result, calls = self._analyze(payload)
+        self.assertFalse(result['cached'])
+        self.assertEqual(calls, 2)
+
+    def test_failed_breach_lookup_is_not_cached(self):
+        payload = {'password': 'Summer2024!'}
+        self._analyze(payload, breach_count=-1)
+        result, calls = self._analyze(payload)
+        self.assertFalse(result['cached'])
+        self.assertEqual(calls, 2)
+
+    def test_cache_key_hides_inputs_and_is_per_user(self):
+        from password_security.views import analysis_cache_key
+
+        key = analysis_cache_key(1, 'Summer2024!', {'name': 'Jane'})
+        self.assertNotIn('Summer', key)
+        self.assertNotIn('Jane', key)
+        self.assertNotEqual(key, analysis_cache_key(2, 'Summer2024!', {'name': 'Jane'}))
+        self.assertEqual(key, analysis_cache_key(1, 'Summer2024!', {'name': 'Jane'}))
@@ -1,6 +1,9 @@
 from django.urls import path
 from .views import (
     PasswordAnalyzeView, 
+    BulkPasswordAuditView,
+    BulkPasswordAuditDetailView,
+    bulk_audit_report,
     PasswordAnalysisHistoryView, 
     UserPreferencesView,
     check_password_breach,
@@ -9,6 +12,9 @@ from .views import (
 
 urlpatterns = [
     path('analyze/', PasswordAnalyzeView.as_view(), name='password-analyze'),
+    path('bulk-audit/', BulkPasswordAuditView.as_view(), name='password-bulk-audit'),
+    path('bulk-audit/<int:job_id>/', BulkPasswordAuditDetailView.as_view(), name='password-bulk-audit-detail'),
+    path('bulk-audit/<str:report_id>/report/', bulk_audit_report, name='password-bulk-audit-report'),
     path('history/', PasswordAnalysisHistoryView.as_view(), name='password-history'),
     path('preferences/', UserPreferencesView.as_view(), name='user-preferences'),
     path('breach-check/', check_password_breach, name='breach-check'),
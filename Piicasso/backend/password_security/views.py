@@ -1,7 +1,5 @@
 import hashlib
-import re
 import logging
-import math
 
 from django.contrib.auth import get_user_model
 
@@ -20,6 +18,12 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.throttling import UserRateThrottle
 
 from .hibp import k_anonymity_breach_count
+from .strength import (  # noqa: F401 — re-exported for existing importers
+    COMMON_PASSWORDS,
+    analyze_password_strength,
+    calculate_entropy,
+    estimate_crack_time,
+)
 
 
 class BreachSearchRateThrottle(UserRateThrottle):
@@ -34,63 +38,6 @@ logger = logging.getLogger("password_security")
 
 User = get_user_model()
 
-COMMON_PASSWORDS = {
-    "password",
-    "123456",
-    "12345678",
-    "qwerty",
-    "abc123",
-    "monkey",
-    "1234567",
-    "letmein",
-    "trustno1",
-    "dragon",
-    "baseball",
-    "iloveyou",
-    "master",
-    "sunshine",
-    "ashley",
-    "bailey",
-    "shadow",
-    "123123",
-    "654321",
-    "superman",
-    "qazwsx",
-    "michael",
-    "football",
-    "password1",
-    "password123",
-    "welcome",
-    "welcome1",
-    "admin",
-    "login",
-    "starwars",
-    "hello",
-    "charlie",
-    "donald",
-    "password2",
-}
-
-KEYBOARD_PATTERNS = {
-    "qwerty",
-    "qwertyuiop",
-    "asdf",
-    "asdfghjkl",
-    "zxcv",
-    "zxcvbnm",
-    "12345",
-    "1234567890",
-    "0987654321",
-    "qazwsx",
-    "wsxedc",
-    "edcrfv",
-    "!@#$%",
-    "!@#$%^&*",
-    "poiuyt",
-    "lkjhgf",
-    "mnbvcx",
-}
-
 
 def hash_password(password):
     """Keyed HMAC-SHA256 used ONLY for duplicate detection, never for auth.
@@ -108,187 +55,73 @@ def hash_password(password):
     ).hexdigest()
 
 
-def calculate_entropy(password):
-    if not password:
-        return 0
-
-    charset_size = 0
-    if any(c.islower() for c in password):
-        charset_size += 26
-    if any(c.isupper() for c in password):
-        charset_size += 26
-    if any(c.isdigit() for c in password):
-        charset_size += 10
-    if any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password):
-        charset_size += 32
-
-    if charset_size == 0:
-        return 0
-
-    entropy = int(len(password) * math.log2(charset_size)) if charset_size > 0 else 0
-    return min(entropy, 128)
-
-
-def estimate_crack_time(entropy, has_personal_info=False):
-    guesses_per_second = 10000000000
-
-    if has_personal_info:
-        entropy = max(entropy - 20, 8)
-
-    combinations = 2**entropy
-    seconds = combinations / guesses_per_second
-
-    if seconds < 1:
-        return "Instant"
-    elif seconds < 60:
-        return f"{int(seconds)} seconds"
-    elif seconds < 3600:
-        return f"{int(seconds / 60)} minutes"
-    elif seconds < 86400:
-        return f"{int(seconds / 3600)} hours"
-    elif seconds < 31536000:
-        return f"{int(seconds / 86400)} days"
-    elif seconds < 31536000 * 100:
-        return f"{int(seconds / 31536000)} years"
-    elif seconds < 31536000 * 1000000:
-        return f"{int(seconds / 31536000 / 1000)} thousand years"
+def apply_breach_count(analysis_result, breach_count):
+    """Fold a HIBP exposure count (-1 = unknown) into an analysis result."""
+    if breach_count >= 0:
+        analysis_result["breach_count"] = breach_count
+
+        if breach_count > 0:
+            analysis_result["vulnerabilities"].append(
+                f"Found in {breach_count} data breaches"
+            )
+            analysis_result["recommendations"].append(
+                "Change this password immediately - it's been exposed in breaches"
+            )
+            analysis_result["level"] = "critical"
+            analysis_result["score"] = max(analysis_result["score"], 10)
     else:
-        return "Centuries"
+        analysis_result["breach_count"] = 0
+    return analysis_result
 
 
-def analyze_password_strength(password, pii_data=None):
-    score = 0
-    vulnerabilities = []
-    recommendations = []
+# ─── Analysis cache ──────────────────────────────────────────────────────────
+# Repeat checks of the same password with the same PII context return the
+# stored result: no re-analysis, no HIBP call, no new PasswordAnalysis row.
+# Keys hold only keyed HMACs, so neither the password nor the PII context can
+# be read back from the cache backend.  Entries hold only the fields below,
+# none of which can carry PII; the findings are re-read from the stored
+# PasswordAnalysis row (encrypted at rest) on a hit.  The TTL is
+# PIICASSO_SETTINGS ``PASSWORD_ANALYSIS_CACHE_TTL``; 0 or unset disables it.
 
-    if not password:
-        return {
-            "score": 0,
-            "vulnerabilities": ["No password provided"],
-            "recommendations": ["Enter a password to analyze"],
-            "crack_time": "Instant",
-            "level": "critical",
-        }
+CACHED_ANALYSIS_FIELDS = ("id", "created_at", "score", "level", "crack_time", "entropy", "breach_count")
 
-    pii_data = pii_data or {}
-    pii_values = []
-    for key, value in pii_data.items():
-        if value and isinstance(value, str) and len(value) > 2:
-            pii_values.append(value.lower())
-
-    password_lower = password.lower()
-
-    if len(password) >= 16:
-        score += 25
-    elif len(password) >= 12:
-        score += 20
-    elif len(password) >= 8:
-        score += 10
-    elif len(password) >= 6:
-        score += 5
-    else:
-        vulnerabilities.append("Password is too short (less than 6 characters)")
-        recommendations.append("Use at least 12 characters")
-
-    if len(password) > 20:
-        score += 10
-
-    has_lower = any(c.islower() for c in password)
-    has_upper = any(c.isupper() for c in password)
-    has_digit = any(c.isdigit() for c in password)
-    has_special = any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?/" for c in password)
-
-    char_types = sum([has_lower, has_upper, has_digit, has_special])
-    if char_types >= 4:
-        score += 25
-    elif char_types >= 3:
-        score += 15
-    elif char_types >= 2:
-        score += 5
-    else:
-        vulnerabilities.append("Password lacks character variety")
-        recommendations.append("Mix uppercase, lowercase, numbers, and symbols")
 
-    if has_digit and has_special:
-        score += 10
+def analysis_cache_key(user_id, password, pii_data):
+    import hmac
+    import json
+    from django.conf import settings
 
-    common_check = (
-        password_lower.replace("0", "o")
-        .replace("1", "i")
-        .replace("3", "e")
-        .replace("4", "a")
-    )
-    if any(
-        common in COMMON_PASSWORDS
-        or COMMON_PASSWORDS.intersection(common_check.split())
-        for common in [password_lower, common_check]
-    ):
-        score = max(score - 50, 5)
-        vulnerabilities.append("Password is in common password lists")
-        recommendations.append("Avoid common passwords")
-
-    has_personal = False
-    for pii_value in pii_values:
-        if len(pii_value) >= 4 and pii_value in password_lower:
-            score = max(score - 30, 5)
-            vulnerabilities.append(
-                f"Contains personal information: {pii_value[:10]}..."
-            )
-            recommendations.append("Avoid using personal information in passwords")
-            has_personal = True
-            break
-
-    for pattern in KEYBOARD_PATTERNS:
-        if pattern in password_lower or pattern[::-1] in password_lower:
-            score = max(score - 25, 5)
-            vulnerabilities.append("Contains keyboard pattern")
-            recommendations.append("Avoid keyboard patterns like qwerty")
-            break
-
-    year_match = re.search(r"(19|20)\d{2}", password)
-    if year_match:
-        year = year_match.group()
-        if pii_data.get("dob"):
-            dob_year = re.search(r"(19|20)\d{2}", str(pii_data["dob"]))
-            if dob_year and dob_year.group() == year:
-                score = max(score - 20, 5)
-                vulnerabilities.append("Contains birth year")
-
-    repeated = re.search(r"(.)\1{2,}", password)
-    if repeated:
-        score = max(score - 10, 0)
-        vulnerabilities.append("Contains repeated characters")
-
-    if not has_digit and not has_special:
-        recommendations.append("Add numbers and special characters")
-
-    if len(password) < 12:
-        recommendations.append("Use at least 12 characters")
-
-    entropy = calculate_entropy(password)
-    crack_time = estimate_crack_time(entropy, has_personal)
-
-    score = max(0, min(100, score))
-
-    if score >= 75:
-        level = "low"
-    elif score >= 50:
-        level = "medium"
-    elif score >= 25:
-        level = "high"
-    else:
-        level = "critical"
+    context = json.dumps(pii_data, sort_keys=True, default=str)
+    context_hash = hmac.new(
+        settings.SECRET_KEY.encode(), context.encode(), hashlib.sha256
+    ).hexdigest()
+    return f"password_analysis:{user_id}:{hash_password(password)}:{context_hash}"
 
+
+def _cached_analysis(user, entry):
+    """Rebuild a cached entry from its PasswordAnalysis row, or None if it is gone."""
+    from .models import PasswordAnalysis
+
+    analysis = (
+        PasswordAnalysis.objects.filter(pk=entry.get("id"), user=user)
+        .only("recommendations", "vulnerabilities_found")
+        .first()
+    )
+    if analysis is None:
+        return None
     return {
-        "score": score,
-        "vulnerabilities": vulnerabilities[:5],
-        "recommendations": list(set(recommendations))[:5],
-        "crack_time": crack_time,
-        "level": level,
-        "entropy": entropy,
+        **entry,
+        "vulnerabilities": analysis.vulnerabilities_found,
+        "recommendations": analysis.recommendations,
     }
 
 
+def _is_force_refresh(request):
+    value = request.data.get("force_refresh", request.query_params.get("force_refresh", False))
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
 
 class PasswordAnalyzeView(APIView):
     authentication_classes = [JWTAuthentication]
@@ -311,26 +144,29 @@ class PasswordAnalyzeView(APIView):
                 {"error": "Password is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        analysis_result = analyze_password_strength(password, pii_data)
+        from django.conf import settings
+        from django.core.cache import cache
+        from backend.metrics import record_cache
+
+        cache_key = analysis_cache_key(request.user.id, password, pii_data)
+        if not _is_force_refresh(request):
+            entry = cache.get(cache_key)
+            cached = _cached_analysis(request.user, entry) if entry is not None else None
+            record_cache("password_analysis", cached is not None)
+            if cached is not None:
+                try:
+                    self._audit(request, cached, cached=True)
+                except Exception as e:
+                    logger.error(f"Failed to log cached analysis: {e}")
+                return Response({**cached, "cached": True}, status=status.HTTP_200_OK)
 
+        analysis_result = analyze_password_strength(password, pii_data)
         breach_count = k_anonymity_breach_count(password)
-        if breach_count >= 0:
-            analysis_result["breach_count"] = breach_count
-
-            if breach_count > 0:
-                analysis_result["vulnerabilities"].append(
-                    f"Found in {breach_count} data breaches"
-                )
-                analysis_result["recommendations"].append(
-                    "Change this password immediately - it's been exposed in breaches"
-                )
-                analysis_result["level"] = "critical"
-                analysis_result["score"] = max(analysis_result["score"], 10)
-        else:
-            analysis_result["breach_count"] = 0
+        apply_breach_count(analysis_result, breach_count)
 
+        saved = False
         try:
-            from .models import PasswordAnalysis, PasswordAuditLog
+            from .models import PasswordAnalysis
 
             analysis = PasswordAnalysis.objects.create(
                 user=request.user,
@@ -345,23 +181,177 @@ class PasswordAnalyzeView(APIView):
             )
             analysis_result["id"] = analysis.id
             analysis_result["created_at"] = analysis.created_at.isoformat()
+            saved = True
+
+            self._audit(request, analysis_result)
+        except Exception as e:
+            logger.error(f"Failed to save analysis: {e}")
+
+        # A failed breach lookup (-1) is not cached, so the next check retries
+        # it; nor is an analysis that was not stored, since hits read it back.
+        ttl = settings.PIICASSO_SETTINGS.get("PASSWORD_ANALYSIS_CACHE_TTL", 0)
+        if saved and breach_count >= 0 and ttl:
+            entry = {f: analysis_result[f] for f in CACHED_ANALYSIS_FIELDS if f in analysis_result}
+            cache.set(cache_key, entry, ttl)
+
+        return Response({**analysis_result, "cached": False}, status=status.HTTP_200_OK)
+
+    def _audit(self, request, analysis_result, cached=False):
+        from .models import PasswordAuditLog
+
+        details = {
+            "analysis_id": analysis_result.get("id"),
+            "vulnerability_level": analysis_result["level"],
+            "strength_score": analysis_result["score"],
+            "breach_count": analysis_result.get("breach_count", 0),
+        }
+        if cached:
+            details["cached"] = True
+        PasswordAuditLog.objects.create(
+            user=request.user,
+            action="analyze",
+            ip_address=self.get_client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", "")[:500],
+            details=details,
+        )
+
+
+class BulkPasswordAuditView(APIView):
+    """
+    Audit many passwords: a multipart ``file`` (one password per line) or a
+    JSON ``passwords`` array, plus optional ``pii_data``.  The audit runs in
+    the background (password_security.bulk_audit); returns 202 with the job
+    id, whose detail view carries the aggregate statistics and the report id
+    of the per-password CSV once it has run.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_throttles(self):
+        return [PIISubmitRateThrottle()]
+
+    def get_client_ip(self, request):
+        from wordgen.utils import get_client_ip as _get_client_ip
+        return _get_client_ip(request)
+
+    def post(self, request):
+        from .bulk_audit import get_max_passwords, parse_password_file, schedule_bulk_audit
+        from .models import BulkAuditJob
+
+        uploaded = request.FILES.get("file")
+        if uploaded is not None:
+            passwords = parse_password_file(uploaded)
+        else:
+            passwords = request.data.get("passwords")
+            if not isinstance(passwords, list) or not all(isinstance(p, str) for p in passwords):
+                return Response(
+                    {"error": "Provide a 'file' upload or a 'passwords' array of strings"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            passwords = [p for p in passwords if p]
+
+        if not passwords:
+            return Response(
+                {"error": "No passwords to audit"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        max_passwords = get_max_passwords()
+        if len(passwords) > max_passwords:
+            return Response(
+                {"error": f"At most {max_passwords} passwords per audit"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        pii_data = request.data.get("pii_data") or {}
+        if isinstance(pii_data, str):
+            import json
+            try:
+                pii_data = json.loads(pii_data)
+            except ValueError:
+                pii_data = {}
+        if not isinstance(pii_data, dict):
+            pii_data = {}
+
+        job = BulkAuditJob.objects.create(
+            user=request.user, passwords=passwords, pii_data=pii_data, total=len(passwords)
+        )
+        try:
+            schedule_bulk_audit(job.pk)
+        except Exception as e:
+            logger.error(f"Could not queue bulk audit job {job.pk}: {e}")
+            job.status = "FAILED"
+            job.error = "Could not queue the audit."
+            job.passwords = []
+            job.save(update_fields=["status", "error", "passwords"])
+            return Response(
+                {"error": "Could not start the audit, try again later."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        try:
+            from .models import PasswordAuditLog
 
             PasswordAuditLog.objects.create(
                 user=request.user,
                 action="analyze",
                 ip_address=self.get_client_ip(request),
                 user_agent=request.META.get("HTTP_USER_AGENT", "")[:500],
-                details={
-                    "analysis_id": analysis.id,
-                    "vulnerability_level": analysis_result["level"],
-                    "strength_score": analysis_result["score"],
-                    "breach_count": analysis_result.get("breach_count", 0),
-                },
+                details={"bulk": True, "job_id": job.pk, "total": job.total},
             )
         except Exception as e:
-            logger.error(f"Failed to save analysis: {e}")
+            logger.error(f"Failed to save bulk audit log: {e}")
+
+        job.refresh_from_db(fields=["status"])
+        return Response(
+            {"job_id": job.pk, "status": job.status, "total": job.total},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
-        return Response(analysis_result, status=status.HTTP_200_OK)
+
+class BulkPasswordAuditDetailView(APIView):
+    """Status of one bulk audit; the summary and report id once it has run."""
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        from .models import BulkAuditJob
+
+        job = (
+            BulkAuditJob.objects.filter(pk=job_id, user=request.user)
+            .defer("passwords", "pii_data")
+            .first()
+        )
+        if job is None:
+            return Response({"error": "Audit not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "job_id": job.pk,
+            "status": job.status,
+            "total": job.total,
+            "error": job.error,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+            **job.summary,
+        })
+
+
+@api_view(["GET"])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def bulk_audit_report(request, report_id):
+    """Download the per-password CSV of a recent bulk audit (owner only)."""
+    from django.http import HttpResponse
+    from .bulk_audit import load_report
+
+    content = load_report(request.user.id, report_id)
+    if content is None:
+        return Response(
+            {"error": "Report not found or expired"}, status=status.HTTP_404_NOT_FOUND
+        )
+    response = HttpResponse(content, content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="password_audit_{report_id[:8]}.csv"'
+    return response
 
 
 class PasswordAnalysisHistoryView(APIView):
@@ -370,11 +360,15 @@ class PasswordAnalysisHistoryView(APIView):
 
     def get(self, request):
         try:
+            from generator.fields import pii_field_q, pii_fields_from_mask
+
             from .models import PasswordAnalysis
 
-            analyses = PasswordAnalysis.objects.filter(user=request.user).order_by(
-                "-created_at"
-            )[:50]
+            analyses = PasswordAnalysis.objects.filter(user=request.user).defer("pii_data")
+            pii_field = request.query_params.get("pii_field")
+            if pii_field:
+                analyses = analyses.filter(pii_field_q(pii_field))
+            analyses = analyses.order_by("-created_at")[:50]
 
             results = []
             for a in analyses:
@@ -388,6 +382,7 @@ class PasswordAnalysisHistoryView(APIView):
                         "vulnerabilities_count": len(a.vulnerabilities_found),
                         "vulnerabilities_found": a.vulnerabilities_found,
                         "recommendations": a.recommendations,
+                        "pii_fields": pii_fields_from_mask(a.pii_fields_mask),
                         "created_at": a.created_at.isoformat(),
                     }
                 )
@@ -0,0 +1,68 @@
+"""
+piicasso_strength — the shared password-strength core.
+
+Pure stdlib, no Django, no I/O beyond reading the bundled common-password
+list at import, so both the backend (``password_security.strength``) and
+the CLI (``piicasso.engine.pii``) import it directly.  The list,
+``data/common-passwords.txt``, is the 20k-entry one Django's
+``CommonPasswordValidator`` ships.
+
+One rule set, ``core.evaluate`` (the backend analyser's rules), feeds two
+thin adapters that keep the existing output shapes:
+
+  - ``analyze``  — the backend analyser shape (score/level/vulnerabilities/
+                   ...)
+  - ``score``    — the JS ``piiEngine.scorePassword`` shape (score/guesses/
+                   time/reasons/rating), also what the CLI prints
+
+Both report the same score, entropy and findings for the same password and
+profile.  It runs on one-pass character-class bitmasks (``classes``),
+precomputed log2 tables, an Aho–Corasick keyboard-pattern matcher
+(``automaton``) and the two crack-time formatters (``crack_time``).
+Golden corpora in the backend and CLI test suites pin the outputs down;
+``frontend/src/lib/piiEngine.test.js`` checks the JS port against the same
+``score`` corpus.
+
+The backend tree holds the source; the CLI ships a vendored copy
+(``cli-python/scripts/vendor_strength.py`` refreshes it, and the CLI tests
+fail when the two differ).
+"""
+
+from .analyzer import analyze, calculate_entropy
+from .automaton import SubstringAutomaton
+from .classes import char_classes
+from .core import (
+    COMMON_PASSWORDS,
+    DEFAULT_COMMON_PASSWORDS_PATH,
+    KEYBOARD_PATTERNS,
+    LEGACY_COMMON_PASSWORDS,
+    Assessment,
+    Finding,
+    evaluate,
+    level,
+    load_common_passwords,
+)
+from .crack_time import GUESSES_PER_SECOND, coarse_time, estimate_crack_time, human_time
+from .scorer import rating, score
+
+__all__ = [
+    "COMMON_PASSWORDS",
+    "DEFAULT_COMMON_PASSWORDS_PATH",
+    "GUESSES_PER_SECOND",
+    "KEYBOARD_PATTERNS",
+    "LEGACY_COMMON_PASSWORDS",
+    "Assessment",
+    "Finding",
+    "SubstringAutomaton",
+    "analyze",
+    "calculate_entropy",
+    "char_classes",
+    "coarse_time",
+    "estimate_crack_time",
+    "evaluate",
+    "human_time",
+    "level",
+    "load_common_passwords",
+    "rating",
+    "score",
+]
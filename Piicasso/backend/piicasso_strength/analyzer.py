@@ -0,0 +1,40 @@
+"""
+Analyser shape — the backend's ``analyze_password_strength``::
+
+    {"score": 0..100, "level": "critical|high|medium|low",
+     "vulnerabilities": [...], "recommendations": [...],
+     "crack_time": "3 days", "entropy": 52}
+"""
+
+from .classes import char_classes
+from .core import entropy_bits, evaluate
+from .crack_time import estimate_crack_time
+
+
+def calculate_entropy(password):
+    if not password:
+        return 0
+    return entropy_bits(len(password), char_classes(password))
+
+
+def analyze(password, pii_data=None, common_passwords=None):
+    """Score *password*; *common_passwords* defaults to the bundled list."""
+    if not password:
+        return {
+            "score": 0,
+            "vulnerabilities": ["No password provided"],
+            "recommendations": ["Enter a password to analyze"],
+            "crack_time": "Instant",
+            "level": "critical",
+        }
+
+    result = evaluate(password, pii_data, common_passwords)
+    return {
+        "score": result.score,
+        "vulnerabilities": [f.label for f in result.findings][:5],
+        # Ordered dedupe: the old set() made the first five arbitrary.
+        "recommendations": list(result.recommendations)[:5],
+        "crack_time": estimate_crack_time(result.entropy, result.personal),
+        "level": result.level,
+        "entropy": result.entropy,
+    }
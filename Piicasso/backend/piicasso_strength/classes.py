@@ -0,0 +1,63 @@
+"""
+Character-class bitmasks.
+
+The rules need "which kinds of characters does this password contain", with
+the analyser's definitions: ``str.islower`` / ``isupper`` / ``isdigit`` and
+an explicit symbol list.  ``char_classes`` answers all of them in one pass:
+a single ``str.translate`` maps every ASCII character to a code for its
+class mask, so only the distinct non-ASCII characters are classified (and
+memoised) in Python.
+"""
+
+LOWER = 1 << 0
+UPPER = 1 << 1
+DIGIT = 1 << 2
+SPECIAL = 1 << 3
+ENTROPY_SPECIAL = 1 << 4
+
+# The analyser counts "/" as a symbol; its entropy charset historically does not.
+SPECIAL_CHARS = "!@#$%^&*()_+-=[]{}|;:,.<>?/"
+ENTROPY_SPECIAL_CHARS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+
+# ASCII characters are translated to chr(_CODE_BASE + i), where i indexes the
+# handful of distinct ASCII masks.  Every code stays below 128, so after
+# translation any character >= 128 is an untranslated non-ASCII original.
+_CODE_BASE = 48
+_NON_ASCII_MEMO_MAX = 4096
+
+
+def classify(c):
+    """Class mask of the single character *c*."""
+    mask = 0
+    if c.islower():
+        mask |= LOWER
+    if c.isupper():
+        mask |= UPPER
+    if c.isdigit():
+        mask |= DIGIT
+    if c in SPECIAL_CHARS:
+        mask |= SPECIAL
+    if c in ENTROPY_SPECIAL_CHARS:
+        mask |= ENTROPY_SPECIAL
+    return mask
+
+
+_ASCII_MASKS = sorted({classify(chr(i)) for i in range(128)})
+_ASCII_CLASS_TABLE = {
+    i: chr(_CODE_BASE + _ASCII_MASKS.index(classify(chr(i)))) for i in range(128)
+}
+# Translated class codes plus memoised non-ASCII characters, in one lookup.
+_MASKS = {chr(_CODE_BASE + i): m for i, m in enumerate(_ASCII_MASKS)}
+
+
+def char_classes(password):
+    """Bitmask of every character class present in *password*."""
+    mask = 0
+    for c in set(password.translate(_ASCII_CLASS_TABLE)):
+        m = _MASKS.get(c)
+        if m is None:
+            m = classify(c)
+            if len(_MASKS) < _NON_ASCII_MEMO_MAX:
+                _MASKS[c] = m
+        mask |= m
+    return mask
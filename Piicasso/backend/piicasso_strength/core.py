@@ -0,0 +1,242 @@
+"""
+The strength rules — the one implementation both output shapes read.
+
+``evaluate`` is the backend's ``analyze_password_strength`` rule set
+(length and character-variety points, then penalties for common passwords,
+personal information, keyboard walks, the birth year and repeats) and
+returns an ``Assessment``; ``analyze`` and ``score`` only format it.
+``frontend/src/lib/piiEngine.js`` ports the same rules.
+"""
+
+import math
+import os
+import re
+from collections import namedtuple
+
+from .automaton import SubstringAutomaton
+from .classes import DIGIT, ENTROPY_SPECIAL, LOWER, SPECIAL, UPPER, char_classes
+
+_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_COMMON_PASSWORDS_PATH = os.path.join(_DATA_DIR, "common-passwords.txt")
+
+KEYBOARD_PATTERNS = frozenset({
+    "qwerty",
+    "qwertyuiop",
+    "asdf",
+    "asdfghjkl",
+    "zxcv",
+    "zxcvbnm",
+    "12345",
+    "1234567890",
+    "0987654321",
+    "qazwsx",
+    "wsxedc",
+    "edcrfv",
+    "!@#$%",
+    "!@#$%^&*",
+    "poiuyt",
+    "lkjhgf",
+    "mnbvcx",
+})
+
+# The analyser's original built-in list, all of it also in the bundled one.
+# Passphrases are checked word by word against this list only: the bundled
+# list (Django's 20k common passwords) also holds ordinary words ("a", "horse").
+LEGACY_COMMON_PASSWORDS = frozenset({
+    "password",
+    "123456",
+    "12345678",
+    "qwerty",
+    "abc123",
+    "monkey",
+    "1234567",
+    "letmein",
+    "trustno1",
+    "dragon",
+    "baseball",
+    "iloveyou",
+    "master",
+    "sunshine",
+    "ashley",
+    "bailey",
+    "shadow",
+    "123123",
+    "654321",
+    "superman",
+    "qazwsx",
+    "michael",
+    "football",
+    "password1",
+    "password123",
+    "welcome",
+    "welcome1",
+    "admin",
+    "login",
+    "starwars",
+    "hello",
+    "charlie",
+    "donald",
+    "password2",
+})
+
+_YEAR_RE = re.compile(r"(19|20)\d{2}")
+_REPEATED_RE = re.compile(r"(.)\1{2,}")
+_LEET = str.maketrans("0134", "oiea")
+
+# One DFA answers "contains any pattern, either direction".
+_KEYBOARD_AUTOMATON = SubstringAutomaton(
+    KEYBOARD_PATTERNS | {p[::-1] for p in KEYBOARD_PATTERNS}
+)
+
+# log2 of every reachable charset size (sums of 26, 26, 10, 32).
+_LOG2_CHARSET = {
+    size: math.log2(size)
+    for size in {
+        a + b + c + d
+        for a in (0, 26) for b in (0, 26) for c in (0, 10) for d in (0, 32)
+    }
+    if size
+}
+
+# kind: "length" | "variety" | "common" | "pii" | "pattern".
+Finding = namedtuple("Finding", "kind label")
+
+# entropy: whole bits, capped at 128; personal: a profile value was found,
+# which shortens the crack time.  recommendations are deduplicated, in order.
+Assessment = namedtuple(
+    "Assessment", "score level entropy personal findings recommendations"
+)
+
+
+def load_common_passwords(path=None):
+    """Frozen, lowercased set of common passwords from a one-per-line file."""
+    with open(path or DEFAULT_COMMON_PASSWORDS_PATH, "r", encoding="utf-8", errors="ignore") as f:
+        return frozenset(line.strip().lower() for line in f if line.strip())
+
+
+COMMON_PASSWORDS = load_common_passwords()
+
+
+def entropy_bits(length, mask):
+    charset_size = (
+        (26 if mask & LOWER else 0)
+        + (26 if mask & UPPER else 0)
+        + (10 if mask & DIGIT else 0)
+        + (32 if mask & ENTROPY_SPECIAL else 0)
+    )
+    if charset_size == 0:
+        return 0
+    return min(int(length * _LOG2_CHARSET[charset_size]), 128)
+
+
+def level(score):
+    if score >= 75:
+        return "low"
+    if score >= 50:
+        return "medium"
+    if score >= 25:
+        return "high"
+    return "critical"
+
+
+def evaluate(password, pii_data=None, common_passwords=None):
+    """Assess a non-empty *password*; *common_passwords* defaults to the bundled list."""
+    score = 0
+    findings = []
+    recommendations = []
+
+    pii_data = pii_data or {}
+    password_lower = password.lower()
+    length = len(password)
+
+    if length >= 16:
+        score += 25
+    elif length >= 12:
+        score += 20
+    elif length >= 8:
+        score += 10
+    elif length >= 6:
+        score += 5
+    else:
+        findings.append(Finding("length", "Password is too short (less than 6 characters)"))
+        recommendations.append("Use at least 12 characters")
+
+    if length > 20:
+        score += 10
+
+    mask = char_classes(password)
+    has_digit = bool(mask & DIGIT)
+    has_special = bool(mask & SPECIAL)
+
+    char_types = (
+        bool(mask & LOWER) + bool(mask & UPPER) + has_digit + has_special
+    )
+    if char_types >= 4:
+        score += 25
+    elif char_types >= 3:
+        score += 15
+    elif char_types >= 2:
+        score += 5
+    else:
+        findings.append(Finding("variety", "Password lacks character variety"))
+        recommendations.append("Mix uppercase, lowercase, numbers, and symbols")
+
+    if has_digit and has_special:
+        score += 10
+
+    common = COMMON_PASSWORDS if common_passwords is None else common_passwords
+    common_check = password_lower.translate(_LEET)
+    if (
+        password_lower in common
+        or common_check in common
+        # Legacy rule: only the de-leeted form is checked word by word.
+        or not LEGACY_COMMON_PASSWORDS.isdisjoint(common_check.split())
+    ):
+        score = max(score - 50, 5)
+        findings.append(Finding("common", "Password is in common password lists"))
+        recommendations.append("Avoid common passwords")
+
+    personal = False
+    for value in pii_data.values():
+        if value and isinstance(value, str) and len(value) > 2:
+            pii_value = value.lower()
+            if len(pii_value) >= 4 and pii_value in password_lower:
+                score = max(score - 30, 5)
+                findings.append(Finding(
+                    "pii", f"Contains personal information: {pii_value[:10]}..."
+                ))
+                recommendations.append("Avoid using personal information in passwords")
+                personal = True
+                break
+
+    if _KEYBOARD_AUTOMATON.contains_any(password_lower):
+        score = max(score - 25, 5)
+        findings.append(Finding("pattern", "Contains keyboard pattern"))
+        recommendations.append("Avoid keyboard patterns like qwerty")
+
+    year_match = _YEAR_RE.search(password)
+    if year_match and pii_data.get("dob"):
+        dob_year = _YEAR_RE.search(str(pii_data["dob"]))
+        if dob_year and dob_year.group() == year_match.group():
+            score = max(score - 20, 5)
+            findings.append(Finding("pii", "Contains birth year"))
+
+    if _REPEATED_RE.search(password):
+        score = max(score - 10, 0)
+        findings.append(Finding("pattern", "Contains repeated characters"))
+
+    if not has_digit and not has_special:
+        recommendations.append("Add numbers and special characters")
+
+    if length < 12:
+        recommendations.append("Use at least 12 characters")
+
+    score = max(0, min(100, score))
+    return Assessment(
+        score,
+        level(score),
+        entropy_bits(length, mask),
+        personal,
+        tuple(findings),
+        tuple(dict.fromkeys(recommendations)),
+    )
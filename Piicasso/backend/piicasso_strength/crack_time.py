@@ -0,0 +1,86 @@
+"""
+Crack-time formatting.
+
+Two formats of the same estimate are in use and both are kept verbatim:
+the analyser's coarse buckets ("3 days", "Centuries") and the scorer's
+cascading units ("1.5 hours", ">1M centuries").
+"""
+
+import math
+
+GUESSES_PER_SECOND = 10_000_000_000
+
+
+def coarse_time(seconds):
+    """Analyser format: "Instant", "3 days", "Centuries"."""
+    if seconds < 1:
+        return "Instant"
+    elif seconds < 60:
+        return f"{int(seconds)} seconds"
+    elif seconds < 3600:
+        return f"{int(seconds / 60)} minutes"
+    elif seconds < 86400:
+        return f"{int(seconds / 3600)} hours"
+    elif seconds < 31536000:
+        return f"{int(seconds / 86400)} days"
+    elif seconds < 31536000 * 100:
+        return f"{int(seconds / 31536000)} years"
+    elif seconds < 31536000 * 1000000:
+        return f"{int(seconds / 31536000 / 1000)} thousand years"
+    else:
+        return "Centuries"
+
+
+def guesses(entropy, has_personal_info=False):
+    """Brute-force guesses for *entropy* bits; personal information cuts 20 bits."""
+    if has_personal_info:
+        entropy = max(entropy - 20, 8)
+    return 2**entropy
+
+
+def estimate_crack_time(entropy, has_personal_info=False):
+    """Brute-force time for *entropy* bits at 10B guesses/s, analyser format."""
+    return coarse_time(guesses(entropy, has_personal_info) / GUESSES_PER_SECOND)
+
+
+# (divisor, name-of-CURRENT unit). The first row says "while still under 60 of
+# the current unit, we're in seconds"; if we cross that boundary the name
+# becomes "minute" and we divide by 60, etc.
+_UNITS = (
+    (60, "second"),
+    (60, "minute"),
+    (24, "hour"),
+    (365, "day"),
+    (100, "year"),
+    (1_000_000, "century"),
+)
+
+
+def human_time(seconds):
+    """JS engine format: ``humanTime`` from ``frontend/src/lib/piiEngine.js``.
+
+    Cascading divisions through second → minute → hour → day → year →
+    century, plural ``s`` for >=2, and a ``>1M centuries`` cap at the top.
+    """
+    if not math.isfinite(seconds) or seconds < 1:
+        return "instant"
+
+    val = seconds
+    name = "second"
+    for div, n in _UNITS:
+        if val < div:
+            name = n
+            break
+        val /= div
+        name = n
+
+    if val > 1e6:
+        return ">1M centuries"
+    if val < 10:
+        # ``toFixed(1)`` keeps one decimal, e.g. ``1.5``.
+        text = f"{val:.1f}"
+    else:
+        # ``Math.round``: halves round up, not to even.
+        text = str(math.floor(val + 0.5))
+    suffix = "s" if val >= 2 else ""
+    return f"{text} {name}{suffix}"
@@ -1,6 +1,8 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from backend.metrics import WEBSOCKET_CONNECTIONS
+
 class GenerationProgressConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         # Authentication is enforced by JWTAuthMiddleware (asgi.py): the user
@@ -21,7 +23,8 @@ class GenerationProgressConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
         await self.accept()
-        
+        WEBSOCKET_CONNECTIONS.labels(consumer=type(self).__name__).inc()
+
         await self.send(text_data=json.dumps({
             'type': 'connection_established',
             'message': 'Connected to Generation Channel',
@@ -31,6 +34,7 @@ class GenerationProgressConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, close_code):
         # Leave generation group
         if hasattr(self, 'group_name'):
+            WEBSOCKET_CONNECTIONS.labels(consumer=type(self).__name__).dec()
             await self.channel_layer.group_discard(
                 self.group_name,
                 self.channel_name
@@ -46,3 +50,18 @@ class GenerationProgressConsumer(AsyncWebsocketConsumer):
         
     async def generation_error(self, event):
         await self.send(text_data=json.dumps(event))
+
+    async def generation_breach_update(self, event):
+        await self.send(text_data=json.dumps(event))
+
+    async def breach_scan_progress(self, event):
+        await self.send(text_data=json.dumps(event))
+
+    async def breach_scan_complete(self, event):
+        await self.send(text_data=json.dumps(event))
+
+    async def generation_batch_progress(self, event):
+        await self.send(text_data=json.dumps(event))
+
+    async def generation_batch_complete(self, event):
+        await self.send(text_data=json.dumps(event))
@@ -2,8 +2,12 @@ import os
 import re
 import itertools
 import logging
+import time
 import requests
 
+from .services.merge_service import merge_candidates
+from backend.metrics import record_llm_call
+
 logger = logging.getLogger('wordgen')
 
 
@@ -179,9 +183,11 @@ def generate_fallback_wordlist(pii_data):
 
     # Clean seeds
     seeds = [s.strip() for s in seeds if s and len(s) > 1]
-    seeds = list(set(seeds))
+    # Ordered dedupe keeps the fallback list reproducible across processes
+    # (set iteration order depends on the hash seed).
+    seeds = list(merge_candidates([seeds]))
 
-    passwords = set()
+    passwords = []
     suffixes = ['', '1', '123', '!', '.', '2024', '2025', '2020', '@123']
     transforms = [lambda s: s, lambda s: s.lower(), lambda s: s.upper(), lambda s: s.capitalize()]
 
@@ -189,19 +195,19 @@ def generate_fallback_wordlist(pii_data):
         for t in transforms:
             base = t(s)
             for suff in suffixes:
-                passwords.add(f"{base}{suff}")
-                passwords.add(f"{base}{suff}!")
+                passwords.append(f"{base}{suff}")
+                passwords.append(f"{base}{suff}!")
 
     # Combos
     if len(seeds) >= 2:
         for a, b in itertools.permutations(seeds[:20], 2):  # Limit to prevent explosion
-            passwords.add(f"{a}{b}")
-            passwords.add(f"{a}.{b}")
-            passwords.add(f"{a}_{b}")
-            passwords.add(f"{a}{b}123")
-            passwords.add(f"{a.lower()}{b.lower()}")
+            passwords.append(f"{a}{b}")
+            passwords.append(f"{a}.{b}")
+            passwords.append(f"{a}_{b}")
+            passwords.append(f"{a}{b}123")
+            passwords.append(f"{a.lower()}{b.lower()}")
 
-    return "\n".join(list(passwords))
+    return "\n".join(merge_candidates([passwords]))
 
 
 def call_gemini_api(prompt, pii_data=None):
@@ -209,6 +215,8 @@ def call_gemini_api(prompt, pii_data=None):
     Call Gemini API to generate content.
     Falls back to algorithmic generation on failure.
     """
+    started = time.perf_counter()
+    fallback = False
     try:
         api_key = os.environ.get("GEMINI_API_KEY")
         if not api_key:
@@ -250,10 +258,13 @@ def call_gemini_api(prompt, pii_data=None):
         return text
 
     except Exception as e:
+        fallback = True
         logger.warning(f"LLM generation failed: {e}. Using offline fallback.")
         if pii_data:
             return generate_fallback_wordlist(pii_data)
         return "fallback\npassword\n123456"
+    finally:
+        record_llm_call(time.perf_counter() - started, fallback)
 
 
 # ─── Probability scoring ──────────────────────────────────────────────────────
@@ -264,25 +275,23 @@ _COMMON_SUFFIXES = ('123', '1234', '12345', '!', '@', '#', '!@#', '!!', '007', '
 _LEET_TABLE = str.maketrans({'@': 'a', '3': 'e', '1': 'i', '0': 'o', '$': 's', '7': 't', '4': 'a'})
 
 
-def score_wordlist(passwords, pii_data, rockyou_set=frozenset()):
+def score_wordlist(passwords, pii_data, rockyou_set=frozenset(), engine=None):
     """
     Assign a probability score (1–100) to each password and return the list
-    sorted descending by score.
+    sorted by estimated guess probability (most likely first).
 
-    Scoring dimensions:
+    Ranking is delegated to the configured engine (see
+    services.ranking_service).  With a trained Markov table the order follows
+    the model's estimated probability; otherwise the heuristic engine applies:
       - PII overlap   (up to 60 pts): how many PII tokens appear in the password
       - Pattern bonus (up to 30 pts): year, common suffix, leet-encoded PII, special chars
       - RockYou bonus (      10 pts): password appears in the sampled corpus
 
     Returns: [{"password": "...", "score": N}, ...]
     """
-    pii_tokens = _extract_pii_tokens(pii_data)
-    scored = [
-        {"password": pwd, "score": _score_one(pwd, pii_tokens, rockyou_set)}
-        for pwd in passwords
-    ]
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return scored
+    from .services.ranking_service import get_ranker
+
+    return get_ranker(engine).rank(passwords, pii_data, rockyou_set)
 
 
 def _extract_pii_tokens(pii_data):
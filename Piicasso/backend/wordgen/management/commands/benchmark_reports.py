@@ -0,0 +1,115 @@
+"""
+Render-time benchmark for the PDF intelligence report (wordgen.report_generator).
+
+Renders a synthetic generation with 10 / 1k / 50k candidates (by default)
+and reports wall time, peak Python heap and PDF size per size.  --full
+prints every candidate, as a dossier appendix would; by default only the
+preview the download view renders.  Nothing touches the database.
+
+Usage:
+    python manage.py benchmark_reports
+    python manage.py benchmark_reports --full --sizes 10,1000,50000 --output reports.json
+"""
+import json
+import platform
+import time
+import tracemalloc
+from io import BytesIO
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from wordgen.report_generator import PREVIEW_LIMIT, generate_report_pdf
+
+DEFAULT_SIZES = (10, 1_000, 50_000)
+
+PROFILE = {
+    "full_name": "Jane Roe",
+    "birth_year": "1990",
+    "email": "jane.roe@example.com",
+    "pet_names": "Rover",
+    "employer_name": "Acme Corp",
+}
+
+
+def synthetic_history(size):
+    return SimpleNamespace(
+        id=1,
+        timestamp=timezone.now(),
+        ip_address="203.0.113.7",
+        user=SimpleNamespace(username="benchmark"),
+        pii_data=PROFILE,
+        wordlist=[f"Rover{1990 + i % 50}!{i}" for i in range(size)],
+    )
+
+
+def time_render(history, wordlist_limit, repeat, trace_memory):
+    timings = []
+    peak_kb = None
+    size = 0
+    for _ in range(repeat):
+        buffer = BytesIO()
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        generate_report_pdf(history, buffer, wordlist_limit=wordlist_limit)
+        timings.append((time.perf_counter() - started) * 1000)
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+            peak_kb = max(peak_kb or 0, round(peak, 1))
+        size = buffer.tell()
+    return {
+        "time_ms": {"min": round(min(timings), 2), "mean": round(sum(timings) / len(timings), 2)},
+        "peak_memory_kb": peak_kb,
+        "pdf_bytes": size,
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark PDF report rendering at several wordlist sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                            help='Comma-separated candidate counts.')
+        parser.add_argument('--full', action='store_true',
+                            help=f'Print every candidate (default: the {PREVIEW_LIMIT}-entry preview).')
+        parser.add_argument('--repeat', type=int, default=3, help='Renders per size.')
+        parser.add_argument('--output', default=None, help='Write the JSON report here.')
+        parser.add_argument('--no-memory', action='store_true',
+                            help='Skip tracemalloc (faster, no peak memory figures).')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers.")
+        if not sizes or options['repeat'] < 1:
+            raise CommandError("Need at least one size and --repeat >= 1.")
+
+        wordlist_limit = None if options['full'] else PREVIEW_LIMIT
+        results = {}
+        for size in sizes:
+            results[str(size)] = time_render(
+                synthetic_history(size), wordlist_limit, options['repeat'], not options['no_memory']
+            )
+            r = results[str(size)]
+            self.stdout.write(
+                f"  {size:>7} candidates  mean={r['time_ms']['mean']:>9} ms  "
+                f"peak={r['peak_memory_kb']} KB  pdf={r['pdf_bytes'] // 1024} KB"
+            )
+
+        if options['output']:
+            report = {
+                "meta": {
+                    "full": options['full'],
+                    "repeat": options['repeat'],
+                    "python": platform.python_version(),
+                },
+                "sizes": results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
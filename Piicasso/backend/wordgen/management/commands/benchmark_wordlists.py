@@ -0,0 +1,106 @@
+"""
+Offline guess-number benchmark for the wordlist generation pipeline.
+
+Runs every case (synthetic profile + known password) through the generation
+pipeline with the LLM stubbed out and reports hit rate at rank 10/100/1k/10k,
+generation time and peak memory.  Write the report with --output and diff it
+between commits.
+
+Usage:
+    python manage.py benchmark_wordlists
+    python manage.py benchmark_wordlists --cases cases.jsonl --output bench.json
+    python manage.py benchmark_wordlists --rockyou --seed 1337 --engine heuristic
+"""
+import json
+import os
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from wordgen.services.benchmark_service import (
+    DEFAULT_MAX_SIZE,
+    DEFAULT_RANKS,
+    load_cases,
+    run_benchmark,
+)
+
+DEFAULT_CASES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    'data', 'benchmark_profiles.jsonl',
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark generated wordlists against profiles with known passwords."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cases', default=DEFAULT_CASES, help='JSON Lines case file.')
+        parser.add_argument('--output', default=None, help='Write the JSON report here.')
+        parser.add_argument('--max-size', type=int, default=DEFAULT_MAX_SIZE,
+                            help='Wordlist size cap (default: 10000).')
+        parser.add_argument('--ranks', default=','.join(str(r) for r in DEFAULT_RANKS),
+                            help='Comma-separated guess-number cut-offs.')
+        parser.add_argument('--rockyou', action='store_true',
+                            help='Merge the RockYou sample, as the submit view does.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed for the RockYou reservoir sample (reproducible runs).')
+        parser.add_argument('--engine', default=None,
+                            help='Override PIICASSO_SETTINGS RANKING_ENGINE for this run.')
+        parser.add_argument('--no-memory', action='store_true',
+                            help='Skip tracemalloc (faster, no peak memory figures).')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['cases']):
+            raise CommandError(f"Case file not found: {options['cases']}")
+        try:
+            ranks = tuple(sorted(int(r) for r in options['ranks'].split(',') if r.strip()))
+        except ValueError:
+            raise CommandError("--ranks must be comma-separated integers.")
+
+        cases = load_cases(options['cases'])
+        if not cases:
+            raise CommandError("Case file contains no cases.")
+
+        rockyou = ()
+        if options['rockyou']:
+            from wordgen.services.generation_service import load_rockyou_sample
+
+            random.seed(options['seed'])
+            rockyou = load_rockyou_sample()
+
+        overrides = {}
+        if options['engine']:
+            overrides['PIICASSO_SETTINGS'] = {
+                **settings.PIICASSO_SETTINGS, 'RANKING_ENGINE': options['engine'],
+            }
+
+        with override_settings(**overrides):
+            report = run_benchmark(
+                cases,
+                ranks=ranks,
+                max_size=options['max_size'],
+                rockyou=rockyou,
+                trace_memory=not options['no_memory'],
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write('\n')
+
+        meta = report['meta']
+        self.stdout.write(
+            f"{meta['cases']} cases | engine={meta['ranking_engine']} "
+            f"max_size={meta['max_size']} rockyou={meta['rockyou_size']}"
+        )
+        for rank, rate in report['hit_rate'].items():
+            self.stdout.write(f"  hit@{rank:<6} {rate * 100:6.1f}%")
+        timing = report['timing_ms']
+        self.stdout.write(
+            f"  time ms   mean={timing['mean']} p50={timing['p50']} p95={timing['p95']}"
+        )
+        self.stdout.write(f"  peak KB   max={report['peak_memory_kb']['max']}")
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
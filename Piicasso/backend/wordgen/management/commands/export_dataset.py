@@ -0,0 +1,57 @@
+"""
+Export history, password analyses or user activity as NDJSON or Parquet
+(wordgen.services.export_service) for loading into DuckDB and friends.
+
+Usage:
+    python manage.py export_dataset history --format parquet --output history.parquet
+    python manage.py export_dataset activity --since 2026-01-01 --until 2026-02-01 --output jan.ndjson
+    python manage.py export_dataset analyses --user 42 --output user42.ndjson
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wordgen.services.export_service import (
+    DATASETS, FORMATS, ExportUnavailable, iter_rows, parse_bound, stream_export,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream a dataset to an NDJSON or Parquet file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=FORMATS, default=None,
+                            help='Default: from the --output extension, else ndjson.')
+        parser.add_argument('--output', required=True, help='File to write.')
+        parser.add_argument('--since', default=None, help='ISO date/datetime (inclusive).')
+        parser.add_argument('--until', default=None, help='ISO date/datetime (exclusive).')
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help='Only rows of this user id (repeatable).')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or ('parquet' if output.endswith('.parquet') else 'ndjson')
+        try:
+            since = parse_bound(options['since'])
+            until = parse_bound(options['until'])
+        except ValueError as e:
+            raise CommandError(f"Not an ISO date or datetime: {e}")
+
+        started = time.time()
+        rows = iter_rows(options['dataset'], user_ids=options['users'], since=since, until=until)
+        tmp = f"{output}.part"
+        try:
+            with open(tmp, 'wb') as f:
+                for chunk in stream_export(options['dataset'], fmt, rows):
+                    f.write(chunk)
+        except ExportUnavailable as e:
+            os.remove(tmp)
+            raise CommandError(str(e))
+        os.replace(tmp, output)
+
+        size_mb = os.path.getsize(output) / (1024 * 1024)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {output} ({fmt}, {size_mb:.1f} MB, {time.time() - started:.1f}s)"
+        ))
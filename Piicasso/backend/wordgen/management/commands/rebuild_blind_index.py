@@ -0,0 +1,30 @@
+"""
+Rebuild the blind index of searchable PII (generator.blind_index).
+
+Needed after BLIND_INDEX_KEY changes; every generation profile is decrypted
+once and re-hashed under the current key.
+
+Usage:
+    python manage.py rebuild_blind_index
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from generator.blind_index import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the blind index of emails, usernames and names in generation history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.time()
+        with transaction.atomic():
+            count = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} generation profiles ({time.time() - started:.1f}s)"
+        ))
@@ -0,0 +1,62 @@
+"""
+Re-encrypt all encrypted PII columns under a new FIELD_ENCRYPTION_KEY
+(generator.key_rotation).
+
+Rotation procedure:
+    1. FIELD_ENCRYPTION_KEY="<new>,<old>"  — new rows use <new>, old rows
+       still decrypt; deploy.
+    2. python manage.py rotate_encryption_key --workers 8
+       (interrupted? run it again — it resumes from the checkpoint)
+    3. FIELD_ENCRYPTION_KEY="<new>"; deploy.
+
+Usage:
+    python manage.py rotate_encryption_key
+    python manage.py rotate_encryption_key --workers 8 --batch-size 2000
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from generator.key_rotation import DEFAULT_BATCH_SIZE, rotate_all
+
+
+class Command(BaseCommand):
+    help = "Re-encrypt EncryptedJSONField columns with the first FIELD_ENCRYPTION_KEY."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Worker processes, each rotating its own primary-key range.',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.BASE_DIR, 'key-rotation-checkpoint'),
+            help='Directory for resumable progress.',
+        )
+
+    def handle(self, *args, **options):
+        key = settings.FIELD_ENCRYPTION_KEY
+        if not isinstance(key, (list, tuple)) or len(key) < 2:
+            raise CommandError(
+                "Set FIELD_ENCRYPTION_KEY to '<new key>,<old key>' before rotating."
+            )
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--workers and --batch-size must be positive.")
+
+        started = time.time()
+        totals, resumed = rotate_all(
+            options['checkpoint'], workers=options['workers'], batch_size=options['batch_size']
+        )
+        if resumed:
+            self.stdout.write("Resumed from checkpoint.")
+        for column, count in sorted(totals.items()):
+            self.stdout.write(f"  {column}: {count} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-encrypted {sum(totals.values())} values ({time.time() - started:.1f}s). "
+            "Old keys can now be removed from FIELD_ENCRYPTION_KEY."
+        ))
@@ -0,0 +1,76 @@
+"""
+Train the character-level Markov table used to rank generated candidates.
+
+The corpus is streamed line by line, so arbitrarily large lists (full
+rockyou.txt) can be used; --limit caps the number of lines read.
+
+Usage:
+    python manage.py train_ranking_model
+    python manage.py train_ranking_model --corpus /data/rockyou.txt --order 4 --limit 2000000
+"""
+import itertools
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wordgen.services.ranking_service import (
+    DEFAULT_ORDER,
+    MarkovModel,
+    get_model_path,
+    reset_model_cache,
+)
+from wordgen.services.generation_service import ROCKYOU_PATH
+
+
+class Command(BaseCommand):
+    help = "Train the Markov candidate-ranking model from a local password corpus."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus',
+            default=ROCKYOU_PATH,
+            help='Newline-delimited password corpus (default: wordgen rockyou.txt).',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Table file to write (default: PIICASSO_SETTINGS RANKING_MODEL_PATH).',
+        )
+        parser.add_argument('--order', type=int, default=DEFAULT_ORDER, help='Markov order.')
+        parser.add_argument(
+            '--min-count',
+            type=int,
+            default=2,
+            help='Drop higher-order transitions seen fewer times than this.',
+        )
+        parser.add_argument('--limit', type=int, default=None, help='Max corpus lines to read.')
+
+    def handle(self, *args, **options):
+        corpus = options['corpus']
+        output = options['output'] or get_model_path()
+        order = options['order']
+
+        if not os.path.exists(corpus):
+            raise CommandError(f"Corpus not found: {corpus}")
+        if not output:
+            raise CommandError("No output path: pass --output or set RANKING_MODEL_PATH.")
+        if order < 1:
+            raise CommandError("--order must be at least 1.")
+
+        started = time.monotonic()
+        with open(corpus, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = itertools.islice(f, options['limit']) if options['limit'] else f
+            model = MarkovModel.train(lines, order=order, min_count=options['min_count'])
+
+        model.save(output)
+        reset_model_cache()
+
+        elapsed = time.monotonic() - started
+        size_kb = os.path.getsize(output) / 1024
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {output} — order={order} contexts={len(model.tables)} "
+                f"size={size_kb:.0f} KB in {elapsed:.1f}s"
+            )
+        )
@@ -4,7 +4,8 @@ Enterprise middleware stack for PIIcasso:
 - RequestIDMiddleware: Attaches a unique request ID for log correlation.
 - PolicyViolationMiddleware: Blocks suspended users from non-auth endpoints.
 - MaintenanceModeMiddleware: Returns 503 when maintenance_mode is enabled (5.4 fix).
-- SecurityLoggingMiddleware: Audit logging with PII sanitization.
+- SecurityLoggingMiddleware: Audit logging with PII sanitization and per-stage
+  timings for /api/submit/ (exported as Prometheus histograms).
 """
 import logging
 import time
@@ -92,6 +93,8 @@ class MaintenanceModeMiddleware(MiddlewareMixin):
         # Cache the setting briefly so this isn't a DB hit on every request.
         # A toggle from the admin propagates within the TTL.
         maintenance = cache.get('sys:maintenance_mode')
+        from backend.metrics import record_cache
+        record_cache('maintenance', maintenance is not None)
         if maintenance is None:
             try:
                 from operations.models import SystemSetting
@@ -313,6 +316,12 @@ class SecurityLoggingMiddleware(MiddlewareMixin):
             'duration_ms': round(duration * 1000),
         }
 
+        # Per-stage spans recorded by PiiSubmitView (see backend.metrics)
+        from backend.metrics import get_stage_timer
+        timer = get_stage_timer(request)
+        if timer is not None:
+            log_data['stages_ms'] = timer.export()
+
         if response.status_code == 201 and getattr(request, '_cached_body', None):
             try:
                 body = json.loads(request._cached_body.decode('utf-8'))
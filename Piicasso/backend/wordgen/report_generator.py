@@ -1,180 +1,290 @@
+"""
+Intelligence report PDFs.
+
+Paragraph and table styles are built once at import; a render only creates
+its flowables.  ``report_flowables`` is the body of one report;
+``generate_report_pdf`` renders it on its own and ``generate_dossier_pdf``
+puts several behind a table of contents.  ``render_report_bytes`` renders
+from a plain-dict snapshot, so it can run in a process pool.
+
+Wordlist tables are emitted as ``LongTable`` chunks of ``WORDLIST_CHUNK_ROWS``
+rows: ReportLab re-measures a table each time it splits it across a page,
+so one huge table costs quadratic time, while short chunks paginate in
+linear time.
+"""
+
+import json
+from io import BytesIO
+from types import SimpleNamespace
+
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import inch
-import json
+from reportlab.platypus import (
+    BaseDocTemplate, Frame, LongTable, PageBreak, PageTemplate, Paragraph,
+    SimpleDocTemplate, Spacer, Table, TableStyle,
+)
+from reportlab.platypus.tableofcontents import TableOfContents
 
+PREVIEW_LIMIT = 60  # candidates printed by default; the rest are counted only
+WORDLIST_COLUMNS = 3
+WORDLIST_CHUNK_ROWS = 250
 
-def generate_report_pdf(history_entry, file_buffer):
-    """
-    Generates a professional intelligence report PDF for a GenerationHistory entry.
-    """
-    doc = SimpleDocTemplate(file_buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-
-    # Custom Styles
-    styles.add(
-        ParagraphStyle(
-            name="ClassifiedTitle",
-            fontSize=24,
-            leading=28,
-            textColor=colors.red,
-            alignment=1,
-            fontName="Courier-Bold",
-        )
+STYLES = getSampleStyleSheet()
+STYLES.add(
+    ParagraphStyle(
+        name="ClassifiedTitle",
+        fontSize=24,
+        leading=28,
+        textColor=colors.red,
+        alignment=1,
+        fontName="Courier-Bold",
     )
-    styles.add(
-        ParagraphStyle(
-            name="SectionHeader",
-            fontSize=14,
-            leading=16,
-            textColor=colors.black,
-            spaceAfter=6,
-            fontName="Courier-Bold",
-        )
+)
+STYLES.add(
+    ParagraphStyle(
+        name="SectionHeader",
+        fontSize=14,
+        leading=16,
+        textColor=colors.black,
+        spaceAfter=6,
+        fontName="Courier-Bold",
     )
-    styles.add(
-        ParagraphStyle(name="DataText", fontSize=10, leading=12, fontName="Courier")
-    )
-    styles.add(
-        ParagraphStyle(
-            name="WarningText",
-            fontSize=8,
-            leading=10,
-            textColor=colors.red,
-            alignment=1,
-            fontName="Courier-Oblique",
-        )
+)
+STYLES.add(ParagraphStyle(name="DataText", fontSize=10, leading=12, fontName="Courier"))
+STYLES.add(
+    ParagraphStyle(
+        name="WarningText",
+        fontSize=8,
+        leading=10,
+        textColor=colors.red,
+        alignment=1,
+        fontName="Courier-Oblique",
     )
+)
+
+META_TABLE_STYLE = TableStyle(
+    [
+        ("FONTNAME", (0, 0), (-1, -1), "Courier"),
+        ("TEXTCOLOR", (0, 0), (0, -1), colors.grey),
+        ("TEXTCOLOR", (1, 0), (1, -1), colors.black),
+        ("BOX", (0, 0), (-1, -1), 1, colors.black),
+        ("grid", (0, 0), (-1, -1), 0.5, colors.grey),
+    ]
+)
+PII_TABLE_STYLE = TableStyle(
+    [
+        ("FONTNAME", (0, 0), (-1, -1), "Courier"),
+        ("BACKGROUND", (0, 0), (0, -1), colors.lightgrey),
+        ("grid", (0, 0), (-1, -1), 0.5, colors.black),
+    ]
+)
+WORDLIST_TABLE_STYLE = TableStyle(
+    [
+        ("FONTNAME", (0, 0), (-1, -1), "Courier"),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("grid", (0, 0), (-1, -1), 0.25, colors.grey),
+    ]
+)
+TOC_ENTRY_STYLE = ParagraphStyle(
+    name="TOCEntry", fontSize=10, leading=14, fontName="Courier", leftIndent=12
+)
+KV_COL_WIDTHS = [200, 300]
+WORDLIST_COL_WIDTHS = [160] * WORDLIST_COLUMNS
+
+
+# ─── Flowable factories ─────────────────────────────────────────────────────
+
+
+def title(text):
+    return Paragraph(text, STYLES["ClassifiedTitle"])
+
+
+def section(text):
+    return Paragraph(text, STYLES["SectionHeader"])
+
+
+def data_text(text):
+    return Paragraph(text, STYLES["DataText"])
+
+
+def warning(text):
+    return Paragraph(text, STYLES["WarningText"])
+
+
+def kv_table(rows, style=PII_TABLE_STYLE):
+    table = Table(rows, colWidths=KV_COL_WIDTHS)
+    table.setStyle(style)
+    return table
+
+
+def wordlist_tables(words, columns=WORDLIST_COLUMNS, chunk_rows=WORDLIST_CHUNK_ROWS):
+    """*words* laid out in *columns*, as LongTables of at most *chunk_rows* rows."""
+    per_chunk = columns * chunk_rows
+    for start in range(0, len(words), per_chunk):
+        chunk = words[start:start + per_chunk]
+        rows = [chunk[i:i + columns] for i in range(0, len(chunk), columns)]
+        rows[-1] = rows[-1] + [""] * (columns - len(rows[-1]))
+        table = LongTable(rows, colWidths=WORDLIST_COL_WIDTHS)
+        table.setStyle(WORDLIST_TABLE_STYLE)
+        yield table
+
+
+def flatten_dict(d, parent_key="", sep="_"):
+    items = []
+    for k, v in d.items():
+        new_key = f"{parent_key}{sep}{k}" if parent_key else k
+        if isinstance(v, dict):
+            items.extend(flatten_dict(v, new_key, sep=sep).items())
+        elif isinstance(v, list):
+            items.append((new_key, ", ".join(map(str, v))))
+        else:
+            items.append((new_key, v))
+    return dict(items)
+
+
+def report_ref(entry_id):
+    """``REP-0042`` for generations, ``REP-1A2B3C4D`` for UUID-keyed targets."""
+    if isinstance(entry_id, int):
+        return f"REP-{entry_id:04d}"
+    return f"REP-{str(entry_id).replace('-', '')[:8].upper()}"
+
+
+def _wordlist_of(history_entry):
+    wordlist = history_entry.wordlist or []
+    if isinstance(wordlist, str):
+        # Celery-generated rows stored the newline-joined text.
+        wordlist = wordlist.splitlines()
+    return wordlist
 
+
+# ─── Report body ────────────────────────────────────────────────────────────
+
+
+def report_flowables(history_entry, wordlist_limit=PREVIEW_LIMIT):
+    """
+    Flowables of one report.  *wordlist_limit* caps the printed candidates
+    (None prints them all).
+    """
     elements = []
 
     # --- Header ---
-    elements.append(
-        Paragraph("PIIcasso Intelligence Report", styles["ClassifiedTitle"])
-    )
-    elements.append(
-        Paragraph("Intelligence Generation Summary", styles["SectionHeader"])
-    )
+    elements.append(title("PIIcasso Intelligence Report"))
+    elements.append(section("Intelligence Generation Summary"))
     elements.append(Spacer(1, 0.2 * inch))
 
     # --- Metadata Table ---
     meta_data = [
-        ["REPORT ID:", f"REP-{history_entry.id:04d}"],
+        ["REPORT ID:", report_ref(history_entry.id)],
         ["TIMESTAMP:", str(history_entry.timestamp)],
         ["IP ORIGIN:", history_entry.ip_address or "UNK/PROXY"],
         ["AGENT:", history_entry.user.username if history_entry.user else "GHOST USER"],
     ]
-    meta_table = Table(meta_data, colWidths=[200, 300])
-    meta_table.setStyle(
-        TableStyle(
-            [
-                ("FONTNAME", (0, 0), (-1, -1), "Courier"),
-                ("TEXTCOLOR", (0, 0), (0, -1), colors.grey),
-                ("TEXTCOLOR", (1, 0), (1, -1), colors.black),
-                ("BOX", (0, 0), (-1, -1), 1, colors.black),
-                ("grid", (0, 0), (-1, -1), 0.5, colors.grey),
-            ]
-        )
-    )
-    elements.append(meta_table)
+    elements.append(kv_table(meta_data, META_TABLE_STYLE))
     elements.append(Spacer(1, 0.3 * inch))
 
     # --- PII Data Section ---
-    elements.append(Paragraph("I. COLLECTED DATA", styles["SectionHeader"]))
+    elements.append(section("I. COLLECTED DATA"))
 
-    pii_content = []
-    # Depending on how pii_data is stored (JSONField which returns dict)
     data = history_entry.pii_data
     if isinstance(data, str):
         try:
             data = json.loads(data)
-        except:
+        except ValueError:
             data = {}
 
-    # Flatten dict for display
-    def flatten_dict(d, parent_key="", sep="_"):
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                items.extend(flatten_dict(v, new_key, sep=sep).items())
-            elif isinstance(v, list):
-                items.append((new_key, ", ".join(map(str, v))))
-            else:
-                items.append((new_key, v))
-        return dict(items)
-
-    flat_data = flatten_dict(data)
-
-    # Chunk into rows of key-value pairs
-    for k, v in flat_data.items():
-        if v:
-            pii_content.append([k.upper().replace("_", " "), str(v)])
-
+    pii_content = [
+        [k.upper().replace("_", " "), str(v)]
+        for k, v in flatten_dict(data or {}).items()
+        if v
+    ]
     if not pii_content:
         pii_content = [["NO DATA", "N/A"]]
 
-    pii_table = Table(pii_content, colWidths=[200, 300])
-    pii_table.setStyle(
-        TableStyle(
-            [
-                ("FONTNAME", (0, 0), (-1, -1), "Courier"),
-                ("BACKGROUND", (0, 0), (0, -1), colors.lightgrey),
-                ("grid", (0, 0), (-1, -1), 0.5, colors.black),
-            ]
-        )
-    )
-    elements.append(pii_table)
+    elements.append(kv_table(pii_content))
     elements.append(Spacer(1, 0.3 * inch))
 
     # --- Wordlist Analysis ---
-    elements.append(Paragraph("II. GENERATED LISTS", styles["SectionHeader"]))
-    wordlist = history_entry.wordlist or []
+    elements.append(section("II. GENERATED LISTS"))
+    wordlist = _wordlist_of(history_entry)
     count = len(wordlist)
-    elements.append(Paragraph(f"Total Variants Generated: {count}", styles["DataText"]))
+    elements.append(data_text(f"Total Variants Generated: {count}"))
     elements.append(Spacer(1, 0.1 * inch))
 
-    # Show first 50 passwords in columns
-    preview_limit = 60
-    preview = wordlist[:preview_limit]
-
-    # Format into 3 columns
-    rows = []
-    for i in range(0, len(preview), 3):
-        row = preview[i : i + 3]
-        # Pad row if needed
-        while len(row) < 3:
-            row.append("")
-        rows.append(row)
-
-    wl_table = Table(rows, colWidths=[160, 160, 160])
-    wl_table.setStyle(
-        TableStyle(
-            [
-                ("FONTNAME", (0, 0), (-1, -1), "Courier"),
-                ("FONTSIZE", (0, 0), (-1, -1), 8),
-                ("grid", (0, 0), (-1, -1), 0.25, colors.grey),
-            ]
-        )
-    )
-    elements.append(wl_table)
+    shown = wordlist if wordlist_limit is None else wordlist[:wordlist_limit]
+    elements.extend(wordlist_tables([str(w) for w in shown]))
 
-    if count > preview_limit:
+    if count > len(shown):
         elements.append(Spacer(1, 0.1 * inch))
         elements.append(
-            Paragraph(
-                f"... [ {count - preview_limit} ADDITIONAL ENTRIES OMITTED FOR SECURITY ] ...",
-                styles["WarningText"],
-            )
+            warning(f"... [ {count - len(shown)} ADDITIONAL ENTRIES OMITTED FOR SECURITY ] ...")
         )
 
     elements.append(Spacer(1, 0.5 * inch))
-    elements.append(
-        Paragraph(
-            "** CONFIDENTIAL REPORT - AUTHORIZED USE ONLY **", styles["WarningText"]
-        )
-    )
+    elements.append(warning("** CONFIDENTIAL REPORT - AUTHORIZED USE ONLY **"))
+    return elements
 
-    doc.build(elements)
+
+def generate_report_pdf(history_entry, file_buffer, wordlist_limit=PREVIEW_LIMIT):
+    """
+    Generates a professional intelligence report PDF for a GenerationHistory entry.
+    """
+    doc = SimpleDocTemplate(file_buffer, pagesize=letter)
+    doc.build(report_flowables(history_entry, wordlist_limit=wordlist_limit))
+
+
+# ─── Multi-report output ────────────────────────────────────────────────────
+
+
+def render_report_bytes(snapshot, wordlist_limit=PREVIEW_LIMIT):
+    """
+    ``(snapshot["id"], pdf bytes)`` for a report snapshot: a plain dict with
+    the GenerationHistory attributes the report reads and ``user`` as a
+    username.  Picklable both ways, for ProcessPoolExecutor workers.
+    """
+    buffer = BytesIO()
+    generate_report_pdf(snapshot_entry(snapshot), buffer, wordlist_limit=wordlist_limit)
+    return snapshot["id"], buffer.getvalue()
+
+
+def snapshot_entry(snapshot):
+    """A report snapshot as the history-like object ``report_flowables`` reads."""
+    entry = SimpleNamespace(**snapshot)
+    entry.user = SimpleNamespace(username=snapshot["user"]) if snapshot.get("user") else None
+    return entry
+
+
+class _DossierTemplate(BaseDocTemplate):
+    def __init__(self, file_buffer, **kwargs):
+        super().__init__(file_buffer, pagesize=letter, **kwargs)
+        frame = Frame(self.leftMargin, self.bottomMargin, self.width, self.height, id="body")
+        self.addPageTemplates([PageTemplate(id="report", frames=[frame])])
+
+    def afterFlowable(self, flowable):
+        label = getattr(flowable, "toc_label", None)
+        if label:
+            self.notify("TOCEntry", (0, label, self.page))
+
+
+def generate_dossier_pdf(entries, file_buffer, wordlist_limit=PREVIEW_LIMIT):
+    """
+    One PDF of several reports, each on a new page, behind a table of
+    contents.  *entries* is ``[(history_entry, toc_label), ...]``.  Two
+    layout passes (``multiBuild``) resolve the TOC page numbers.
+    """
+    toc = TableOfContents()
+    toc.levelStyles = [TOC_ENTRY_STYLE]
+    elements = [
+        title("PIIcasso Engagement Dossier"),
+        data_text(f"Targets: {len(entries)}"),
+        Spacer(1, 0.3 * inch),
+        section("CONTENTS"),
+        toc,
+    ]
+    for entry, label in entries:
+        elements.append(PageBreak())
+        body = report_flowables(entry, wordlist_limit=wordlist_limit)
+        body[0].toc_label = label
+        elements.extend(body)
+    _DossierTemplate(file_buffer).multiBuild(elements)
@@ -0,0 +1,217 @@
+"""
+Batch Wordlist Generation
+=========================
+Generates wordlists for many profiles in one request (e.g. a CSV export of
+a department's staff).
+
+The batch is a Celery chord: a group of ``generate_profile_task`` — one per
+profile — whose results feed ``finish_generation_batch_task``.  Each profile
+runs the same pipeline as ``PiiSubmitView`` (mask → prompt → LLM → merge
+with RockYou) and is saved as its own GenerationHistory.  The RockYou
+sample is loaded once per worker process (``generation_service``) and
+shared by every profile that process handles.
+
+Progress goes to the user's ``gen_user_{id}`` group as
+``generation_batch_progress`` (one per finished profile) and
+``generation_batch_complete`` (from the callback, with the aggregate).
+Profile tasks never raise, so one bad profile cannot keep the chord
+callback from running.
+
+Without a broker (CELERY_BROKER_URL "disabled://") the profiles run one
+after another on a daemon thread.
+"""
+
+import csv
+import io
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from backend.tasks_util import broker_disabled, run_in_thread
+
+logger = logging.getLogger(__name__)
+
+
+def get_max_profiles():
+    return settings.PIICASSO_SETTINGS.get("BATCH_GENERATION_MAX_PROFILES", 200)
+
+
+# ---------------------------------------------------------------------------
+# Input
+# ---------------------------------------------------------------------------
+
+
+def parse_profiles_csv(uploaded):
+    """
+    One dict per data row, keyed by the header row (Piiserializer field
+    names, case-insensitive).  Blank rows are skipped.
+    """
+    text = uploaded.read().decode("utf-8-sig", errors="ignore")
+    reader = csv.DictReader(io.StringIO(text))
+    if reader.fieldnames:
+        reader.fieldnames = [(name or "").strip().lower() for name in reader.fieldnames]
+    return [
+        {k: (v or "").strip() for k, v in row.items() if k}
+        for row in reader
+        if any((v or "").strip() for v in row.values() if isinstance(v, str))
+    ]
+
+
+def validate_profiles(rows):
+    """
+    ``(profiles, errors)``: each row through Piiserializer and the same
+    sanitizer as the submit view; ``errors`` maps 1-based row numbers to
+    messages.
+    """
+    from ..serializers import Piiserializer
+    from .generation_service import sanitize_pii_data
+
+    profiles, errors = [], {}
+    for number, row in enumerate(rows, start=1):
+        serializer = Piiserializer(data=row)
+        if not serializer.is_valid():
+            errors[number] = serializer.errors
+            continue
+        pii_data = sanitize_pii_data(dict(serializer.validated_data))
+        if not any(v for k, v in pii_data.items() if k != "pattern_mode"):
+            errors[number] = "No meaningful PII data provided."
+            continue
+        profiles.append(pii_data)
+    return profiles, errors
+
+
+# ---------------------------------------------------------------------------
+# Tasks
+# ---------------------------------------------------------------------------
+
+
+def _send(user_id, event):
+    try:
+        async_to_sync(get_channel_layer().group_send)(f"gen_user_{user_id}", event)
+    except Exception as e:
+        logger.warning(f"Could not push batch generation progress: {e}")
+
+
+def generate_profile(batch_id, index, pii_data, max_size):
+    """
+    Generate and store the wordlist of profile *index*.  Returns
+    ``{"index", "history_id", "count"}`` or ``{"index", "error"}``.
+    """
+    from generator.models import GenerationBatch, GenerationHistory
+
+    from ..llm_handler import build_prompt, call_gemini_api, mask_pii_for_api
+    from .generation_service import get_rockyou_corpus
+    from .merge_service import merge_generation_sources
+
+    batch = GenerationBatch.objects.only("user_id", "total").get(pk=batch_id)
+    try:
+        pii_data = dict(pii_data)
+        pattern_mode = pii_data.pop("pattern_mode", "standard")
+        pii_data = mask_pii_for_api(pii_data)
+        wordlist_raw = call_gemini_api(build_prompt(pii_data, pattern_mode), pii_data=pii_data)
+        wordlist = list(
+            merge_generation_sources(wordlist_raw.splitlines(), get_rockyou_corpus(), max_size)
+        )
+        if not wordlist:
+            raise ValueError("No passwords generated.")
+        record = GenerationHistory.objects.create(
+            user_id=batch.user_id, pii_data=pii_data, wordlist=wordlist
+        )
+        result = {"index": index, "history_id": record.id, "count": len(wordlist)}
+        counter = "completed"
+    except Exception as e:
+        logger.error(f"Batch {batch_id} profile {index} failed: {e}", exc_info=True)
+        result = {"index": index, "error": "Generation failed for this profile."}
+        counter = "failed"
+
+    GenerationBatch.objects.filter(pk=batch_id).update(**{counter: F(counter) + 1})
+    done = GenerationBatch.objects.filter(pk=batch_id).values("completed", "failed").first()
+    _send(batch.user_id, {
+        "type": "generation_batch_progress",
+        "batch_id": batch_id,
+        "index": index,
+        "status": "failed" if "error" in result else "done",
+        "count": result.get("count", 0),
+        "completed": done["completed"],
+        "failed": done["failed"],
+        "total": batch.total,
+        "progress": round(100 * (done["completed"] + done["failed"]) / max(batch.total, 1)),
+    })
+    return result
+
+
+def finish_batch(results, batch_id):
+    """Chord callback: aggregate the per-profile results onto the batch."""
+    from generator.models import GenerationBatch
+
+    from operations.views import create_notification
+
+    results = sorted(results, key=lambda r: r["index"])
+    ok = [r for r in results if "error" not in r]
+    batch = GenerationBatch.objects.get(pk=batch_id)
+    batch.results = results
+    batch.completed = len(ok)
+    batch.failed = len(results) - len(ok)
+    batch.status = "COMPLETED" if ok else "FAILED"
+    batch.finished_at = timezone.now()
+    batch.save(update_fields=["results", "completed", "failed", "status", "finished_at"])
+
+    total_candidates = sum(r["count"] for r in ok)
+    _send(batch.user_id, {
+        "type": "generation_batch_complete",
+        "batch_id": batch_id,
+        "status": batch.status,
+        "completed": batch.completed,
+        "failed": batch.failed,
+        "total": batch.total,
+        "total_candidates": total_candidates,
+        "history_ids": [r["history_id"] for r in ok],
+    })
+    create_notification(
+        batch.user,
+        "SYSTEM",
+        "Batch generation completed",
+        f"Generated wordlists for {batch.completed} of {batch.total} profiles "
+        f"({total_candidates} candidates).",
+        link="/workspace",
+    )
+    return {
+        "batch_id": batch_id,
+        "completed": batch.completed,
+        "failed": batch.failed,
+        "total_candidates": total_candidates,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Dispatch
+# ---------------------------------------------------------------------------
+
+
+def _run_sequentially(batch_id, profiles, max_size):
+    results = [
+        generate_profile(batch_id, index, pii_data, max_size)
+        for index, pii_data in enumerate(profiles)
+    ]
+    finish_batch(results, batch_id)
+
+
+def schedule_batch(batch, profiles, max_size):
+    """Fan the profiles out as a chord (or a daemon thread without a broker)."""
+    from celery import chord
+    from generator.models import GenerationBatch
+
+    from ..tasks import finish_generation_batch_task, generate_profile_task
+
+    GenerationBatch.objects.filter(pk=batch.pk).update(status="RUNNING")
+    if broker_disabled():
+        run_in_thread(_run_sequentially, batch.pk, profiles, max_size)
+        return
+    chord(
+        generate_profile_task.s(batch.pk, index, pii_data, max_size)
+        for index, pii_data in enumerate(profiles)
+    )(finish_generation_batch_task.s(batch.pk))
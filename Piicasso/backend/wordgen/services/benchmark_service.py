@@ -0,0 +1,159 @@
+"""
+Guess-Number Benchmark Harness
+==============================
+Measures how quickly a generated wordlist would crack a known password.
+
+Each benchmark case pairs a synthetic PII profile with the target's real
+password.  The generation pipeline used by ``PiiSubmitView`` (mask → prompt →
+LLM → merge with the RockYou sample → truncate → rank) runs with the LLM
+stubbed out, and the 1-based position of the target in the ranked list is
+its *guess number*.
+
+Reported per run:
+  - hit rate at guess-number cut-offs (default 10 / 100 / 1k / 10k)
+  - generation wall time per profile (mean / p50 / p95 / max)
+  - peak Python heap per profile (tracemalloc)
+
+The report is plain JSON with sorted keys so two runs can be diffed between
+commits.  Case file format (JSON Lines, one case per line)::
+
+    {"id": "c01", "profile": {...}, "password": "Rover1990!",
+     "pattern_mode": "standard", "llm_response": "optional\\ncanned\\noutput"}
+
+Cases carrying ``llm_response`` replay that recorded LLM output; all others
+use the offline permutation generator the view falls back to without Gemini.
+"""
+
+import json
+import platform
+import time
+import tracemalloc
+
+from ..llm_handler import (
+    build_prompt,
+    generate_fallback_wordlist,
+    mask_pii_for_api,
+    score_wordlist,
+)
+from .merge_service import merge_generation_sources
+from .ranking_service import get_ranker
+
+DEFAULT_RANKS = (10, 100, 1_000, 10_000)
+DEFAULT_MAX_SIZE = 10_000
+
+
+def load_cases(path):
+    """Read benchmark cases from a JSON Lines file."""
+    cases = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            case = json.loads(line)
+            if not isinstance(case.get("profile"), dict) or not case.get("password"):
+                raise ValueError(f"{path}:{lineno}: case needs 'profile' and 'password'")
+            case.setdefault("id", f"case-{lineno}")
+            cases.append(case)
+    return cases
+
+
+def stub_llm(prompt, pii_data=None):
+    """Offline stand-in for call_gemini_api — never touches the network."""
+    return generate_fallback_wordlist(pii_data or {})
+
+
+def generate_candidates(pii_data, pattern_mode="standard", rockyou=(),
+                        max_size=DEFAULT_MAX_SIZE, llm=stub_llm):
+    """Run the submit-view pipeline for one profile and return the ranked list."""
+    pii_data = mask_pii_for_api(pii_data)
+    prompt = build_prompt(pii_data, pattern_mode)
+    wordlist_raw = llm(prompt, pii_data=pii_data)
+
+    plain_passwords = list(
+        merge_generation_sources(wordlist_raw.splitlines(), rockyou, max_size)
+    )
+    return score_wordlist(plain_passwords, pii_data, frozenset(rockyou))
+
+
+def guess_number(scored, password):
+    """1-based rank of *password* in a scored list, or None if absent."""
+    for i, item in enumerate(scored, start=1):
+        if item["password"] == password:
+            return i
+    return None
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[idx]
+
+
+def run_benchmark(cases, ranks=DEFAULT_RANKS, max_size=DEFAULT_MAX_SIZE,
+                  rockyou=(), trace_memory=True):
+    """Benchmark every case and return the JSON-serialisable report."""
+    per_case = []
+    for case in cases:
+        canned = case.get("llm_response")
+        llm = (lambda prompt, pii_data=None: canned) if canned is not None else stub_llm
+
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        scored = generate_candidates(
+            case["profile"],
+            pattern_mode=case.get("pattern_mode", "standard"),
+            rockyou=rockyou,
+            max_size=max_size,
+            llm=llm,
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        peak_kb = 0.0
+        if trace_memory:
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+
+        per_case.append({
+            "id": case["id"],
+            "guess_number": guess_number(scored, case["password"]),
+            "candidates": len(scored),
+            "ms": round(elapsed_ms, 2),
+            "peak_kb": round(peak_kb, 1),
+        })
+
+    total = len(per_case)
+    found = sorted(c["guess_number"] for c in per_case if c["guess_number"])
+    times = sorted(c["ms"] for c in per_case)
+    peaks = sorted(c["peak_kb"] for c in per_case)
+
+    return {
+        "meta": {
+            "cases": total,
+            "max_size": max_size,
+            "rockyou_size": len(rockyou),
+            # Effective engine — "markov" degrades to "heuristic" without a table.
+            "ranking_engine": get_ranker().name,
+            "python": platform.python_version(),
+        },
+        "hit_rate": {
+            str(r): round(sum(1 for g in found if g <= r) / total, 4) if total else 0.0
+            for r in ranks
+        },
+        "guess_number": {
+            "found": len(found),
+            "median": _percentile(found, 50) if found else None,
+        },
+        "timing_ms": {
+            "mean": round(sum(times) / total, 2) if total else 0.0,
+            "p50": _percentile(times, 50),
+            "p95": _percentile(times, 95),
+            "max": times[-1] if times else 0.0,
+        },
+        "peak_memory_kb": {
+            "mean": round(sum(peaks) / total, 1) if total else 0.0,
+            "max": peaks[-1] if peaks else 0.0,
+        },
+        "per_case": per_case,
+    }
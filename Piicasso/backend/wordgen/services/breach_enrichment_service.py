@@ -0,0 +1,95 @@
+"""
+Breach Enrichment Stage
+=======================
+Optional stage after ``score_wordlist``: annotates the top-N ranked
+candidates with their Pwned Passwords exposure count and folds that count
+into the ranking score.
+
+A candidate that already appears in a breach corpus is far more likely to be
+somebody's real password than an unseen permutation, so each breached
+candidate gains up to ``BREACH_BONUS_MAX`` points, growing with
+log10(count).  Lookups go through ``password_security.hibp.breach_counts``,
+i.e. the local mirror when present, otherwise prefix-cached, batched range
+requests.
+
+The stage runs after the submit response has been sent (Celery when a
+broker is configured, a daemon thread otherwise).  The enriched list
+replaces the cached wordlist and the changed entries are pushed to the
+user's ``gen_user_{id}`` channel group as a ``generation_breach_update``
+event.  Enabled by PIICASSO_SETTINGS ``BREACH_ENRICHMENT_TOP_N`` > 0.
+"""
+
+import logging
+import math
+
+from django.conf import settings
+
+from backend.tasks_util import dispatch
+
+logger = logging.getLogger("wordgen")
+
+BREACH_BONUS_MAX = 20
+_BONUS_PER_DECADE = 4
+
+
+def get_top_n():
+    return int(settings.PIICASSO_SETTINGS.get("BREACH_ENRICHMENT_TOP_N", 0) or 0)
+
+
+def breach_bonus(count):
+    """Score points for a candidate seen *count* times in breaches."""
+    if count <= 0:
+        return 0
+    return min(BREACH_BONUS_MAX, max(1, round(_BONUS_PER_DECADE * math.log10(count + 1))))
+
+
+def enrich_scored_list(scored_list, top_n):
+    """
+    Annotate the first *top_n* entries with ``breach_count`` and re-rank.
+
+    Returns ``(enriched_list, updates)`` where *updates* holds only the
+    newly annotated entries.  Entries whose lookup failed (-1) are left
+    as-is, and entries that already carry ``breach_count`` (a cached list
+    enriched earlier) are not looked up or boosted again.
+    """
+    from password_security.hibp import breach_counts
+
+    head = scored_list[:top_n]
+    counts = breach_counts(
+        [item["password"] for item in head if "breach_count" not in item]
+    )
+
+    updates = []
+    enriched = []
+    for item in head:
+        count = counts.get(item["password"], -1)
+        if "breach_count" in item or count < 0:
+            enriched.append(item)
+            continue
+        entry = {
+            **item,
+            "score": min(100, item["score"] + breach_bonus(count)),
+            "breach_count": count,
+        }
+        enriched.append(entry)
+        updates.append(entry)
+
+    enriched.extend(scored_list[top_n:])
+    # Stable sort: unchanged candidates keep their engine order on ties.
+    enriched.sort(key=lambda x: x["score"], reverse=True)
+    return enriched, updates
+
+
+def schedule_breach_enrichment(user_id, history_id, cache_key):
+    """
+    Queue enrichment of the cached wordlist at *cache_key*.  Returns False
+    when the stage is disabled.
+    """
+    top_n = get_top_n()
+    if top_n <= 0:
+        return False
+
+    from ..tasks import enrich_breach_scores_task
+
+    dispatch(enrich_breach_scores_task, user_id, history_id, cache_key, top_n)
+    return True
@@ -0,0 +1,208 @@
+"""
+Batch dossier reports
+=====================
+Reports for many targets in one request, for engagement close-out: any mix
+of GenerationHistory ids and ``intelligence.TargetProfile`` ids (the latter
+only where that app is installed), as
+
+  - ``zip`` — one PDF per target, streamed entry by entry as each report
+    finishes rendering in a process pool; or
+  - ``pdf`` — a single merged dossier with a table of contents.  Its two
+    layout passes need every report's flowables in one process, so it is
+    built in the request thread and capped at ``BATCH_REPORT_MERGED_MAX``
+    targets; larger batches use ``zip``.
+
+Targets are loaded and decrypted once in the request process and handed to
+the workers as plain-dict snapshots (``report_generator.render_report_bytes``),
+so workers never touch the database.  Generations whose current report
+is already stored (``report_service``) are not rendered again.
+"""
+
+import os
+import uuid
+import zipfile
+from xml.sax.saxutils import escape
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from multiprocessing import get_context
+
+from django.apps import apps
+from django.conf import settings
+
+from ..report_generator import (
+    generate_dossier_pdf, render_report_bytes, report_ref, snapshot_entry,
+)
+from ..utils import DrainableSink
+from .report_service import REPORT_VERSION, ArtifactUnavailable, read_pdf
+
+FORMATS = ("zip", "pdf")
+# Render processes per request: BATCH_REPORT_WORKERS, else the default, and
+# never more than the cap, so concurrent batches cannot fork a pool per CPU
+# each.
+DEFAULT_WORKERS = 2
+MAX_WORKERS = 4
+DEFAULT_MERGED_MAX = 20
+
+
+class DossierError(ValueError):
+    """The batch cannot be built as requested (message is user-facing)."""
+
+
+def _history_snapshot(h):
+    return {
+        "kind": "history",
+        "id": h.id,
+        "timestamp": h.timestamp,
+        "ip_address": h.ip_address,
+        "user": h.user.username if h.user else None,
+        "pii_data": h.pii_data or {},
+        "wordlist": h.wordlist or [],
+    }
+
+
+def _target_snapshot(t):
+    dossier = getattr(t, "dossier", None)
+    return {
+        "kind": "target",
+        "id": t.unique_target_id,
+        "timestamp": t.created_at,
+        "ip_address": None,
+        "user": t.created_by.username,
+        "pii_data": t.to_profile_dict(),
+        "wordlist": dossier.wordlist if dossier else [],
+    }
+
+
+def _fetch(qs, ids, what):
+    by_id = {obj.pk: obj for obj in qs.filter(pk__in=ids)}
+    missing = [str(i) for i in ids if i not in by_id]
+    if missing:
+        raise DossierError(f"{what} not found: {', '.join(missing)}.")
+    return [by_id[i] for i in ids]
+
+
+def collect_snapshots(user, history_ids=(), target_ids=(), fmt="zip"):
+    """Snapshots of the requested reports, in request order, owned by *user*."""
+    from generator.models import GenerationHistory
+
+    history_ids = list(dict.fromkeys(history_ids))
+    target_ids = list(dict.fromkeys(target_ids))
+    limit = settings.PIICASSO_SETTINGS.get("BATCH_REPORT_MAX", 100)
+    if not history_ids and not target_ids:
+        raise DossierError("Provide history_ids and/or target_ids.")
+    if len(history_ids) + len(target_ids) > limit:
+        raise DossierError(f"At most {limit} reports per batch.")
+    if fmt == "pdf":
+        merged_limit = settings.PIICASSO_SETTINGS.get("BATCH_REPORT_MERGED_MAX", DEFAULT_MERGED_MAX)
+        if len(history_ids) + len(target_ids) > merged_limit:
+            raise DossierError(
+                f"At most {merged_limit} reports per merged PDF; use format=zip for more."
+            )
+
+    qs = GenerationHistory.objects.select_related("user")
+    if not user.is_superuser:
+        qs = qs.filter(user=user)
+    snapshots = [_history_snapshot(h) for h in _fetch(qs, history_ids, "Generations")]
+
+    if target_ids:
+        if not apps.is_installed("intelligence"):
+            raise DossierError("Target profiles are not available on this server.")
+        try:
+            target_ids = [uuid.UUID(str(t)) for t in target_ids]
+        except ValueError:
+            raise DossierError("target_ids must be UUIDs.")
+        TargetProfile = apps.get_model("intelligence", "TargetProfile")
+        qs = TargetProfile.objects.select_related("created_by", "dossier")
+        if not user.is_superuser:
+            qs = qs.filter(created_by=user)
+        snapshots += [_target_snapshot(t) for t in _fetch(qs, target_ids, "Target profiles")]
+    return snapshots
+
+
+def toc_label(snapshot):
+    """Table-of-contents entry; escaped, since the TOC renders it as Paragraph markup."""
+    pii_data = snapshot["pii_data"]
+    name = (pii_data.get("full_name") if isinstance(pii_data, dict) else None) or "Unnamed target"
+    return escape(f"{report_ref(snapshot['id'])}  {name}")
+
+
+def report_filename(snapshot):
+    return f"PIICASSO_{report_ref(snapshot['id'])}.pdf"
+
+
+def _stored_artifacts(snapshots):
+    """``{history id: ReportArtifact}`` of generations whose current report is stored."""
+    from generator.models import ReportArtifact
+
+    artifacts = ReportArtifact.objects.filter(
+        history_id__in=[s["id"] for s in snapshots if s["kind"] == "history"],
+        version=REPORT_VERSION,
+        status="READY",
+    )
+    return {a.history_id: a for a in artifacts}
+
+
+def _worker_count(jobs):
+    workers = settings.PIICASSO_SETTINGS.get("BATCH_REPORT_WORKERS", 0) or DEFAULT_WORKERS
+    return max(1, min(workers, MAX_WORKERS, os.cpu_count() or 1, jobs))
+
+
+def render_reports(snapshots, workers=None):
+    """
+    Yield ``(snapshot, pdf bytes)`` for every snapshot, in completion order:
+    stored reports first, then renders as the process pool finishes them.
+    """
+    stored = _stored_artifacts(snapshots)
+    todo = []
+    for snapshot in snapshots:
+        artifact = stored.get(snapshot["id"]) if snapshot["kind"] == "history" else None
+        pdf = None
+        if artifact is not None:
+            try:
+                pdf = read_pdf(artifact)
+            except ArtifactUnavailable:
+                pass  # render it instead
+        if pdf is None:
+            todo.append(snapshot)
+        else:
+            yield snapshot, pdf
+
+    workers = workers or _worker_count(len(todo))
+    if workers <= 1 or len(todo) <= 1:
+        for snapshot in todo:
+            yield snapshot, render_report_bytes(snapshot)[1]
+        return
+
+    by_id = {s["id"]: s for s in todo}
+    # Spawned, not forked: web workers are threaded and hold DB connections.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = [pool.submit(render_report_bytes, s) for s in todo]
+        for future in as_completed(futures):
+            report_id, pdf = future.result()
+            yield by_id[report_id], pdf
+
+
+def stream_zip(snapshots, workers=None):
+    """A ZIP of one PDF per snapshot, as bytes chunks, one chunk per report."""
+    sink = DrainableSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for snapshot, pdf in render_reports(snapshots, workers):
+            archive.writestr(report_filename(snapshot), pdf)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_merged_pdf(snapshots):
+    """
+    The merged dossier as one chunk (the TOC needs the whole layout first).
+    Rendered in this thread, unlike ``stream_zip``: see BATCH_REPORT_MERGED_MAX.
+    """
+    buffer = BytesIO()
+    generate_dossier_pdf([(snapshot_entry(s), toc_label(s)) for s in snapshots], buffer)
+    yield buffer.getvalue()
+
+
+def stream_dossier(snapshots, fmt, workers=None):
+    if fmt == "pdf":
+        return stream_merged_pdf(snapshots)
+    return stream_zip(snapshots, workers)
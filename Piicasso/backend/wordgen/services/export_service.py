@@ -0,0 +1,224 @@
+"""
+Columnar exports — NDJSON and Apache Parquet
+============================================
+Bulk exports of generation history, password analyses and user activity
+for offline analysis (DuckDB, pandas, Spark), served by ``export_dataset``
+and ``manage.py export_dataset``.
+
+Rows stream from a server-side cursor over a fixed set of columns and are
+written out in batches of ``ROW_GROUP_SIZE``: one chunk of NDJSON lines, or
+one Parquet row group.  Encrypted PII is never exported — generation and
+analysis rows carry ``pii_fields`` (which fields were provided), and
+history rows a five-password sample rather than the wordlist.
+
+Parquet needs ``pyarrow`` (in requirements.txt); where it is missing
+``ExportUnavailable`` is raised and NDJSON still works.
+"""
+
+import json
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.db.models.fields.json import KeyTextTransform
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from generator.fields import pii_fields_from_mask
+from wordgen.utils import DrainableSink
+
+FORMATS = ("ndjson", "parquet")
+ROW_GROUP_SIZE = 10_000
+SAMPLE_SIZE = 5
+
+
+class ExportUnavailable(Exception):
+    """The requested format needs a library that is not installed."""
+
+
+def with_password_sample(qs):
+    """
+    *qs* (GenerationHistory) annotated with its first ``SAMPLE_SIZE``
+    passwords, sliced out of the wordlist JSON by the database.
+    """
+    return qs.annotate(**{
+        f"sample_{i}": KeyTextTransform(str(i), "wordlist") for i in range(SAMPLE_SIZE)
+    })
+
+
+def password_sample(row):
+    """The sample of a row from ``with_password_sample``."""
+    return [v for v in (getattr(row, f"sample_{i}") for i in range(SAMPLE_SIZE)) if v is not None]
+
+
+def _history(qs_filter):
+    from generator.models import GenerationHistory
+
+    qs = with_password_sample(qs_filter(GenerationHistory.objects.all(), "timestamp").only(
+        "id", "user_id", "timestamp", "ip_address", "pii_fields_mask", "wordlist_count"
+    ))
+    for r in qs.order_by("pk").iterator(chunk_size=ROW_GROUP_SIZE):
+        yield {
+            "id": r.id,
+            "user_id": r.user_id,
+            "timestamp": r.timestamp,
+            "ip_address": r.ip_address,
+            "pii_fields": pii_fields_from_mask(r.pii_fields_mask),
+            "wordlist_count": r.wordlist_count,
+            "sample_passwords": password_sample(r),
+        }
+
+
+def _analyses(qs_filter):
+    from password_security.models import PasswordAnalysis
+
+    qs = qs_filter(PasswordAnalysis.objects.all(), "created_at").defer("pii_data")
+    for a in qs.order_by("pk").iterator(chunk_size=ROW_GROUP_SIZE):
+        yield {
+            "id": a.id,
+            "user_id": a.user_id,
+            "created_at": a.created_at,
+            "vulnerability_level": a.vulnerability_level,
+            "strength_score": a.strength_score,
+            "crack_time_estimate": a.crack_time_estimate,
+            "breach_count": a.breach_count,
+            "pii_fields": pii_fields_from_mask(a.pii_fields_mask),
+            "vulnerabilities_found": [str(v) for v in a.vulnerabilities_found or []],
+            "recommendations": [str(v) for v in a.recommendations or []],
+        }
+
+
+def _activity(qs_filter):
+    from analytics.models import UserActivity
+
+    qs = qs_filter(UserActivity.objects.all(), "timestamp")
+    for a in qs.order_by("pk").iterator(chunk_size=ROW_GROUP_SIZE):
+        yield {
+            "id": a.id,
+            "user_id": a.user_id,
+            "timestamp": a.timestamp,
+            "activity_type": a.activity_type,
+            "description": a.description,
+            "latitude": a.latitude,
+            "longitude": a.longitude,
+            "country_code": a.country_code,
+            "city": a.city,
+        }
+
+
+DATASETS = {
+    "history": _history,
+    "analyses": _analyses,
+    "activity": _activity,
+}
+
+
+def _parquet_schema(dataset):
+    import pyarrow as pa
+
+    ts = pa.timestamp("us", tz="UTC")
+    strings = pa.list_(pa.string())
+    return {
+        "history": pa.schema([
+            ("id", pa.int64()), ("user_id", pa.int64()), ("timestamp", ts),
+            ("ip_address", pa.string()), ("pii_fields", strings),
+            ("wordlist_count", pa.int64()), ("sample_passwords", strings),
+        ]),
+        "analyses": pa.schema([
+            ("id", pa.int64()), ("user_id", pa.int64()), ("created_at", ts),
+            ("vulnerability_level", pa.string()), ("strength_score", pa.int64()),
+            ("crack_time_estimate", pa.string()), ("breach_count", pa.int64()),
+            ("pii_fields", strings), ("vulnerabilities_found", strings),
+            ("recommendations", strings),
+        ]),
+        "activity": pa.schema([
+            ("id", pa.int64()), ("user_id", pa.int64()), ("timestamp", ts),
+            ("activity_type", pa.string()), ("description", pa.string()),
+            ("latitude", pa.float64()), ("longitude", pa.float64()),
+            ("country_code", pa.string()), ("city", pa.string()),
+        ]),
+    }[dataset]
+
+
+def parse_bound(value):
+    """ISO date or datetime → aware datetime (a date means midnight UTC)."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def iter_rows(dataset, user_ids=None, since=None, until=None):
+    """
+    Rows of *dataset* as dicts, in primary-key order.  *user_ids* limits
+    them to those owners; *since* / *until* bound the row's timestamp
+    (inclusive / exclusive).
+    """
+    def qs_filter(qs, time_field):
+        if user_ids is not None:
+            qs = qs.filter(user_id__in=user_ids)
+        if since is not None:
+            qs = qs.filter(**{f"{time_field}__gte": since})
+        if until is not None:
+            qs = qs.filter(**{f"{time_field}__lt": until})
+        return qs
+
+    return DATASETS[dataset](qs_filter)
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_ndjson(rows, batch_size=None):
+    """One JSON object per line, yielded as bytes in batches of rows."""
+    for batch in _batches(rows, batch_size or ROW_GROUP_SIZE):
+        yield "".join(
+            json.dumps(row, default=str, ensure_ascii=False) + "\n" for row in batch
+        ).encode()
+
+
+def stream_parquet(dataset, rows, row_group_size=None):
+    """A Parquet file as bytes, one row group per yielded chunk (footer last)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportUnavailable("Parquet export requires the pyarrow package.")
+
+    schema = _parquet_schema(dataset)
+    sink = DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in _batches(rows, row_group_size or ROW_GROUP_SIZE):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(dataset, fmt, rows):
+    if fmt == "parquet":
+        return stream_parquet(dataset, rows)
+    return stream_ndjson(rows)
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,129 @@
+"""
+Generation inputs
+=================
+What every generation path — ``PiiSubmitView``, the Celery
+``generate_wordlist_task`` and batch generation
+(``batch_generation_service``) — prepares the same way: the submitted PII
+is sanitized, the RockYou sample is loaded once per process and shared, and
+the wordlist cap comes from one place.
+"""
+
+import html
+import logging
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from backend.metrics import record_rockyou_load
+
+logger = logging.getLogger("wordgen")
+
+
+# ---------------------------------------------------------------------------
+# RockYou sample (lazy singleton, memory-bounded)
+# ---------------------------------------------------------------------------
+# Loaded on first use, not at import time, so startup RAM is unaffected even
+# when rockyou.txt is present.  Reservoir sampling (Vitter's Algorithm R)
+# caps the in-memory set at _ROCKYOU_MAX entries regardless of file size,
+# giving a uniform random sample with a single streaming pass.
+
+_ROCKYOU_MAX = 50_000
+# Where the generation views have always looked for it.
+ROCKYOU_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "views", "rockyou.txt")
+_ROCKYOU_CACHE = None          # None = not yet loaded
+_ROCKYOU_SET = None
+_ROCKYOU_LOCK = threading.Lock()
+
+
+def load_rockyou_sample():
+    """Reservoir sample of ROCKYOU_PATH as a tuple; empty when it is missing."""
+    if not os.path.exists(ROCKYOU_PATH):
+        return ()
+    started = time.perf_counter()
+    try:
+        reservoir = []
+        count = 0  # number of valid (non-blank) lines seen so far
+        with open(ROCKYOU_PATH, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                word = line.strip()
+                if not word:
+                    continue
+                if count < _ROCKYOU_MAX:
+                    reservoir.append(word)
+                else:
+                    # Algorithm R: replace a random earlier entry with
+                    # decreasing probability so every word has an equal
+                    # chance of appearing in the final reservoir.
+                    j = random.randint(0, count)
+                    if j < _ROCKYOU_MAX:
+                        reservoir[j] = word
+                count += 1
+        logger.info(f"RockYou loaded {len(reservoir)} entries (sampled from {count})")
+        record_rockyou_load(time.perf_counter() - started, len(reservoir))
+        return tuple(reservoir)
+    except Exception as e:
+        logger.warning(f"RockYou load failed: {e}")
+        return ()
+
+
+def get_rockyou_corpus():
+    """Shared, immutable RockYou sample (tuple) — no per-request copy."""
+    global _ROCKYOU_CACHE
+    if _ROCKYOU_CACHE is None:
+        with _ROCKYOU_LOCK:
+            if _ROCKYOU_CACHE is None:  # second check under the lock
+                _ROCKYOU_CACHE = load_rockyou_sample()
+    return _ROCKYOU_CACHE
+
+
+def get_rockyou_set():
+    """Membership view of the RockYou sample, built once per process."""
+    global _ROCKYOU_SET
+    if _ROCKYOU_SET is None:
+        corpus = get_rockyou_corpus()
+        with _ROCKYOU_LOCK:
+            if _ROCKYOU_SET is None:
+                _ROCKYOU_SET = frozenset(corpus)
+    return _ROCKYOU_SET
+
+
+def get_rockyou_wordlist():
+    return list(get_rockyou_corpus())
+
+
+# ---------------------------------------------------------------------------
+# Input
+# ---------------------------------------------------------------------------
+
+
+def sanitize_pii_data(data):
+    """
+    Strip HTML tags from all string values in PII data to prevent stored XSS.
+    Works recursively on dicts and lists.
+    """
+    if isinstance(data, dict):
+        return {k: sanitize_pii_data(v) for k, v in data.items()}
+    elif isinstance(data, list):
+        return [sanitize_pii_data(item) for item in data]
+    elif isinstance(data, str):
+        # Escape HTML entities to neutralise any embedded HTML/script tags
+        return html.escape(data, quote=True)
+    return data
+
+
+def get_max_wordlist_size():
+    """
+    The generation cap: the ``max_wordlist_size`` SystemSetting when it is
+    a positive integer, else PIICASSO_SETTINGS MAX_WORDLIST_SIZE.
+    """
+    from operations.models import SystemSetting
+
+    default = settings.PIICASSO_SETTINGS.get("MAX_WORDLIST_SIZE", 1000)
+    try:
+        size = int(SystemSetting.get("max_wordlist_size", "") or 0)
+    except (ValueError, TypeError):
+        return default
+    return size if size > 0 else default
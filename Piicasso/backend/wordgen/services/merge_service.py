@@ -0,0 +1,99 @@
+"""
+Candidate Merge Stage
+=====================
+Single streaming merge for AI, corpus and fallback password candidates.
+
+Sources are consumed lazily and interleaved either by priority (exhaust the
+first source, then the next — the historical "AI first, then RockYou"
+behaviour) or by weighted round-robin.  Output is deduplicated in first-seen
+order and the merge stops pulling from every source as soon as ``max_size``
+unique candidates have been emitted, so a 50k-entry corpus is never walked
+when only the first few thousand entries can be kept.  The ``seen`` set only
+holds emitted candidates, so its size is bounded by ``max_size``.
+"""
+
+from django.conf import settings
+
+
+def _clean(source):
+    for line in source:
+        pwd = line.strip() if isinstance(line, str) else ""
+        if pwd:
+            yield pwd
+
+
+def _priority(iterators):
+    for it in iterators:
+        yield from it
+
+
+def _weighted(iterators, weights):
+    """
+    Smooth weighted round-robin (as in nginx upstream balancing): each pick
+    goes to the source with the highest running credit, which spreads a 3:1
+    weighting as A A B A A A B A … instead of bursts.  Exhausted sources
+    drop out and the remaining ones keep their relative weights.
+    """
+    active = [[it, w, 0.0] for it, w in zip(iterators, weights) if w > 0]
+    while active:
+        total = sum(entry[1] for entry in active)
+        for entry in active:
+            entry[2] += entry[1]
+        best = max(active, key=lambda entry: entry[2])
+        best[2] -= total
+        try:
+            yield next(best[0])
+        except StopIteration:
+            active.remove(best)
+
+
+def merge_candidates(sources, max_size=None, weights=None):
+    """
+    Yield unique, stripped, non-empty candidates from *sources*.
+
+    Args:
+        sources:  sequence of iterables of strings, in priority order
+        max_size: stop after this many unique candidates (None = unbounded)
+        weights:  optional per-source weights for round-robin interleaving;
+                  None merges by priority.  A weight of 0 disables a source.
+    """
+    if max_size is not None and max_size <= 0:
+        return
+
+    iterators = [_clean(s) for s in sources]
+    if weights:
+        if len(weights) != len(iterators):
+            raise ValueError("weights must match the number of sources")
+        stream = _weighted(iterators, weights)
+    else:
+        stream = _priority(iterators)
+
+    seen = set()
+    for pwd in stream:
+        if pwd in seen:
+            continue
+        seen.add(pwd)
+        yield pwd
+        if max_size is not None and len(seen) >= max_size:
+            return
+
+
+def get_source_weights(names):
+    """
+    Resolve per-source weights from PIICASSO_SETTINGS CANDIDATE_MERGE_WEIGHTS
+    (e.g. ``{"ai": 3, "rockyou": 1}``).  Returns None — priority merge —
+    when no weights are configured.
+    """
+    configured = settings.PIICASSO_SETTINGS.get("CANDIDATE_MERGE_WEIGHTS") or {}
+    if not configured:
+        return None
+    return [float(configured.get(name, 0)) for name in names]
+
+
+def merge_generation_sources(ai_lines, corpus=(), max_size=None):
+    """Merge LLM output with the corpus sample using the configured strategy."""
+    return merge_candidates(
+        [ai_lines, corpus],
+        max_size=max_size,
+        weights=get_source_weights(["ai", "rockyou"]),
+    )
@@ -0,0 +1,291 @@
+"""
+Candidate Ranking Engine
+========================
+Orders generated password candidates by estimated guess probability instead
+of the capped heuristic points in ``llm_handler._score_one``.
+
+The default engine is a character-level Markov model (order 3 with stupid
+backoff) trained offline over a local corpus by
+``python manage.py train_ranking_model``.  The model is precomputed to a
+compact gzip'd count table and loaded lazily on first use, so startup RAM is
+unaffected when ranking is never exercised.
+
+For every candidate:
+
+  bits = -log2 P_markov(password)            — generic human-choice prior
+         - PII_BITS      × min(pii_hits, 2)   — targeted likelihood ratio
+         - ROCKYOU_BITS  (if in corpus sample)
+
+Candidates are sorted by ascending bits (most probable first).  The 1–100
+``score`` returned to clients is a fixed, list-independent mapping of bits,
+so the same password scores the same across generations.
+
+Engines are pluggable: register a class exposing ``rank(passwords, pii_data,
+rockyou_set)`` in ``RANKERS`` and select it with PIICASSO_SETTINGS
+``RANKING_ENGINE``.  When the Markov table is missing the heuristic engine is
+used, so deployments without a trained model behave exactly as before.
+"""
+
+import gzip
+import json
+import logging
+import math
+import os
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger("wordgen")
+
+# Padding symbols — outside the printable range, never part of a password.
+_START = "\x02"
+_END = "\x03"
+
+DEFAULT_ORDER = 3
+_MODEL_FORMAT = 1
+
+# Stupid-backoff penalty per dropped context character (Brants et al. 2007).
+_BACKOFF_BITS = -math.log2(0.4)
+# Assumed alphabet size for add-one smoothing of unseen unigrams.
+_ALPHABET_SIZE = 96
+# Upper bound on memoised (context, char) probabilities per model.
+_MEMO_MAX = 500_000
+
+# Targeted-guessing likelihood ratios, in bits.
+PII_BITS = 10.0
+ROCKYOU_BITS = 4.0
+
+# bits → score: ~10 bits (top-1k password) maps to 100, ~109 bits to 1.
+_SCORE_ANCHOR_BITS = 10.0
+_SCORE_PER_BIT = 1.0
+
+
+# ---------------------------------------------------------------------------
+# Markov model
+# ---------------------------------------------------------------------------
+
+class MarkovModel:
+    """
+    Character-level n-gram model backed by plain count tables.
+
+    ``tables`` maps a context string (length 0..order) to a ``{char: count}``
+    dict.  Probabilities are derived on demand and memoised per
+    (context, char) pair, so repeated ranking of similar candidates is cheap.
+    """
+
+    def __init__(self, order, tables):
+        self.order = order
+        self.tables = tables
+        self._totals = {ctx: sum(counts.values()) for ctx, counts in tables.items()}
+        self._memo = {}
+
+    @classmethod
+    def train(cls, lines, order=DEFAULT_ORDER, min_count=2):
+        """Build a model from an iterable of passwords."""
+        tables = {}
+        pad = _START * order
+        for line in lines:
+            word = line.strip()
+            if not word:
+                continue
+            padded = pad + word + _END
+            for i in range(order, len(padded)):
+                ch = padded[i]
+                for k in range(order + 1):
+                    ctx = padded[i - k:i]
+                    counts = tables.get(ctx)
+                    if counts is None:
+                        counts = tables[ctx] = {}
+                    counts[ch] = counts.get(ch, 0) + 1
+
+        # Prune rare higher-order transitions; they dominate table size while
+        # contributing almost nothing that backoff cannot recover.
+        if min_count > 1:
+            for ctx in list(tables):
+                if not ctx:
+                    continue
+                counts = {c: n for c, n in tables[ctx].items() if n >= min_count}
+                if counts:
+                    tables[ctx] = counts
+                else:
+                    del tables[ctx]
+
+        return cls(order, tables)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("format") != _MODEL_FORMAT:
+            raise ValueError(f"Unsupported ranking model format: {payload.get('format')}")
+        return cls(payload["order"], payload["tables"])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        payload = {"format": _MODEL_FORMAT, "order": self.order, "tables": self.tables}
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"), ensure_ascii=False)
+
+    def _char_bits(self, ctx, ch):
+        key = (ctx, ch)
+        cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+
+        penalty = 0.0
+        bits = None
+        for k in range(len(ctx), 0, -1):
+            sub = ctx[len(ctx) - k:]
+            counts = self.tables.get(sub)
+            if counts is not None:
+                n = counts.get(ch)
+                if n:
+                    bits = penalty - math.log2(n / self._totals[sub])
+                    break
+            penalty += _BACKOFF_BITS
+
+        if bits is None:
+            unigrams = self.tables.get("", {})
+            total = self._totals.get("", 0)
+            bits = penalty - math.log2(
+                (unigrams.get(ch, 0) + 1) / (total + _ALPHABET_SIZE)
+            )
+
+        if len(self._memo) >= _MEMO_MAX:
+            self._memo.clear()
+        self._memo[key] = bits
+        return bits
+
+    def bits(self, password):
+        """Return -log2 P(password) under the model (lower = more probable)."""
+        padded = _START * self.order + password + _END
+        order = self.order
+        return sum(
+            self._char_bits(padded[i - order:i], padded[i])
+            for i in range(order, len(padded))
+        )
+
+
+# ---------------------------------------------------------------------------
+# Lazy model singleton
+# ---------------------------------------------------------------------------
+
+_MODEL_CACHE = None        # None = not yet loaded, False = unavailable
+_MODEL_LOCK = threading.Lock()
+
+
+def get_model_path():
+    return settings.PIICASSO_SETTINGS.get("RANKING_MODEL_PATH", "")
+
+
+def get_markov_model():
+    """Return the trained MarkovModel, or None when no table file exists."""
+    global _MODEL_CACHE
+    if _MODEL_CACHE is None:
+        with _MODEL_LOCK:
+            if _MODEL_CACHE is None:  # second check under the lock
+                path = get_model_path()
+                model = False
+                if path and os.path.exists(path):
+                    try:
+                        model = MarkovModel.load(path)
+                        logger.info(
+                            f"Ranking model loaded from {path} "
+                            f"(order={model.order}, contexts={len(model.tables)})"
+                        )
+                    except Exception as e:
+                        logger.warning(f"Ranking model load failed: {e}")
+                _MODEL_CACHE = model
+    return _MODEL_CACHE or None
+
+
+def reset_model_cache():
+    """Drop the loaded model so the next call re-reads the table file."""
+    global _MODEL_CACHE
+    with _MODEL_LOCK:
+        _MODEL_CACHE = None
+
+
+# ---------------------------------------------------------------------------
+# Rankers
+# ---------------------------------------------------------------------------
+
+def bits_to_score(bits):
+    return max(1, min(100, round(100 - (bits - _SCORE_ANCHOR_BITS) * _SCORE_PER_BIT)))
+
+
+class HeuristicRanker:
+    """Original capped-points scorer (PII overlap + pattern + RockYou)."""
+
+    name = "heuristic"
+
+    def rank(self, passwords, pii_data, rockyou_set=frozenset()):
+        from ..llm_handler import _extract_pii_tokens, _score_one
+
+        pii_tokens = _extract_pii_tokens(pii_data)
+        scored = [
+            {"password": pwd, "score": _score_one(pwd, pii_tokens, rockyou_set)}
+            for pwd in passwords
+        ]
+        scored.sort(key=lambda x: x["score"], reverse=True)
+        return scored
+
+
+class MarkovRanker:
+    """Orders candidates by Markov-estimated guess probability."""
+
+    name = "markov"
+
+    def __init__(self, model):
+        self.model = model
+
+    def candidate_bits(self, password, pii_tokens, rockyou_set):
+        bits = self.model.bits(password)
+        pw_lower = password.lower()
+        hits = 0
+        for tok in pii_tokens:
+            if tok in pw_lower:
+                hits += 1
+                if hits == 2:
+                    break
+        bits -= hits * PII_BITS
+        if password in rockyou_set:
+            bits -= ROCKYOU_BITS
+        return bits
+
+    def rank(self, passwords, pii_data, rockyou_set=frozenset()):
+        from ..llm_handler import _extract_pii_tokens
+
+        pii_tokens = _extract_pii_tokens(pii_data)
+        ranked = sorted(
+            (
+                (self.candidate_bits(pwd, pii_tokens, rockyou_set), pwd)
+                for pwd in passwords
+            ),
+            key=lambda r: r[0],
+        )
+        return [{"password": pwd, "score": bits_to_score(bits)} for bits, pwd in ranked]
+
+
+RANKERS = {
+    HeuristicRanker.name: HeuristicRanker,
+    MarkovRanker.name: MarkovRanker,
+}
+
+
+def get_ranker(engine=None):
+    """
+    Resolve the configured ranking engine.  Falls back to the heuristic
+    ranker when the requested engine is unknown or its model is missing.
+    """
+    engine = engine or settings.PIICASSO_SETTINGS.get("RANKING_ENGINE", "markov")
+    if engine == MarkovRanker.name:
+        model = get_markov_model()
+        if model is not None:
+            return MarkovRanker(model)
+        return HeuristicRanker()
+    ranker_cls = RANKERS.get(engine)
+    if ranker_cls is None:
+        logger.warning(f"Unknown ranking engine {engine!r}; using heuristic.")
+        return HeuristicRanker()
+    return ranker_cls()
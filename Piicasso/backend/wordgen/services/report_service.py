@@ -0,0 +1,161 @@
+"""
+PDF report artifacts
+====================
+Intelligence reports are rendered once per generation and layout version
+in the background, then served from storage.
+
+``request_report`` is what the download views call: the first request for
+a (history, ``REPORT_VERSION``) pair records a PENDING ``ReportArtifact``
+and schedules ``render_report_artifact`` (Celery with a broker, otherwise a
+daemon thread), and the view answers 202 until the row is READY.  Bump
+``REPORT_VERSION`` whenever the layout in ``report_generator`` changes so
+old artifacts stop being served.
+
+Files are content-addressed — ``reports/<sha[:2]>/<sha256 of the PDF>`` in
+the "reports" storage — and, since a report prints the profile's PII,
+encrypted with the same Fernet key set as ``pii_data``.  A file is deleted
+with the last ``ReportArtifact`` that names its hash (generator.signals),
+so deleting a generation, or ``discard``-ing its artifact, removes it.
+"""
+
+import hashlib
+import logging
+from datetime import timedelta
+from io import BytesIO
+
+from cryptography.fernet import InvalidToken
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.utils import timezone
+
+from backend.tasks_util import dispatch
+from generator.fields import _get_fernet
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 2  # 2: chunked LongTable wordlists, newline-split text wordlists
+# A PENDING artifact this old lost its worker; the next request re-schedules it.
+PENDING_STALE_AFTER = timedelta(minutes=5)
+POLL_AFTER_SECONDS = 2
+
+
+class ArtifactUnavailable(Exception):
+    """The stored file is missing, unreadable or does not match its hash."""
+
+
+def _storage():
+    return storages["reports"]
+
+
+def artifact_path(sha256):
+    return f"reports/{sha256[:2]}/{sha256}.pdf.enc"
+
+
+def render_pdf(history):
+    from ..report_generator import generate_report_pdf
+
+    buffer = BytesIO()
+    generate_report_pdf(history, buffer)
+    return buffer.getvalue()
+
+
+def store_pdf(pdf):
+    """Encrypt and store *pdf* under its hash (once); returns the hash."""
+    sha256 = hashlib.sha256(pdf).hexdigest()
+    storage = _storage()
+    path = artifact_path(sha256)
+    if not storage.exists(path):
+        storage.save(path, ContentFile(_get_fernet().encrypt(pdf)))
+    return sha256
+
+
+def read_pdf(artifact):
+    try:
+        with _storage().open(artifact_path(artifact.sha256), "rb") as f:
+            pdf = _get_fernet().decrypt(f.read())
+    except (OSError, InvalidToken) as e:
+        raise ArtifactUnavailable(str(e))
+    if hashlib.sha256(pdf).hexdigest() != artifact.sha256:
+        raise ArtifactUnavailable("hash mismatch")
+    return pdf
+
+
+def delete_pdf_if_unused(sha256):
+    """Delete the stored file of *sha256* unless an artifact still names it."""
+    from generator.models import ReportArtifact
+
+    if ReportArtifact.objects.filter(sha256=sha256).exists():
+        return
+    try:
+        _storage().delete(artifact_path(sha256))
+    except OSError as e:
+        logger.warning(f"Could not delete report file {sha256[:12]}: {e}")
+
+
+def render_report_artifact(history_id, version=None):
+    """Worker: render, store and mark the artifact READY (or FAILED)."""
+    from generator.models import GenerationHistory, ReportArtifact
+
+    version = version or REPORT_VERSION
+    try:
+        history = GenerationHistory.objects.select_related("user").get(pk=history_id)
+    except GenerationHistory.DoesNotExist:
+        return None
+
+    artifact, _ = ReportArtifact.objects.get_or_create(history=history, version=version)
+    try:
+        pdf = render_pdf(history)
+        artifact.sha256 = store_pdf(pdf)
+        artifact.size = len(pdf)
+        artifact.status = "READY"
+        artifact.error = ""
+    except Exception as e:
+        logger.error(f"Report rendering failed for history={history_id}: {e}", exc_info=True)
+        artifact.status = "FAILED"
+        artifact.error = str(e)[:255]
+    artifact.save(update_fields=["sha256", "size", "status", "error", "updated_at"])
+    return artifact
+
+
+def schedule_report_render(history_id):
+    """Render off the request (Celery with a broker, else a daemon thread)."""
+    from ..tasks import render_report_task
+
+    dispatch(render_report_task, history_id)
+
+
+def _claim(artifact):
+    """Take over a stale PENDING artifact unless another request just did."""
+    from generator.models import ReportArtifact
+
+    return ReportArtifact.objects.filter(
+        pk=artifact.pk, updated_at=artifact.updated_at
+    ).update(updated_at=timezone.now())
+
+
+def request_report(history):
+    """
+    The current-version artifact of *history*, scheduling a render when
+    there is none yet or its worker went missing.  READY and FAILED
+    artifacts are returned as they are; ``discard`` one to render it again.
+    """
+    from generator.models import ReportArtifact
+
+    artifact, created = ReportArtifact.objects.get_or_create(
+        history=history, version=REPORT_VERSION
+    )
+    schedule = created or (
+        artifact.status == "PENDING"
+        and timezone.now() - artifact.updated_at > PENDING_STALE_AFTER
+        and _claim(artifact)
+    )
+    if schedule:
+        schedule_report_render(history.pk)
+        # Eager Celery (tests, ALWAYS_EAGER) has already rendered it.
+        artifact.refresh_from_db()
+    return artifact
+
+
+def discard(artifact):
+    """Delete *artifact*; its file goes too once nothing else references it."""
+    artifact.delete()
@@ -4,7 +4,8 @@ from channels.layers import get_channel_layer
 from celery import shared_task
 from django.core.cache import cache
 from .llm_handler import build_prompt, call_gemini_api
-from .views import get_rockyou_wordlist
+from .services.generation_service import get_max_wordlist_size, get_rockyou_corpus
+from .services.merge_service import merge_generation_sources
 from generator.models import GenerationHistory
 from django.contrib.auth import get_user_model
 
@@ -13,7 +14,7 @@ User = get_user_model()
 
 
 @shared_task
-def generate_wordlist_task(pii_data, pattern_mode, user_id, cache_key, client_id=None):
+def generate_wordlist_task(pii_data, pattern_mode, user_id, cache_key, client_id=None, max_size=None):
     """
     Background task to handle the heavy Gemini AI call and wordlist generation.
     Sends progress updates back via WebSockets.
@@ -56,23 +57,14 @@ def generate_wordlist_task(pii_data, pattern_mode, user_id, cache_key, client_id
             },
         )
 
-        rockyou_passwords = get_rockyou_wordlist()
-        ai_wordlist = [
-            line.strip() for line in wordlist_raw.splitlines() if line.strip()
-        ]
-
-        seen = set()
-        wordlist = []
-        for pwd in ai_wordlist:
-            if pwd not in seen:
-                wordlist.append(pwd)
-                seen.add(pwd)
-
-        # For simplicity, combine unique logic identical to views.py
-        for pwd in rockyou_passwords:
-            if pwd not in seen:
-                wordlist.append(pwd)
-                seen.add(pwd)
+        if max_size is None:
+            max_size = get_max_wordlist_size()
+        # Same streaming merge stage as PiiSubmitView
+        wordlist = list(
+            merge_generation_sources(
+                wordlist_raw.splitlines(), get_rockyou_corpus(), max_size
+            )
+        )
 
         if not wordlist:
             raise ValueError(
@@ -118,3 +110,59 @@ def generate_wordlist_task(pii_data, pattern_mode, user_id, cache_key, client_id
             },
         )
         return {"error": "Generation failed. Please try again."}
+
+
+@shared_task
+def enrich_breach_scores_task(user_id, history_id, cache_key, top_n):
+    """
+    Background breach-enrichment stage (see services.breach_enrichment_service).
+    Re-ranks the cached scored wordlist and streams the changed entries.
+    """
+    from .services.breach_enrichment_service import enrich_scored_list
+
+    scored_list = cache.get(cache_key)
+    if not scored_list or not isinstance(scored_list[0], dict):
+        return {"updated": 0}
+
+    try:
+        enriched, updates = enrich_scored_list(scored_list, top_n)
+    except Exception as e:
+        logger.warning(f"Breach enrichment failed for history={history_id}: {e}")
+        return {"updated": 0}
+
+    cache.set(cache_key, enriched, timeout=60 * 60 * 24)
+
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f"gen_user_{user_id}",
+        {
+            "type": "generation_breach_update",
+            "id": history_id,
+            "updates": updates,
+        },
+    )
+    return {"updated": len(updates)}
+
+
+@shared_task(ignore_result=True)
+def render_report_task(history_id):
+    """Render and store a generation's PDF report (services.report_service)."""
+    from .services.report_service import render_report_artifact
+
+    render_report_artifact(history_id)
+
+
+@shared_task
+def generate_profile_task(batch_id, index, pii_data, max_size):
+    """One profile of a batch generation (services.batch_generation_service)."""
+    from .services.batch_generation_service import generate_profile
+
+    return generate_profile(batch_id, index, pii_data, max_size)
+
+
+@shared_task
+def finish_generation_batch_task(results, batch_id):
+    """Chord callback of a batch generation: aggregate the profile results."""
+    from .services.batch_generation_service import finish_batch
+
+    return finish_batch(results, batch_id)
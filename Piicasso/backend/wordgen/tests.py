@@ -10,6 +10,7 @@ from django.contrib.auth.models import User
 from django.core.cache import cache
 from rest_framework.test import APIClient
 from rest_framework import status
+from unittest import skipUnless
 from unittest.mock import patch, MagicMock
 from generator.models import GenerationHistory
 
@@ -621,3 +622,1199 @@ class SecurityRegressionTest(TestCase):
         user.refresh_from_db()
         self.assertFalse(user.is_superuser)
         self.assertFalse(user.is_staff)
+
+
+class RankingEngineTest(TestCase):
+    """Markov ranking engine: training, lazy loading and heuristic fallback."""
+
+    CORPUS = [
+        "password", "password1", "password123", "iloveyou", "princess",
+        "sunshine", "summer2024", "monkey", "dragon", "football1",
+    ] * 5
+
+    def setUp(self):
+        import tempfile
+        from wordgen.services import ranking_service
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.model_path = f"{self.tmpdir}/model.json.gz"
+        ranking_service.MarkovModel.train(self.CORPUS, order=3).save(self.model_path)
+        ranking_service.reset_model_cache()
+        self.addCleanup(ranking_service.reset_model_cache)
+
+    def _settings(self, **overrides):
+        from django.conf import settings
+
+        return override_settings(
+            PIICASSO_SETTINGS={
+                **settings.PIICASSO_SETTINGS,
+                "RANKING_MODEL_PATH": self.model_path,
+                **overrides,
+            }
+        )
+
+    def test_markov_orders_by_probability(self):
+        from wordgen.llm_handler import score_wordlist
+
+        with self._settings(RANKING_ENGINE="markov"):
+            scored = score_wordlist(["xq9#Vz!k", "password12", "sunshine"], {})
+        passwords = [s["password"] for s in scored]
+        self.assertEqual(passwords[-1], "xq9#Vz!k")
+        self.assertGreater(scored[0]["score"], scored[-1]["score"])
+
+    def test_pii_overlap_raises_estimated_probability(self):
+        from wordgen.llm_handler import score_wordlist
+
+        with self._settings(RANKING_ENGINE="markov"):
+            generic = score_wordlist(["Rover1990"], {})[0]["score"]
+            targeted = score_wordlist(["Rover1990"], {"pet_names": ["Rover"]})[0]["score"]
+        self.assertGreater(targeted, generic)
+
+    def test_missing_model_falls_back_to_heuristic(self):
+        from wordgen.llm_handler import score_wordlist
+
+        with self._settings(RANKING_ENGINE="markov", RANKING_MODEL_PATH="/nonexistent.gz"):
+            scored = score_wordlist(["John1990!"], {"full_name": "John Smith"})
+        # Heuristic: 1 PII hit (30) + year (10) + "!" suffix (8) + leet PII (7) + special (5)
+        self.assertEqual(scored[0]["score"], 60)
+
+
+class GuessNumberBenchmarkTest(TestCase):
+    """Offline benchmark harness: guess numbers, hit rates and JSON report."""
+
+    def test_run_benchmark_reports_hit_rates(self):
+        from wordgen.services.benchmark_service import run_benchmark
+
+        cases = [
+            {"id": "a", "profile": {"pet_names": "Rover"}, "password": "Rover123"},
+            {"id": "b", "profile": {"pet_names": "Rover"}, "password": "not-generated"},
+            {
+                "id": "c",
+                "profile": {"full_name": "Jane Roe"},
+                "password": "canned1",
+                "llm_response": "canned1\ncanned2",
+            },
+        ]
+        report = run_benchmark(cases, ranks=(10, 10_000), trace_memory=False)
+
+        by_id = {c["id"]: c for c in report["per_case"]}
+        self.assertIsNotNone(by_id["a"]["guess_number"])
+        self.assertIsNone(by_id["b"]["guess_number"])
+        self.assertEqual(by_id["c"]["candidates"], 2)
+        self.assertEqual(report["hit_rate"]["10000"], round(2 / 3, 4))
+        self.assertEqual(report["guess_number"]["found"], 2)
+
+    def test_command_writes_json_report(self):
+        import os
+        import tempfile
+        from django.core.management import call_command
+        from io import StringIO
+
+        out_path = os.path.join(tempfile.mkdtemp(), "bench.json")
+        call_command("benchmark_wordlists", "--output", out_path, "--no-memory", stdout=StringIO())
+        with open(out_path) as f:
+            report = json.load(f)
+        self.assertEqual(set(report["hit_rate"]), {"10", "100", "1000", "10000"})
+        self.assertGreater(report["meta"]["cases"], 0)
+
+
+class CandidateMergeTest(TestCase):
+    """Streaming merge stage shared by the submit view, Celery task and fallback."""
+
+    def test_priority_merge_dedupes_in_order(self):
+        from wordgen.services.merge_service import merge_candidates
+
+        merged = list(merge_candidates([["a", " b ", "", "a"], ["b", "c"]]))
+        self.assertEqual(merged, ["a", "b", "c"])
+
+    def test_stops_pulling_sources_at_max_size(self):
+        from wordgen.services.merge_service import merge_candidates
+
+        pulled = []
+
+        def corpus():
+            for i in range(50_000):
+                pulled.append(i)
+                yield f"rock{i}"
+
+        merged = list(merge_candidates([["ai1", "ai2"], corpus()], max_size=5))
+        self.assertEqual(merged, ["ai1", "ai2", "rock0", "rock1", "rock2"])
+        self.assertEqual(len(pulled), 3)
+
+    def test_weighted_interleave(self):
+        from wordgen.services.merge_service import merge_candidates
+
+        merged = list(
+            merge_candidates([["a1", "a2", "a3", "a4"], ["r1", "r2"]], weights=[3, 1])
+        )
+        self.assertEqual(merged[:4], ["a1", "a2", "r1", "a3"])
+        self.assertEqual(sorted(merged), ["a1", "a2", "a3", "a4", "r1", "r2"])
+
+    def test_task_honours_max_wordlist_size_setting(self):
+        from operations.models import SystemSetting
+        from wordgen.tasks import generate_wordlist_task
+
+        SystemSetting.objects.create(key="max_wordlist_size", value="3")
+        lines = "\n".join(f"cand{i}" for i in range(10))
+        with patch("wordgen.tasks.call_gemini_api", return_value=lines):
+            result = generate_wordlist_task({}, "standard", None, "merge-size-key")
+        self.assertEqual(result["count"], 3)
+
+    def test_malformed_weights_do_not_break_startup(self):
+        from backend.settings import _parse_merge_weights
+
+        self.assertEqual(_parse_merge_weights("ai=3, rockyou=1"), {"ai": 3.0, "rockyou": 1.0})
+        with self.assertWarns(RuntimeWarning):
+            self.assertEqual(_parse_merge_weights("ai=3,rockyou=lots"), {})
+
+
+class SubmitStageTimingTest(TestCase):
+    """Per-stage spans of PiiSubmitView reach Prometheus and the audit log."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="spanuser", password="StrongPass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @staticmethod
+    def _stage_count(stage):
+        from prometheus_client import REGISTRY
+
+        return REGISTRY.get_sample_value(
+            "piicasso_pipeline_stage_seconds_count",
+            {"pipeline": "submit", "stage": stage},
+        ) or 0
+
+    @patch("wordgen.llm_handler.call_gemini_api", return_value="alpha1\nbeta2")
+    def test_stages_exported_and_logged(self, mock_gemini):
+        before = self._stage_count("llm")
+        with self.assertLogs("wordgen.security", level="INFO") as logs:
+            response = self.client.post(
+                "/api/submit/", {"full_name": "Span Tester"}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._stage_count("llm"), before + 1)
+
+        line = next(m for m in logs.output if "PII_SUBMIT" in m)
+        payload = json.loads(line.split("PII_SUBMIT: ", 1)[1])
+        for stage in ("validate", "cache", "llm", "merge", "scoring", "db", "metrics"):
+            self.assertIn(stage, payload["stages_ms"])
+
+
+class BusinessMetricsTest(TestCase):
+    """Custom Prometheus counters are incremented at the call site."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="metricsuser", password="StrongPass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @staticmethod
+    def _sample(name, **labels):
+        from prometheus_client import REGISTRY
+
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    @patch.dict("os.environ", {"GEMINI_API_KEY": ""})
+    def test_cache_and_llm_fallback_counters(self):
+        misses = self._sample("piicasso_cache_requests_total", namespace="wordgen", result="miss")
+        hits = self._sample("piicasso_cache_requests_total", namespace="wordgen", result="hit")
+        fallbacks = self._sample("piicasso_llm_calls_total", outcome="fallback")
+
+        for _ in range(2):
+            response = self.client.post(
+                "/api/submit/", {"full_name": "Metric Person"}, format="json"
+            )
+            self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(
+            self._sample("piicasso_cache_requests_total", namespace="wordgen", result="miss"),
+            misses + 1,
+        )
+        self.assertEqual(
+            self._sample("piicasso_cache_requests_total", namespace="wordgen", result="hit"),
+            hits + 1,
+        )
+        self.assertEqual(self._sample("piicasso_llm_calls_total", outcome="fallback"), fallbacks + 1)
+        self.assertEqual(self._sample("piicasso_sync_generations_in_flight"), 0)
+
+    def test_throttle_rejections_counted_per_view(self):
+        from rest_framework.exceptions import Throttled
+        from backend.exception_handler import enterprise_exception_handler
+        from wordgen.views.generation import PiiSubmitView
+
+        before = self._sample("piicasso_throttle_rejections_total", endpoint="PiiSubmitView")
+        response = enterprise_exception_handler(
+            Throttled(wait=30), {"view": PiiSubmitView(), "request": None}
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(
+            self._sample("piicasso_throttle_rejections_total", endpoint="PiiSubmitView"),
+            before + 1,
+        )
+
+
+class BreachEnrichmentTest(TestCase):
+    """Optional breach-count stage after score_wordlist."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="breachuser", password="StrongPass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_breached_candidates_move_up_without_double_boost(self):
+        from wordgen.services.breach_enrichment_service import enrich_scored_list
+
+        scored = [
+            {"password": "a", "score": 60},
+            {"password": "b", "score": 50},
+            {"password": "c", "score": 40},
+        ]
+        with patch(
+            "password_security.hibp.breach_counts",
+            return_value={"a": 0, "b": 100_000, "c": -1},
+        ):
+            enriched, updates = enrich_scored_list(scored, top_n=3)
+        self.assertEqual([e["password"] for e in enriched], ["b", "a", "c"])
+        self.assertEqual(enriched[0], {"password": "b", "score": 70, "breach_count": 100_000})
+        self.assertNotIn("breach_count", enriched[2])
+        self.assertEqual(len(updates), 2)
+
+        with patch("password_security.hibp.breach_counts", return_value={}) as mock_counts:
+            again, updates = enrich_scored_list(enriched, top_n=3)
+        self.assertEqual(again, enriched)
+        self.assertEqual(updates, [])
+        mock_counts.assert_called_once_with(["c"])
+
+    @patch("password_security.hibp.breach_counts", side_effect=lambda pws: {p: 5 for p in pws})
+    @patch("wordgen.llm_handler.call_gemini_api", return_value="alpha1\nbeta2")
+    def test_submit_streams_enriched_scores(self, mock_gemini, mock_counts):
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from django.conf import settings
+
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(f"gen_user_{self.user.id}", channel)
+
+        overrides = {**settings.PIICASSO_SETTINGS, "BREACH_ENRICHMENT_TOP_N": 2}
+        with override_settings(PIICASSO_SETTINGS=overrides):
+            response = self.client.post(
+                "/api/submit/", {"full_name": "Breach Probe"}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["breach_enrichment"], "pending")
+
+        event = async_to_sync(layer.receive)(channel)
+        self.assertEqual(event["type"], "generation_breach_update")
+        self.assertEqual(event["id"], response.data["id"])
+        self.assertEqual(len(event["updates"]), 2)
+        self.assertTrue(all(u["breach_count"] == 5 for u in event["updates"]))
+
+        # The enriched list replaced the cache entry: a repeat submit serves it.
+        with override_settings(PIICASSO_SETTINGS=overrides):
+            again = self.client.post(
+                "/api/submit/", {"full_name": "Breach Probe"}, format="json"
+            )
+        self.assertIn("breach_count", again.data["wordlist"][0])
+
+    def test_dispatch_without_broker_runs_on_a_thread(self):
+        import threading
+        from backend.tasks_util import dispatch
+
+        task = MagicMock()
+        ran = threading.Event()
+        task.side_effect = lambda *args: ran.set()
+        with override_settings(CELERY_BROKER_URL="disabled://"):
+            dispatch(task, 1, "key")
+        self.assertTrue(ran.wait(5))
+        task.assert_called_once_with(1, "key")
+        task.delay.assert_not_called()
+
+        with override_settings(CELERY_BROKER_URL="memory://"):
+            dispatch(task, 2)
+        task.delay.assert_called_once_with(2)
+
+
+class EncryptedFieldTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="cryptuser", password="StrongPass1!")
+        self.record = GenerationHistory.objects.create(
+            user=self.user, pii_data={"full_name": "Jane Doe"}, wordlist=["pass1"]
+        )
+
+    def test_value_is_decrypted_only_when_read(self):
+        from generator.fields import decrypt_value
+
+        with patch("generator.fields.decrypt_value", wraps=decrypt_value) as decrypt:
+            record = GenerationHistory.objects.get(pk=self.record.pk)
+            self.assertEqual(decrypt.call_count, 0)
+            self.assertEqual(record.pii_data["full_name"], "Jane Doe")
+            self.assertIsInstance(record.pii_data, dict)
+            self.assertEqual(decrypt.call_count, 1)
+
+    def test_saving_an_unread_row_keeps_its_ciphertext(self):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pii_data FROM generator_generationhistory WHERE id = %s", [self.record.pk])
+            stored = cursor.fetchone()[0]
+
+        record = GenerationHistory.objects.get(pk=self.record.pk)
+        with patch("generator.fields.decrypt_value") as decrypt:
+            record.wordlist = ["pass1", "pass2"]
+            record.save()
+            decrypt.assert_not_called()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pii_data FROM generator_generationhistory WHERE id = %s", [self.record.pk])
+            self.assertEqual(cursor.fetchone()[0], stored)
+        self.assertNotIn("Jane", stored)
+
+    def test_values_queries_get_a_lazy_proxy(self):
+        row = GenerationHistory.objects.filter(pk=self.record.pk).values("pii_data").get()
+        self.assertEqual(row["pii_data"], {"full_name": "Jane Doe"})
+        self.assertEqual(row["pii_data"].get("full_name"), "Jane Doe")
+
+    def test_cipher_is_built_once_per_key(self):
+        from generator.fields import _get_fernet
+
+        self.assertIs(_get_fernet(), _get_fernet())
+
+    def test_key_list_decrypts_rows_written_with_an_old_key(self):
+        from cryptography.fernet import Fernet, MultiFernet
+        from django.conf import settings
+        from generator.fields import _get_fernet
+
+        old_key = settings.FIELD_ENCRYPTION_KEY
+        new_key = Fernet.generate_key().decode()
+        with self.settings(FIELD_ENCRYPTION_KEY=[new_key, old_key]):
+            self.assertIsInstance(_get_fernet(), MultiFernet)
+            record = GenerationHistory.objects.get(pk=self.record.pk)
+            self.assertEqual(record.pii_data, {"full_name": "Jane Doe"})
+            fresh = GenerationHistory.objects.create(
+                user=self.user, pii_data={"full_name": "New"}, wordlist=[]
+            )
+        with self.settings(FIELD_ENCRYPTION_KEY=new_key):
+            self.assertEqual(GenerationHistory.objects.get(pk=fresh.pk).pii_data, {"full_name": "New"})
+
+
+class PiiFieldsMaskTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="maskuser", password="StrongPass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.employer = GenerationHistory.objects.create(
+            user=self.user,
+            pii_data={"full_name": "Jane", "employer_name": "Acme", "pet_names": "", "pattern_mode": "deep"},
+            wordlist=["pass1"],
+        )
+        self.plain = GenerationHistory.objects.create(
+            user=self.user, pii_data={"full_name": "Jane"}, wordlist=["pass2"]
+        )
+
+    def test_mask_is_computed_on_save(self):
+        self.assertEqual(self.employer.pii_fields_mask, ",employer_name,full_name,")
+        self.employer.pii_data = {"hometown": "Springfield"}
+        self.employer.save()
+        self.employer.refresh_from_db()
+        self.assertEqual(self.employer.pii_fields_mask, ",hometown,")
+
+    def test_history_summary_needs_no_decryption(self):
+        with patch("generator.fields.decrypt_value") as decrypt:
+            response = self.client.get("/api/history/")
+            decrypt.assert_not_called()
+        summaries = {r["id"]: r["pii_summary"] for r in response.data["results"]}
+        self.assertEqual(summaries[self.employer.id], {"employer_name": "***", "full_name": "***"})
+
+    def test_history_filters_by_field(self):
+        response = self.client.get("/api/history/", {"pii_field": "employer_name"})
+        self.assertEqual([r["id"] for r in response.data["results"]], [self.employer.id])
+        self.assertEqual(response.data["total"], 1)
+
+    def test_csv_export_uses_the_mask(self):
+        with patch("generator.fields.decrypt_value") as decrypt:
+            response = self.client.get("/api/export/csv/", {"pii_field": "employer_name"})
+            body = b"".join(response.streaming_content).decode()
+            decrypt.assert_not_called()
+        self.assertIn("employer_name", body)
+        self.assertEqual(body.count("\n"), 2)
+
+    def test_bulk_created_analyses_get_a_mask(self):
+        from password_security.models import PasswordAnalysis
+
+        PasswordAnalysis.objects.bulk_create([
+            PasswordAnalysis(user=self.user, pii_data={"dob": "1990"}, password_hash="x", vulnerability_level="low")
+        ])
+        response = self.client.get("/api/password/history/", {"pii_field": "dob"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["analyses"][0]["pii_fields"], ["dob"])
+
+
+class BlindIndexTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="indexuser", password="StrongPass1!")
+        self.record = GenerationHistory.objects.create(
+            user=self.user,
+            pii_data={
+                "full_name": "  Jane   DOE ",
+                "email": "Jane.Doe@Example.com",
+                "social_handles": "@janed, jd_photos",
+                "hometown": "Springfield",
+            },
+            wordlist=["pass1"],
+        )
+
+    def test_profile_values_are_indexed_by_keyed_hash(self):
+        from generator.models import PiiBlindIndex
+
+        rows = PiiBlindIndex.objects.filter(history=self.record)
+        self.assertEqual(sorted(r.kind for r in rows), ["email", "name", "username", "username"])
+        stored = " ".join(r.digest for r in rows)
+        self.assertNotIn("jane", stored.lower())
+
+    def test_exact_matches_after_normalization(self):
+        from generator.blind_index import match_count
+
+        self.assertEqual(match_count("jane.doe@example.com", self.user), 1)
+        self.assertEqual(match_count("jane doe", self.user), 1)
+        self.assertEqual(match_count("JD_PHOTOS", self.user), 1)
+        self.assertEqual(match_count("Springfield", self.user), 0)
+        self.assertEqual(match_count("jane", self.user), 0)
+
+    def test_matches_are_scoped_to_the_owner(self):
+        from generator.blind_index import match_count
+
+        other = User.objects.create_user(username="outsider", password="StrongPass1!")
+        admin = User.objects.create_superuser(username="root", password="StrongPass1!")
+        self.assertEqual(match_count("jane doe", other), 0)
+        self.assertEqual(match_count("jane doe", admin), 1)
+
+    def test_index_follows_profile_changes(self):
+        from generator.blind_index import match_count
+
+        record = GenerationHistory.objects.get(pk=self.record.pk)
+        record.wordlist = ["other"]
+        record.save()
+        self.assertEqual(match_count("jane doe", self.user), 1)
+
+        record.pii_data = {"full_name": "John Roe"}
+        record.save()
+        self.assertEqual(match_count("jane doe", self.user), 0)
+        self.assertEqual(match_count("john roe", self.user), 1)
+
+        record.delete()
+        self.assertEqual(match_count("john roe", self.user), 0)
+
+    def test_rebuild_command_reindexes_everything(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from generator.blind_index import match_count
+        from generator.models import PiiBlindIndex
+
+        PiiBlindIndex.objects.all().delete()
+        call_command("rebuild_blind_index", stdout=StringIO())
+        self.assertEqual(match_count("jane.doe@example.com", self.user), 1)
+
+
+class KeyRotationTest(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from cryptography.fernet import Fernet
+        from django.conf import settings
+
+        self.user = User.objects.create_user(username="rotateuser", password="StrongPass1!")
+        self.old_key = settings.FIELD_ENCRYPTION_KEY
+        self.new_key = Fernet.generate_key().decode()
+        self.records = [
+            GenerationHistory.objects.create(
+                user=self.user, pii_data={"full_name": f"Person {i}"}, wordlist=["x"]
+            )
+            for i in range(7)
+        ]
+        self.checkpoint = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.checkpoint, True)
+
+    def _rotate(self, **kwargs):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        with self.settings(FIELD_ENCRYPTION_KEY=[self.new_key, self.old_key]):
+            call_command(
+                "rotate_encryption_key", "--workers", "1", "--batch-size", "3",
+                "--checkpoint", self.checkpoint, stdout=out, **kwargs
+            )
+        return out.getvalue()
+
+    def test_rows_are_readable_with_only_the_new_key(self):
+        from password_security.models import PasswordAnalysis
+
+        PasswordAnalysis.objects.create(
+            user=self.user, pii_data={"dob": "1990"}, password_hash="x", vulnerability_level="low"
+        )
+        output = self._rotate()
+        self.assertIn("generator.generationhistory.pii_data: 7 rows", output)
+        self.assertIn("password_security.passwordanalysis.pii_data: 1 rows", output)
+
+        with self.settings(FIELD_ENCRYPTION_KEY=self.new_key):
+            names = sorted(h.pii_data["full_name"] for h in GenerationHistory.objects.all())
+            self.assertEqual(names, [f"Person {i}" for i in range(7)])
+            self.assertEqual(PasswordAnalysis.objects.get().pii_data, {"dob": "1990"})
+
+    def test_interrupted_rotation_resumes_from_checkpoint(self):
+        from generator import key_rotation
+
+        real_flush_count = {"n": 0}
+        real_write_batch = key_rotation._write_batch
+
+        def failing_write_batch(model, field_name, batch):
+            if model is GenerationHistory:
+                real_flush_count["n"] += 1
+                if real_flush_count["n"] == 2:
+                    raise RuntimeError("connection lost")
+            return real_write_batch(model, field_name, batch)
+
+        with patch("generator.key_rotation._write_batch", side_effect=failing_write_batch):
+            with self.assertRaises(RuntimeError):
+                self._rotate()
+
+        output = self._rotate()
+        self.assertIn("Resumed from checkpoint.", output)
+        self.assertIn("generator.generationhistory.pii_data: 4 rows", output)
+        with self.settings(FIELD_ENCRYPTION_KEY=self.new_key):
+            self.assertEqual(len([h.pii_data for h in GenerationHistory.objects.all()]), 7)
+
+        # A finished plan is not redone.
+        self.assertIn("Re-encrypted 0 values", self._rotate())
+
+    def test_rows_saved_during_rotation_are_not_overwritten(self):
+        from generator import key_rotation
+
+        real_write_batch = key_rotation._write_batch
+        record = self.records[0]
+
+        def write_batch_after_a_save(model, field_name, batch):
+            if model is GenerationHistory and any(pk == record.pk for pk, _, _ in batch):
+                GenerationHistory.objects.filter(pk=record.pk).update(
+                    pii_data={"full_name": "Renamed"}
+                )
+            return real_write_batch(model, field_name, batch)
+
+        with self.settings(FIELD_ENCRYPTION_KEY=[self.new_key, self.old_key]), \
+                patch("generator.key_rotation._write_batch", side_effect=write_batch_after_a_save):
+            output = self._rotate()
+            self.assertIn("generator.generationhistory.pii_data: 6 rows", output)
+
+        with self.settings(FIELD_ENCRYPTION_KEY=self.new_key):
+            self.assertEqual(GenerationHistory.objects.get(pk=record.pk).pii_data, {"full_name": "Renamed"})
+
+    def test_a_batch_is_written_in_one_update(self):
+        from generator.key_rotation import _write_batch
+
+        rows = GenerationHistory.objects.order_by("pk").values_list("pk", "pii_data")
+        batch = [(pk, value.ciphertext, f"token-{pk}") for pk, value in rows]
+        stale = batch[0][0]
+        batch[0] = (stale, "not-the-stored-token", "token-stale")
+
+        # Savepoint, SELECT ... FOR UPDATE, one UPDATE, release.
+        with self.assertNumQueries(4):
+            self.assertEqual(_write_batch(GenerationHistory, "pii_data", batch), 6)
+        stored = dict(GenerationHistory.objects.values_list("pk", "pii_data"))
+        self.assertNotEqual(stored[stale].ciphertext, "token-stale")
+        self.assertEqual(stored[batch[1][0]].ciphertext, f"token-{batch[1][0]}")
+
+    def test_ranges_split_the_primary_key_span(self):
+        from generator.key_rotation import plan_ranges
+
+        ranges = [r for r in plan_ranges(3) if r["column"] == "generator.generationhistory.pii_data"]
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[0]["lo"], self.records[0].pk)
+        self.assertEqual(ranges[-1]["hi"], self.records[-1].pk)
+
+    def test_requires_a_key_list(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            call_command("rotate_encryption_key", "--checkpoint", self.checkpoint)
+
+
+class HistoryExportStreamingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="exportuser", password="StrongPass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _export(self):
+        response = self.client.get("/api/export/csv/")
+        self.assertEqual(response.status_code, 200)
+        return list(response.streaming_content)
+
+    def test_sample_is_sliced_by_the_database(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        GenerationHistory.objects.create(
+            user=self.user, pii_data={"full_name": "Jane"}, wordlist=[f"pw{i}" for i in range(8)]
+        )
+        GenerationHistory.objects.create(user=self.user, pii_data={}, wordlist=["=cmd", "b"])
+
+        with CaptureQueriesContext(connection) as queries:
+            body = b"".join(self._export()).decode()
+
+        select = [q["sql"] for q in queries.captured_queries if "generationhistory" in q["sql"]][0]
+        columns = select.split(" FROM ")[0].split("(CASE")[0]
+        self.assertNotIn('"pii_data"', select)
+        self.assertNotIn('"wordlist"', columns)
+        self.assertIn("pw0, pw1, pw2, pw3, pw4...", body)
+        self.assertIn(",8,", body)
+        self.assertIn("'=cmd, b", body)
+
+    def test_rows_are_flushed_in_batches(self):
+        GenerationHistory.objects.bulk_create([
+            GenerationHistory(user=self.user, pii_data={}, wordlist=["x"], wordlist_count=1)
+            for _ in range(5)
+        ])
+        with patch("wordgen.views.generation.EXPORT_FLUSH_ROWS", 2):
+            chunks = self._export()
+        # Header, then rows 2 + 2 + 1.
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(b"".join(chunks).decode().count("\n"), 6)
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class DatasetExportTest(TestCase):
+    def setUp(self):
+        from datetime import datetime, timezone as dt_timezone
+
+        cache.clear()
+        self.user = User.objects.create_user(username="datasetuser", password="StrongPass1!")
+        self.other = User.objects.create_user(username="otheruser", password="StrongPass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        old = GenerationHistory.objects.create(
+            user=self.user, pii_data={"full_name": "Jane Roe"}, wordlist=[f"pw{i}" for i in range(8)]
+        )
+        GenerationHistory.objects.filter(pk=old.pk).update(
+            timestamp=datetime(2026, 1, 10, tzinfo=dt_timezone.utc)
+        )
+        self.recent = GenerationHistory.objects.create(
+            user=self.user, pii_data={"email": "jane@corp.com"}, wordlist=["a", "b"]
+        )
+        GenerationHistory.objects.create(user=self.other, pii_data={"full_name": "Other"}, wordlist=["z"])
+
+    def _ndjson(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    def test_ndjson_history_is_scoped_and_carries_no_pii(self):
+        rows = self._ndjson("/api/export/history/ndjson/", {"user_id": self.other.id})
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({r["user_id"] for r in rows}, {self.user.id})
+        self.assertEqual(rows[0]["sample_passwords"], ["pw0", "pw1", "pw2", "pw3", "pw4"])
+        self.assertEqual(rows[0]["wordlist_count"], 8)
+        self.assertEqual(rows[0]["pii_fields"], ["full_name"])
+        self.assertNotIn("Jane", json.dumps(rows))
+
+    def test_since_until_bound_the_timestamp(self):
+        rows = self._ndjson("/api/export/history/ndjson/", {"since": "2026-01-01", "until": "2026-02-01"})
+        self.assertEqual(len(rows), 1)
+        rows = self._ndjson("/api/export/history/ndjson/", {"since": "2026-02-01"})
+        self.assertEqual([r["id"] for r in rows], [self.recent.id])
+        response = self.client.get("/api/export/history/ndjson/", {"since": "last week"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_superuser_can_export_any_user(self):
+        admin = User.objects.create_superuser("datasetadmin", "admin@corp.com", "StrongPass1!")
+        self.client.force_authenticate(user=admin)
+        self.assertEqual(len(self._ndjson("/api/export/history/ndjson/")), 3)
+        rows = self._ndjson("/api/export/history/ndjson/", {"user_id": self.other.id})
+        self.assertEqual([r["user_id"] for r in rows], [self.other.id])
+
+    def test_unknown_dataset_or_format_is_404(self):
+        self.assertEqual(self.client.get("/api/export/users/ndjson/").status_code, 404)
+        self.assertEqual(self.client.get("/api/export/history/xlsx/").status_code, 404)
+
+    def test_parquet_unavailable_without_pyarrow(self):
+        with patch("wordgen.services.export_service.parquet_available", return_value=False):
+            response = self.client.get("/api/export/history/parquet/")
+        self.assertEqual(response.status_code, 501)
+
+    def test_analyses_and_activity_export(self):
+        from analytics.models import UserActivity
+        from password_security.models import PasswordAnalysis
+
+        PasswordAnalysis.objects.create(
+            user=self.user, pii_data={"full_name": "Jane Roe"}, strength_score=40,
+            vulnerability_level="MEDIUM", vulnerabilities_found=["short"],
+        )
+        UserActivity.objects.create(user=self.user, activity_type="LOGIN", description="Signed in")
+        analyses = self._ndjson("/api/export/analyses/ndjson/")
+        self.assertEqual(analyses[0]["pii_fields"], ["full_name"])
+        self.assertEqual(analyses[0]["vulnerabilities_found"], ["short"])
+        self.assertNotIn("pii_data", analyses[0])
+        activity = self._ndjson("/api/export/activity/ndjson/")
+        self.assertEqual(activity[0]["activity_type"], "LOGIN")
+
+    @skipUnless(_has_pyarrow(), "pyarrow is not installed")
+    def test_parquet_streams_one_row_group_per_batch(self):
+        import io
+        import pyarrow.parquet as pq
+
+        with patch("wordgen.services.export_service.ROW_GROUP_SIZE", 1):
+            response = self.client.get("/api/export/history/parquet/")
+            body = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        parquet = pq.ParquetFile(io.BytesIO(body))
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        table = parquet.read()
+        self.assertEqual(table.column("wordlist_count").to_pylist(), [8, 2])
+        self.assertEqual(table.column("pii_fields").to_pylist(), [["full_name"], ["email"]])
+
+    @skipUnless(_has_pyarrow(), "pyarrow is not installed")
+    def test_management_command_writes_parquet(self):
+        import os
+        import tempfile
+        from io import StringIO
+        import pyarrow.parquet as pq
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "history.parquet")
+            call_command("export_dataset", "history", "--output", path, "--user", str(self.other.id),
+                         stdout=StringIO())
+            table = pq.read_table(path)
+            self.assertFalse(os.path.exists(path + ".part"))
+        self.assertEqual(table.column("user_id").to_pylist(), [self.other.id])
+
+
+class ReportArtifactTest(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.conf import settings
+
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        storages = dict(settings.STORAGES)
+        storages["reports"] = {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": self.root},
+        }
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username="reportuser", password="StrongPass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.history = GenerationHistory.objects.create(
+            user=self.user, pii_data={"full_name": "Jane Roe"}, wordlist=["pw1", "pw2"]
+        )
+        self.url = f"/api/report/pdf/{self.history.id}/"
+
+    def _stored_files(self):
+        import os
+        return [os.path.join(d, f) for d, _, files in os.walk(self.root) for f in files]
+
+    def test_report_is_rendered_once_and_served_from_storage(self):
+        from wordgen.services import report_service
+
+        with patch.object(report_service, "render_pdf", wraps=report_service.render_pdf) as render:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Type"], "application/pdf")
+        body = b"".join(second.streaming_content)
+        self.assertTrue(body.startswith(b"%PDF"))
+        self.assertEqual(render.call_count, 1)
+
+        files = self._stored_files()
+        self.assertEqual(len(files), 1)
+        with open(files[0], "rb") as f:
+            stored = f.read()
+        self.assertNotIn(b"%PDF", stored)
+        self.assertNotIn(b"Jane Roe", stored)
+
+    def test_first_download_is_accepted_until_rendered(self):
+        from generator.models import ReportArtifact
+        from wordgen.services import report_service
+
+        with patch.object(report_service, "schedule_report_render") as schedule:
+            response = self.client.get(self.url)
+            again = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response["Retry-After"], str(report_service.POLL_AFTER_SECONDS))
+        self.assertEqual(again.status_code, 202)
+        schedule.assert_called_once_with(self.history.id)
+
+        report_service.render_report_artifact(self.history.id)
+        self.assertEqual(ReportArtifact.objects.get(history=self.history).status, "READY")
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_failed_render_is_reported_then_retried(self):
+        from wordgen.services import report_service
+
+        with patch.object(report_service, "render_pdf", side_effect=RuntimeError("boom")):
+            self.assertEqual(self.client.get(self.url).status_code, 500)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_missing_or_outdated_artifact_is_rendered_again(self):
+        import os
+        from generator.models import ReportArtifact
+        from wordgen.services import report_service
+
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        os.remove(self._stored_files()[0])
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        current = report_service.REPORT_VERSION
+        with patch.object(report_service, "REPORT_VERSION", current + 1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(
+            sorted(ReportArtifact.objects.filter(history=self.history).values_list("version", flat=True)),
+            [current, current + 1],
+        )
+
+    def test_token_download_polls_the_same_link(self):
+        from wordgen.services import report_service
+
+        token = self.client.post(
+            "/api/download-token/", {"file_type": "report", "record_id": self.history.id}, format="json"
+        ).data["download_token"]
+        url = f"/api/file/report/{self.history.id}/?token={token}"
+        with patch.object(report_service, "schedule_report_render"):
+            self.assertEqual(self.client.get(url).status_code, 202)
+        report_service.render_report_artifact(self.history.id)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_file_is_deleted_with_its_last_artifact(self):
+        from generator.models import ReportArtifact
+
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        artifact = ReportArtifact.objects.get(history=self.history)
+        other = GenerationHistory.objects.create(user=self.user, pii_data={}, wordlist=["x"])
+        ReportArtifact.objects.create(
+            history=other, version=artifact.version, status="READY", sha256=artifact.sha256
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.history.delete()
+        self.assertEqual(len(self._stored_files()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self._stored_files(), [])
+
+    def test_discard_deletes_the_file(self):
+        from generator.models import ReportArtifact
+        from wordgen.services.report_service import discard
+
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            discard(ReportArtifact.objects.get(history=self.history))
+        self.assertEqual(self._stored_files(), [])
+
+
+class ReportTemplateTest(TestCase):
+    def _history(self, size):
+        from wordgen.management.commands.benchmark_reports import synthetic_history
+        return synthetic_history(size)
+
+    def test_wordlist_is_split_into_long_table_chunks(self):
+        from reportlab.platypus import LongTable
+        from wordgen.report_generator import wordlist_tables
+
+        tables = list(wordlist_tables([f"w{i}" for i in range(10)], columns=3, chunk_rows=2))
+        self.assertEqual(len(tables), 2)
+        self.assertTrue(all(isinstance(t, LongTable) for t in tables))
+        self.assertEqual(tables[1]._cellvalues, [["w6", "w7", "w8"], ["w9", "", ""]])
+
+    def test_preview_and_full_reports(self):
+        from io import BytesIO
+        from reportlab.platypus import LongTable
+        from wordgen.report_generator import WORDLIST_CHUNK_ROWS, generate_report_pdf, report_flowables
+
+        history = self._history(3 * WORDLIST_CHUNK_ROWS + 1)
+        preview = report_flowables(history)
+        self.assertEqual(sum(isinstance(f, LongTable) for f in preview), 1)
+        self.assertIn("ADDITIONAL ENTRIES OMITTED", preview[-3].text)
+        full = report_flowables(history, wordlist_limit=None)
+        self.assertEqual(sum(isinstance(f, LongTable) for f in full), 2)
+
+        buffer = BytesIO()
+        generate_report_pdf(history, buffer, wordlist_limit=None)
+        self.assertTrue(buffer.getvalue().startswith(b"%PDF"))
+
+    def test_styles_are_shared_between_reports(self):
+        from wordgen.report_generator import report_flowables
+
+        first, second = report_flowables(self._history(1)), report_flowables(self._history(1))
+        self.assertIs(first[0].style, second[0].style)
+
+    def test_text_wordlist_is_split_into_lines(self):
+        from wordgen.report_generator import report_flowables
+
+        history = self._history(0)
+        history.wordlist = "alpha\nbeta"
+        texts = [getattr(f, "text", "") for f in report_flowables(history)]
+        self.assertIn("Total Variants Generated: 2", texts)
+
+    def test_benchmark_command_writes_json(self):
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out_path = os.path.join(tmp, "reports.json")
+            call_command("benchmark_reports", "--sizes", "10,100", "--repeat", "1", "--no-memory",
+                         "--output", out_path, stdout=StringIO())
+            with open(out_path) as f:
+                report = json.load(f)
+        self.assertEqual(set(report["sizes"]), {"10", "100"})
+        self.assertGreater(report["sizes"]["100"]["pdf_bytes"], 0)
+
+
+class BatchReportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="dossieruser", password="StrongPass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.histories = [
+            GenerationHistory.objects.create(
+                user=self.user, pii_data={"full_name": f"Target {i}"}, wordlist=[f"pw{i}"]
+            )
+            for i in range(3)
+        ]
+        self.ids = [h.id for h in self.histories]
+
+    def _post(self, **data):
+        return self.client.post("/api/report/batch/", data, format="json")
+
+    def test_zip_holds_one_report_per_generation(self):
+        import io
+        import zipfile
+
+        response = self._post(history_ids=self.ids, format="zip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        chunks = list(response.streaming_content)
+        self.assertGreaterEqual(len(chunks), len(self.ids))
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        self.assertEqual(
+            sorted(archive.namelist()), sorted(f"PIICASSO_REP-{i:04d}.pdf" for i in self.ids)
+        )
+        self.assertTrue(all(archive.read(n).startswith(b"%PDF") for n in archive.namelist()))
+
+    def test_process_pool_renders_every_report(self):
+        from wordgen.services.dossier_service import collect_snapshots, render_reports
+
+        snapshots = collect_snapshots(self.user, self.ids)
+        rendered = list(render_reports(snapshots, workers=2))
+        self.assertEqual(sorted(s["id"] for s, _ in rendered), sorted(self.ids))
+        self.assertTrue(all(pdf.startswith(b"%PDF") for _, pdf in rendered))
+
+    def test_render_pool_is_capped_per_request(self):
+        from django.conf import settings
+        from wordgen.services import dossier_service
+
+        with patch("wordgen.services.dossier_service.os.cpu_count", return_value=64):
+            self.assertEqual(dossier_service._worker_count(100), dossier_service.DEFAULT_WORKERS)
+            self.assertEqual(dossier_service._worker_count(1), 1)
+            with self.settings(PIICASSO_SETTINGS={**settings.PIICASSO_SETTINGS, "BATCH_REPORT_WORKERS": 32}):
+                self.assertEqual(dossier_service._worker_count(100), dossier_service.MAX_WORKERS)
+
+    def test_stored_reports_are_not_rendered_again(self):
+        import shutil
+        import tempfile
+        from django.conf import settings
+        from wordgen.services import dossier_service, report_service
+
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        storages = dict(settings.STORAGES)
+        storages["reports"] = {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": root},
+        }
+        with override_settings(STORAGES=storages):
+            report_service.render_report_artifact(self.ids[0])
+            snapshots = dossier_service.collect_snapshots(self.user, self.ids)
+            with patch.object(dossier_service, "render_report_bytes",
+                              wraps=dossier_service.render_report_bytes) as render:
+                rendered = list(dossier_service.render_reports(snapshots, workers=1))
+        self.assertEqual(rendered[0][0]["id"], self.ids[0])
+        self.assertEqual(render.call_count, 2)
+
+    def test_merged_pdf_has_a_table_of_contents(self):
+        response = self._post(history_ids=self.ids, format="pdf")
+        self.assertEqual(response.status_code, 200)
+        body = b"".join(response.streaming_content)
+        self.assertTrue(body.startswith(b"%PDF"))
+        self.assertEqual(body.count(b"%%EOF"), 1)
+        from wordgen.services.dossier_service import collect_snapshots, toc_label
+        self.assertEqual(toc_label(collect_snapshots(self.user, self.ids[:1])[0]),
+                         f"REP-{self.ids[0]:04d}  Target 0")
+
+    def test_markup_in_target_names_is_escaped(self):
+        from wordgen.services.dossier_service import collect_snapshots, toc_label
+
+        self.histories[0].pii_data = {"full_name": "<b>Tom & <font size=40>Jerry"}
+        self.histories[0].save()
+        self.assertEqual(toc_label(collect_snapshots(self.user, self.ids[:1])[0]),
+                         f"REP-{self.ids[0]:04d}  &lt;b&gt;Tom &amp; &lt;font size=40&gt;Jerry")
+        response = self._post(history_ids=self.ids, format="pdf")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).rstrip().endswith(b"%%EOF"))
+
+    def test_other_users_generations_are_rejected(self):
+        other = User.objects.create_user(username="dossierother", password="StrongPass1!")
+        foreign = GenerationHistory.objects.create(user=other, pii_data={}, wordlist=["x"])
+        response = self._post(history_ids=[self.ids[0], foreign.id])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(foreign.id), response.data["error"])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self._post(history_ids=[]).status_code, 400)
+        self.assertEqual(self._post(history_ids=self.ids, format="tar").status_code, 400)
+        self.assertEqual(self._post(history_ids=["abc"]).status_code, 400)
+        # intelligence is not an installed app here
+        response = self._post(target_ids=["3f2b6c1e-4a5d-4e8f-9a0b-1c2d3e4f5a6b"])
+        self.assertEqual(response.status_code, 400)
+        with override_settings(PIICASSO_SETTINGS={"BATCH_REPORT_MAX": 2}):
+            self.assertEqual(self._post(history_ids=self.ids).status_code, 400)
+
+    def test_merged_pdf_takes_fewer_reports_than_zip(self):
+        from django.conf import settings
+
+        with override_settings(PIICASSO_SETTINGS={**settings.PIICASSO_SETTINGS, "BATCH_REPORT_MERGED_MAX": 2}):
+            response = self._post(history_ids=self.ids, format="pdf")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("format=zip", response.data["error"])
+            self.assertEqual(self._post(history_ids=self.ids).status_code, 200)
+
+    def test_uuid_targets_get_a_short_report_ref(self):
+        import uuid
+        from wordgen.report_generator import report_ref
+
+        self.assertEqual(report_ref(42), "REP-0042")
+        self.assertEqual(report_ref(uuid.UUID("3f2b6c1e-4a5d-4e8f-9a0b-1c2d3e4f5a6b")), "REP-3F2B6C1E")
+
+
+class BatchGenerationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="batchgenuser", password="StrongPass1!")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _csv(self, text):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return SimpleUploadedFile("staff.csv", text.encode(), content_type="text/csv")
+
+    @patch("wordgen.llm_handler.call_gemini_api", return_value="alpha1\nbeta2")
+    def test_csv_profiles_fan_out_and_aggregate(self, _mock):
+        from generator.models import GenerationBatch
+
+        csv_file = self._csv(
+            "Full_Name,Email,Pet_Names\nJane Roe,jane@corp.com,Rover\n,,\nJohn Doe,john@corp.com,\n"
+        )
+        response = self.client.post("/api/submit/batch/", {"file": csv_file}, format="multipart")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["total"], 2)
+        batch = GenerationBatch.objects.get(pk=response.data["batch_id"])
+        self.assertEqual((batch.status, batch.completed, batch.failed), ("COMPLETED", 2, 0))
+        self.assertEqual([r["index"] for r in batch.results], [0, 1])
+        histories = GenerationHistory.objects.filter(pk__in=[r["history_id"] for r in batch.results])
+        self.assertEqual(
+            sorted(h.pii_data["full_name"] for h in histories), ["Jane Roe", "John Doe"]
+        )
+        self.assertTrue(all("alpha1" in h.wordlist for h in histories))
+
+        detail = self.client.get(f"/api/submit/batch/{batch.pk}/")
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.data["completed"], 2)
+
+    def test_progress_and_aggregate_reach_the_user_group(self):
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(f"gen_user_{self.user.id}", channel)
+
+        with patch("wordgen.llm_handler.call_gemini_api", side_effect=["alpha1", RuntimeError("down")]):
+            response = self.client.post(
+                "/api/submit/batch/",
+                {"profiles": [{"full_name": "Jane Roe"}, {"full_name": "John Doe"}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 202)
+
+        events = [async_to_sync(layer.receive)(channel) for _ in range(3)]
+        self.assertEqual(
+            [e["type"] for e in events],
+            ["generation_batch_progress", "generation_batch_progress", "generation_batch_complete"],
+        )
+        self.assertEqual(events[1]["progress"], 100)
+        self.assertEqual((events[2]["completed"], events[2]["failed"]), (1, 1))
+        self.assertEqual(events[2]["status"], "COMPLETED")
+
+    def test_invalid_profiles_are_rejected_with_row_numbers(self):
+        from django.conf import settings
+        from generator.models import GenerationBatch
+
+        response = self.client.post(
+            "/api/submit/batch/",
+            {"profiles": [{"full_name": "Jane Roe"}, {"pattern_mode": "corporate"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data["rows"]), [2])
+        self.assertFalse(GenerationBatch.objects.exists())
+
+        response = self.client.post("/api/submit/batch/", {"profiles": "nope"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        with override_settings(PIICASSO_SETTINGS={**settings.PIICASSO_SETTINGS, "BATCH_GENERATION_MAX_PROFILES": 1}):
+            response = self.client.post(
+                "/api/submit/batch/",
+                {"profiles": [{"full_name": "A"}, {"full_name": "B"}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 400)
+
+    @patch("wordgen.llm_handler.call_gemini_api", return_value="a1\nb2\nc3\nd4\ne5")
+    def test_batch_honours_max_wordlist_size_setting(self, _mock):
+        from generator.models import GenerationBatch
+        from operations.models import SystemSetting
+
+        SystemSetting.objects.create(key="max_wordlist_size", value="2")
+        response = self.client.post(
+            "/api/submit/batch/", {"profiles": [{"full_name": "Jane Roe"}]}, format="json"
+        )
+        self.assertEqual(response.status_code, 202)
+        batch = GenerationBatch.objects.get(pk=response.data["batch_id"])
+        self.assertEqual(batch.results[0]["count"], 2)
+
+    def test_other_users_cannot_read_a_batch(self):
+        from generator.models import GenerationBatch
+
+        other = User.objects.create_user(username="batchother", password="StrongPass1!")
+        batch = GenerationBatch.objects.create(user=other, total=1)
+        self.assertEqual(self.client.get(f"/api/submit/batch/{batch.pk}/").status_code, 404)
@@ -1,7 +1,9 @@
 from django.urls import path
 from .views.generation import (
-    PiiSubmitView, HistoryView, delete_history_entry,
-    download_wordlist, export_history_csv, download_report_pdf,
+    PiiSubmitView, BatchGenerationView, BatchGenerationDetailView,
+    HistoryView, delete_history_entry,
+    download_wordlist, export_history_csv, export_dataset, download_report_pdf,
+    batch_report,
     user_profile, user_stats, generate_download_token,
     download_file_with_token, get_cached_wordlist,
 )
@@ -20,12 +22,16 @@ urlpatterns = [
 
     path('health/', health_check),
     path('submit/', PiiSubmitView.as_view()),
+    path('submit/batch/', BatchGenerationView.as_view()),
+    path('submit/batch/<int:batch_id>/', BatchGenerationDetailView.as_view()),
     path('cached/<str:cache_key>/', get_cached_wordlist),
     path('history/', HistoryView.as_view()),
     path('history/<int:id>/', delete_history_entry),
     path('download/<int:id>/', download_wordlist),
     path('export/csv/', export_history_csv),
+    path('export/<str:dataset>/<str:fmt>/', export_dataset),
     path('report/pdf/<int:id>/', download_report_pdf),
+    path('report/batch/', batch_report),
     path('profile/', user_profile),
     path('stats/', user_stats),
 
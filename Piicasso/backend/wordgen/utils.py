@@ -1,3 +1,5 @@
+import io
+
 from django.conf import settings
 
 
@@ -30,3 +32,31 @@ def get_client_ip(request, trusted_proxy_count=None):
             if candidate and len(candidate) <= 45:  # max IPv6 textual length
                 return candidate
     return request.META.get("REMOTE_ADDR")
+
+
+class DrainableSink(io.RawIOBase):
+    """
+    Write-only stream whose buffered bytes are handed out by ``drain``, for
+    writers that need a file (ParquetWriter, ZipFile) under a streamed
+    response: write a piece, drain it, yield it.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buf += data
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
@@ -1,11 +1,15 @@
 from .generation import (
     RegisterView,
     PiiSubmitView,
+    BatchGenerationView,
+    BatchGenerationDetailView,
     HistoryView,
     delete_history_entry,
     download_wordlist,
     export_history_csv,
+    export_dataset,
     download_report_pdf,
+    batch_report,
     user_stats,
     user_profile,
     generate_download_token,
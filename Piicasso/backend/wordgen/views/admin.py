@@ -19,6 +19,7 @@ from rest_framework.decorators import (
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from generator.fields import pii_fields_from_mask
 from generator.models import GenerationHistory
 from operations.models import SystemLog
 from analytics.models import UserActivity
@@ -57,13 +58,14 @@ class SuperAdminView(APIView):
             gens = list(
                 GenerationHistory.objects.filter(user_id=target_id).select_related('user')
                 .order_by("-timestamp")
-                .values("id", "timestamp", "ip_address", "wordlist")[
+                .values("id", "timestamp", "ip_address", "wordlist", "pii_fields_mask")[
                     :100
                 ]  # Limit results
             )
             for g in gens:
                 g["wordlist_count"] = len(g["wordlist"]) if g["wordlist"] else 0
                 del g["wordlist"]
+                g["pii_fields"] = pii_fields_from_mask(g.pop("pii_fields_mask"))
             return Response({"generations": gens})
 
         latest_activity_sq = (
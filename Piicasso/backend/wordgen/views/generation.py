@@ -5,11 +5,8 @@ Wordlist generation, history, download, and user profile views.
 import os
 import csv
 import json
-import html
 import re
-import random
 import logging
-import threading
 from io import StringIO, BytesIO
 
 from django.contrib.auth.models import User
@@ -19,7 +16,6 @@ from django.core.signing import TimestampSigner, BadSignature, SignatureExpired
 from django.http import HttpResponse, FileResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.db.models import Sum
-from django.conf import settings
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -28,17 +24,33 @@ from rest_framework.decorators import (
     api_view,
     authentication_classes,
     permission_classes,
+    throttle_classes,
 )
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from generator.fields import pii_field_q, pii_fields_from_mask
 from generator.models import GenerationHistory
 from ..serializers import Piiserializer
-from ..report_generator import generate_report_pdf
+from ..services.report_service import (
+    POLL_AFTER_SECONDS, ArtifactUnavailable, discard, read_pdf, request_report,
+)
 from analytics.models import UserActivity
-from backend.throttles import PiiSubmitRateThrottle
+from backend.throttles import (
+    BatchGenerationRateThrottle, BatchReportRateThrottle, PiiSubmitRateThrottle,
+)
 from ..utils import safe_float, get_client_ip
 from ..llm_handler import mask_pii_for_api
+from ..services.merge_service import merge_generation_sources
+from ..services.generation_service import (
+    get_max_wordlist_size, get_rockyou_corpus, get_rockyou_set, sanitize_pii_data,
+)
+from ..services.export_service import SAMPLE_SIZE, password_sample, with_password_sample
+from backend.metrics import (
+    attach_stage_timer,
+    generation_in_flight,
+    record_cache,
+)
 
 logger = logging.getLogger("wordgen")
 
@@ -48,90 +60,14 @@ _download_signer = TimestampSigner(salt="piicasso-download")
 # Download token expiry in seconds
 DOWNLOAD_TOKEN_MAX_AGE = 60
 
-# Fields excluded from the PII summary (non-PII generation config)
-_PII_SUMMARY_EXCLUDED = frozenset({"pattern_mode"})
-
-
-def _redact_pii(pii_data):
+def _redact_pii(pii_fields_mask):
     """
     Return a dict of field names whose values were non-empty, with every
     value replaced by '***'.  The caller learns *which* fields were provided
-    without receiving any actual PII.
-    """
-    if not isinstance(pii_data, dict):
-        return {}
-    return {
-        k: "***"
-        for k, v in pii_data.items()
-        if k not in _PII_SUMMARY_EXCLUDED and v and v != [] and v != ""
-    }
-
-
-# ─── RockYou Cache (lazy singleton, memory-bounded) ─────────────────────────
-# Loaded on first use, not at import time, so startup RAM is unaffected even
-# when rockyou.txt is present.  Reservoir sampling (Vitter's Algorithm R)
-# caps the in-memory set at _ROCKYOU_MAX entries regardless of file size,
-# giving a uniform random sample with a single streaming pass.
-
-_ROCKYOU_MAX = 50_000
-_ROCKYOU_CACHE = None          # None = not yet loaded
-_ROCKYOU_LOCK = threading.Lock()
-
-
-def _load_rockyou():
-    path = os.path.join(os.path.dirname(__file__), "rockyou.txt")
-    if not os.path.exists(path):
-        return ()
-    try:
-        reservoir = []
-        count = 0  # number of valid (non-blank) lines seen so far
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                word = line.strip()
-                if not word:
-                    continue
-                if count < _ROCKYOU_MAX:
-                    reservoir.append(word)
-                else:
-                    # Algorithm R: replace a random earlier entry with
-                    # decreasing probability so every word has an equal
-                    # chance of appearing in the final reservoir.
-                    j = random.randint(0, count)
-                    if j < _ROCKYOU_MAX:
-                        reservoir[j] = word
-                count += 1
-        logger.info(f"RockYou loaded {len(reservoir)} entries (sampled from {count})")
-        return tuple(reservoir)
-    except Exception as e:
-        logger.warning(f"RockYou load failed: {e}")
-        return ()
-
-
-def get_rockyou_wordlist():
-    global _ROCKYOU_CACHE
-    if _ROCKYOU_CACHE is None:
-        with _ROCKYOU_LOCK:
-            if _ROCKYOU_CACHE is None:  # second check under the lock
-                _ROCKYOU_CACHE = _load_rockyou()
-    return list(_ROCKYOU_CACHE)
-
-
-# ─── PII SANITIZATION HELPER (1.6 fix) ──────────────────────────────────────
-
-
-def _sanitize_pii_data(data):
+    without receiving any actual PII.  Built from the stored field mask, so
+    pii_data is never decrypted.
     """
-    Strip HTML tags from all string values in PII data to prevent stored XSS.
-    Works recursively on dicts and lists.
-    """
-    if isinstance(data, dict):
-        return {k: _sanitize_pii_data(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [_sanitize_pii_data(item) for item in data]
-    elif isinstance(data, str):
-        # Escape HTML entities to neutralise any embedded HTML/script tags
-        return html.escape(data, quote=True)
-    return data
+    return {k: "***" for k in pii_fields_from_mask(pii_fields_mask)}
 
 
 # ─── REGISTRATION ────────────────────────────────────────────────────────────
@@ -273,14 +209,19 @@ class PiiSubmitView(APIView):
         return get_client_ip(request)
 
     def post(self, request):
-        serializer = Piiserializer(data=request.data)
-        if not serializer.is_valid():
+        # Per-stage spans; exported by SecurityLoggingMiddleware.
+        timer = attach_stage_timer(request, "submit")
+
+        with timer.span("validate"):
+            serializer = Piiserializer(data=request.data)
+            valid = serializer.is_valid()
+        if not valid:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         pii_data = serializer.validated_data
 
         # Sanitize PII data to prevent stored XSS (1.6 fix)
-        pii_data = _sanitize_pii_data(pii_data)
+        pii_data = sanitize_pii_data(pii_data)
 
         non_empty_values = [
             v
@@ -295,18 +236,9 @@ class PiiSubmitView(APIView):
 
         used_fallback = not bool(os.environ.get("GEMINI_API_KEY"))
 
-        # Read max_wordlist_size from system settings if available (5.4 fix)
-        from operations.models import SystemSetting
-
-        max_size_setting = SystemSetting.get("max_wordlist_size", "")
-        try:
-            max_size = (
-                int(max_size_setting)
-                if max_size_setting
-                else settings.PIICASSO_SETTINGS.get("MAX_WORDLIST_SIZE", 1000)
-            )
-        except (ValueError, TypeError):
-            max_size = settings.PIICASSO_SETTINGS.get("MAX_WORDLIST_SIZE", 1000)
+        # Admin-configurable cap (SystemSetting max_wordlist_size, 5.4 fix)
+        with timer.span("settings"):
+            max_size = get_max_wordlist_size()
 
         try:
             from django.db import transaction
@@ -323,7 +255,9 @@ class PiiSubmitView(APIView):
             cache_key_data = json.dumps(pii_data, sort_keys=True) + pattern_mode
             cache_key = f"wordgen_{request.user.id}_{hashlib.md5(cache_key_data.encode()).hexdigest()}"
 
-            cached = cache.get(cache_key)
+            with timer.span("cache"):
+                cached = cache.get(cache_key)
+            record_cache("wordgen", bool(cached))
 
             if cached:
                 # Cache stores scored format [{password, score}]; handle legacy
@@ -333,55 +267,52 @@ class PiiSubmitView(APIView):
                     plain_passwords = [item["password"] for item in scored_list]
                 else:
                     plain_passwords = cached
-                    rockyou_set = set(get_rockyou_wordlist())
-                    scored_list = score_wordlist(plain_passwords, pii_data, rockyou_set)
-                    cache.set(cache_key, scored_list, timeout=60 * 60 * 24)
+                    with timer.span("rockyou"):
+                        rockyou_set = get_rockyou_set()
+                    with timer.span("scoring"):
+                        scored_list = score_wordlist(plain_passwords, pii_data, rockyou_set)
+                    with timer.span("cache"):
+                        cache.set(cache_key, scored_list, timeout=60 * 60 * 24)
             else:
                 # Synchronous generation (no Celery — fits 512MB free tier)
-                logger.info(
-                    f"Starting wordlist generation for user={request.user.username} cache_key={cache_key}"
-                )
-
-                pii_data = mask_pii_for_api(pii_data)
-                prompt = build_prompt(pii_data, pattern_mode)
-                wordlist_raw = call_gemini_api(prompt, pii_data=pii_data)
-
-                ai_wordlist = [
-                    line.strip() for line in wordlist_raw.splitlines() if line.strip()
-                ]
-
-                seen = set()
-                plain_passwords = []
-                for pwd in ai_wordlist:
-                    if pwd not in seen:
-                        plain_passwords.append(pwd)
-                        seen.add(pwd)
-
-                rockyou_passwords = get_rockyou_wordlist()
-                for pwd in rockyou_passwords:
-                    if pwd not in seen:
-                        plain_passwords.append(pwd)
-                        seen.add(pwd)
-
-                if not plain_passwords:
-                    return Response(
-                        {"error": "No passwords generated. Provide more PII data."},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                with generation_in_flight():
+                    logger.info(
+                        f"Starting wordlist generation for user={request.user.username} cache_key={cache_key}"
                     )
 
-                # Truncate to max_size
-                if len(plain_passwords) > max_size:
-                    plain_passwords = plain_passwords[:max_size]
+                    pii_data = mask_pii_for_api(pii_data)
+                    prompt = build_prompt(pii_data, pattern_mode)
+                    with timer.span("llm"):
+                        wordlist_raw = call_gemini_api(prompt, pii_data=pii_data)
+
+                    with timer.span("rockyou"):
+                        rockyou_corpus = get_rockyou_corpus()
+                        rockyou_set = get_rockyou_set()
+
+                    # Streaming merge: dedupes and stops at max_size, so the
+                    # RockYou sample is only walked as far as needed.
+                    with timer.span("merge"):
+                        plain_passwords = list(
+                            merge_generation_sources(
+                                wordlist_raw.splitlines(), rockyou_corpus, max_size
+                            )
+                        )
 
-                # Score and sort; rockyou_set already in memory
-                rockyou_set = set(rockyou_passwords)
-                scored_list = score_wordlist(plain_passwords, pii_data, rockyou_set)
+                    if not plain_passwords:
+                        return Response(
+                            {"error": "No passwords generated. Provide more PII data."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        )
 
-                # Cache scored format; DB stores plain strings (downloads unchanged)
-                cache.set(cache_key, scored_list, timeout=60 * 60 * 24)
+                    with timer.span("scoring"):
+                        scored_list = score_wordlist(plain_passwords, pii_data, rockyou_set)
+
+                    # Cache scored format; DB stores plain strings (downloads unchanged)
+                    with timer.span("cache"):
+                        cache.set(cache_key, scored_list, timeout=60 * 60 * 24)
 
             # Atomically save DB records (generation history + activity + notification)
-            with transaction.atomic():
+            with timer.span("db"), transaction.atomic():
                 record = GenerationHistory.objects.create(
                     user=request.user,
                     pii_data=pii_data,
@@ -406,10 +337,19 @@ class PiiSubmitView(APIView):
                     link="/workspace",
                 )
 
+            # Optional background stage: breach counts for the top-N
+            # candidates, streamed over the generation websocket.
+            from ..services.breach_enrichment_service import schedule_breach_enrichment
+
+            breach_enrichment = schedule_breach_enrichment(
+                request.user.id, record.id, cache_key
+            )
+
             # ── Compute threat metrics (E score + Risk Density + Threat Level) ──
             try:
                 from ..services.metrics_service import compute_metrics
-                metrics = compute_metrics(plain_passwords, pii_data)
+                with timer.span("metrics"):
+                    metrics = compute_metrics(plain_passwords, pii_data)
             except Exception as _me:
                 logger.warning(f"Metrics computation skipped: {_me}")
                 metrics = {
@@ -432,6 +372,7 @@ class PiiSubmitView(APIView):
                     "status": "success",
                     "fallback": used_fallback,
                     "metrics": metrics,
+                    "breach_enrichment": "pending" if breach_enrichment else "off",
                 },
                 status=status.HTTP_201_CREATED,
             )
@@ -455,6 +396,99 @@ class PiiSubmitView(APIView):
             )
 
 
+# ─── BATCH GENERATION ───────────────────────────────────────────────────────
+
+
+class BatchGenerationView(APIView):
+    """
+    Generate wordlists for many profiles: a multipart ``file`` (CSV with a
+    header row of Piiserializer field names) or a JSON ``profiles`` array.
+    Profiles fan out as Celery tasks (services.batch_generation_service)
+    reporting on the user's WebSocket; returns 202 with the batch id.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [BatchGenerationRateThrottle]
+
+    def post(self, request):
+        from generator.models import GenerationBatch
+
+        from ..services.batch_generation_service import (
+            get_max_profiles, parse_profiles_csv, schedule_batch, validate_profiles,
+        )
+
+        uploaded = request.FILES.get("file")
+        if uploaded is not None:
+            rows = parse_profiles_csv(uploaded)
+        else:
+            rows = request.data.get("profiles")
+            if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+                return Response(
+                    {"error": "Provide a CSV 'file' upload or a 'profiles' array of objects."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        if not rows:
+            return Response({"error": "No profiles provided."}, status=status.HTTP_400_BAD_REQUEST)
+        max_profiles = get_max_profiles()
+        if len(rows) > max_profiles:
+            return Response(
+                {"error": f"At most {max_profiles} profiles per batch."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        profiles, errors = validate_profiles(rows)
+        if errors:
+            return Response(
+                {"error": "Some profiles are invalid.", "rows": errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_size = get_max_wordlist_size()
+
+        batch = GenerationBatch.objects.create(user=request.user, total=len(profiles))
+        try:
+            schedule_batch(batch, profiles, max_size)
+        except Exception as e:
+            logger.error(f"Could not queue generation batch {batch.pk}: {e}")
+            GenerationBatch.objects.filter(pk=batch.pk).update(status="FAILED")
+            return Response(
+                {"error": "Could not start the batch, try again later."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        batch.refresh_from_db()
+        return Response(
+            {"batch_id": batch.pk, "status": batch.status, "total": batch.total},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class BatchGenerationDetailView(APIView):
+    """Status and per-profile results of one batch generation."""
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, batch_id):
+        from generator.models import GenerationBatch
+
+        batch = GenerationBatch.objects.filter(pk=batch_id, user=request.user).first()
+        if batch is None:
+            return Response({"error": "Batch not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "batch_id": batch.pk,
+            "status": batch.status,
+            "total": batch.total,
+            "completed": batch.completed,
+            "failed": batch.failed,
+            "created_at": batch.created_at,
+            "finished_at": batch.finished_at,
+            "results": batch.results,
+        })
+
+
 # ─── HISTORY ─────────────────────────────────────────────────────────────────
 
 
@@ -472,9 +506,13 @@ class HistoryView(APIView):
 
             qs = (
                 GenerationHistory.objects.filter(user=request.user)
-                .defer("wordlist")
+                .defer("wordlist", "pii_data")
                 .order_by("-timestamp")
             )
+            # e.g. ?pii_field=employer_name — generations that used that field.
+            pii_field = request.query_params.get("pii_field")
+            if pii_field:
+                qs = qs.filter(pii_field_q(pii_field))
             total = qs.count()
 
             entries = qs[start:end]
@@ -486,7 +524,7 @@ class HistoryView(APIView):
                             "timestamp": h.timestamp,
                             # Raw pii_data is never returned — only the field
                             # names that were provided, with values masked.
-                            "pii_summary": _redact_pii(h.pii_data),
+                            "pii_summary": _redact_pii(h.pii_fields_mask),
                             "wordlist_count": h.wordlist_count or 0,
                             "ip_address": h.ip_address,
                         }
@@ -540,6 +578,31 @@ def download_wordlist(request, id):
         return Response({"error": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
 
+# History exports stream from a server-side cursor over a few narrow columns:
+# pii_data and the full wordlist are never loaded, and the password sample
+# is sliced out of the wordlist JSON by the database (export_service).
+EXPORT_CHUNK_SIZE = 2000  # rows per cursor fetch
+EXPORT_FLUSH_ROWS = 500  # rows per streamed chunk
+
+
+def _export_queryset(request):
+    if request.user.is_superuser:
+        qs = GenerationHistory.objects.all()
+    else:
+        qs = GenerationHistory.objects.filter(user=request.user)
+    pii_field = request.query_params.get("pii_field")
+    if pii_field:
+        qs = qs.filter(pii_field_q(pii_field))
+    return with_password_sample(
+        qs.order_by("-timestamp")
+        .only("id", "timestamp", "ip_address", "pii_fields_mask", "wordlist_count")
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _export_sample(r):
+    return password_sample(r), r.wordlist_count > SAMPLE_SIZE
+
+
 @api_view(["GET"])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
@@ -555,13 +618,6 @@ def export_history_csv(request):
         return s
 
     def _row_generator():
-        if request.user.is_superuser:
-            qs = GenerationHistory.objects.all().order_by("-timestamp")
-        else:
-            qs = GenerationHistory.objects.filter(user=request.user).order_by(
-                "-timestamp"
-            )
-
         buf = StringIO()
         writer = csv.writer(buf)
 
@@ -576,18 +632,22 @@ def export_history_csv(request):
         )
         yield _drain()
 
-        for r in qs:
-            sample = ", ".join((r.wordlist or [])[:5]) + (
-                "..." if r.wordlist and len(r.wordlist) > 5 else ""
-            )
+        pending = 0
+        for r in _export_queryset(request):
+            sample, more = _export_sample(r)
             writer.writerow([
                 _esc(r.id),
                 _esc(r.timestamp),
                 _esc(r.ip_address),
-                _esc(json.dumps(_redact_pii(r.pii_data))),
-                _esc(len(r.wordlist or [])),
-                _esc(sample),
+                _esc(json.dumps(_redact_pii(r.pii_fields_mask))),
+                _esc(r.wordlist_count),
+                _esc(", ".join(sample) + ("..." if more else "")),
             ])
+            pending += 1
+            if pending >= EXPORT_FLUSH_ROWS:
+                yield _drain()
+                pending = 0
+        if pending:
             yield _drain()
 
     try:
@@ -603,10 +663,58 @@ def export_history_csv(request):
         )
 
 
+@api_view(["GET"])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def export_dataset(request, dataset, fmt):
+    """
+    Stream ``history``, ``analyses`` or ``activity`` as NDJSON or Parquet
+    (wordgen.services.export_service).  Filters: ``since`` / ``until``
+    (ISO date or datetime) and, for superusers, ``user_id``; everyone else
+    only ever exports their own rows.
+    """
+    from ..services.export_service import (
+        DATASETS, FORMATS, iter_rows, parquet_available, parse_bound, stream_export,
+    )
+
+    if dataset not in DATASETS or fmt not in FORMATS:
+        return Response({"error": "Unknown dataset or format."}, status=status.HTTP_404_NOT_FOUND)
+    if fmt == "parquet" and not parquet_available():
+        return Response(
+            {"error": "Parquet export is not available on this server; use ndjson."},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    try:
+        since = parse_bound(request.query_params.get("since"))
+        until = parse_bound(request.query_params.get("until"))
+        user_ids = [request.user.id]
+        if request.user.is_superuser:
+            user_id = request.query_params.get("user_id")
+            user_ids = [int(user_id)] if user_id else None
+    except ValueError:
+        return Response(
+            {"error": "since/until must be ISO dates and user_id an integer."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    rows = iter_rows(dataset, user_ids=user_ids, since=since, until=until)
+    content_type = "application/vnd.apache.parquet" if fmt == "parquet" else "application/x-ndjson"
+    return StreamingHttpResponse(
+        stream_export(dataset, fmt, rows),
+        content_type=content_type,
+        headers={"Content-Disposition": f"attachment; filename={dataset}.{fmt}"},
+    )
+
+
 @api_view(["GET"])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
 def download_report_pdf(request, id):
+    """
+    The generation's PDF report.  Reports render in the background: until
+    the stored copy is ready this answers 202 with ``Retry-After``; poll the
+    same URL.
+    """
     try:
         r = GenerationHistory.objects.get(id=id)
         if r.user != request.user and not request.user.is_superuser:
@@ -614,16 +722,19 @@ def download_report_pdf(request, id):
                 {"error": "Unauthorized."}, status=status.HTTP_403_FORBIDDEN
             )
 
-        buffer = BytesIO()
-        generate_report_pdf(r, buffer)
-        buffer.seek(0)
-
-        return FileResponse(
-            buffer,
-            as_attachment=True,
-            filename=f"PIICASSO_REPORT_{id}.pdf",
-            content_type="application/pdf",
-        )
+        pdf, report_status = _load_report(r)
+        if report_status == "PENDING":
+            return Response(
+                {"status": "PENDING", "retry_after": POLL_AFTER_SECONDS},
+                status=status.HTTP_202_ACCEPTED,
+                headers={"Retry-After": str(POLL_AFTER_SECONDS)},
+            )
+        if pdf is None:
+            return Response(
+                {"error": "Report generation failed."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return _pdf_response(pdf, id)
     except GenerationHistory.DoesNotExist:
         return Response({"error": "Not found."}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -634,6 +745,80 @@ def download_report_pdf(request, id):
         )
 
 
+def _load_report(r):
+    """``(pdf bytes or None, artifact status)`` for the report of *r*."""
+    artifact = request_report(r)
+    if artifact.status == "READY":
+        try:
+            return read_pdf(artifact), "READY"
+        except ArtifactUnavailable as e:
+            logger.warning(f"Report artifact of history={r.id} unusable ({e}); re-rendering")
+            discard(artifact)
+            artifact = request_report(r)
+            if artifact.status == "READY":  # rendered inline (eager Celery)
+                return read_pdf(artifact), "READY"
+    if artifact.status == "FAILED":
+        discard(artifact)  # the next download renders it afresh
+    return None, artifact.status
+
+
+def _pdf_response(pdf, id):
+    return FileResponse(
+        BytesIO(pdf),
+        as_attachment=True,
+        filename=f"PIICASSO_REPORT_{id}.pdf",
+        content_type="application/pdf",
+    )
+
+
+@api_view(["POST"])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+@throttle_classes([BatchReportRateThrottle])
+def batch_report(request):
+    """
+    Reports for many targets at once (wordgen.services.dossier_service):
+    ``history_ids`` and/or ``target_ids`` (intelligence.TargetProfile) and
+    ``format`` — "zip" (one PDF each, streamed as they finish) or "pdf"
+    (one merged dossier with a table of contents).
+    """
+    from ..services.dossier_service import (
+        FORMATS, DossierError, collect_snapshots, stream_dossier,
+    )
+
+    fmt = request.data.get("format", "zip")
+    history_ids = request.data.get("history_ids") or []
+    target_ids = request.data.get("target_ids") or []
+    if fmt not in FORMATS:
+        return Response(
+            {"error": f"format must be one of: {', '.join(FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if not isinstance(history_ids, list) or not isinstance(target_ids, list):
+        return Response(
+            {"error": "history_ids and target_ids must be arrays."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        history_ids = [int(i) for i in history_ids]
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "history_ids must be integers."}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        snapshots = collect_snapshots(request.user, history_ids, target_ids, fmt)
+    except DossierError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    filename = "PIICASSO_DOSSIER.pdf" if fmt == "pdf" else "PIICASSO_REPORTS.zip"
+    return StreamingHttpResponse(
+        stream_dossier(snapshots, fmt),
+        content_type="application/pdf" if fmt == "pdf" else "application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
 # ─── USER STATS & PROFILE ───────────────────────────────────────────────────
 
 
@@ -905,15 +1090,15 @@ def download_file_with_token(request, file_type, id):
             resp["Content-Disposition"] = f"attachment; filename=wordlist_{id}.txt"
             return resp
         elif file_type == "report":
-            buffer = BytesIO()
-            generate_report_pdf(r, buffer)
-            buffer.seek(0)
-            return FileResponse(
-                buffer,
-                as_attachment=True,
-                filename=f"PIICASSO_REPORT_{id}.pdf",
-                content_type="application/pdf",
-            )
+            pdf, report_status = _load_report(r)
+            if report_status == "PENDING":
+                # The token outlives a typical render; poll the same link.
+                resp = HttpResponse("Report is being prepared.", status=202)
+                resp["Retry-After"] = str(POLL_AFTER_SECONDS)
+                return resp
+            if pdf is None:
+                return HttpResponse("Download failed.", status=500)
+            return _pdf_response(pdf, id)
         else:
             return HttpResponse("Invalid file type.", status=400)
 
@@ -932,6 +1117,7 @@ def get_cached_wordlist(request, cache_key):
     from django.core.cache import cache
 
     cached = cache.get(cache_key)
+    record_cache("wordgen", bool(cached))
     if not cached:
         return Response(
             {"error": "Wordlist not found or expired."}, status=status.HTTP_404_NOT_FOUND
@@ -9,6 +9,16 @@
  */
 'use strict';
 
+const fs = require('fs');
+const path = require('path');
+
+// The backend's list (backend/piicasso_strength/data/common-passwords.txt);
+// cli-python/scripts/vendor_strength.py refreshes this copy.
+const COMMON_PASSWORDS = new Set(
+  fs.readFileSync(path.join(__dirname, 'data', 'common-passwords.txt'), 'utf8')
+    .split('\n').map(w => w.trim().toLowerCase()).filter(Boolean),
+);
+
 const PII_PATTERNS = [
   { type: 'EMAIL', label: 'email',   re: /[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}/gi, weight: 0.18 },
   { type: 'PHONE', label: 'phone',   re: /(?:\+?\d{1,3}[\s-]?)?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{4}/g, weight: 0.16 },
@@ -68,67 +78,118 @@ function renderRedacted(segments) {
     .join('');
 }
 
+const KEYBOARD_PATTERNS = [
+  'qwerty', 'qwertyuiop', 'asdf', 'asdfghjkl', 'zxcv', 'zxcvbnm', '12345', '1234567890',
+  '0987654321', 'qazwsx', 'wsxedc', 'edcrfv', '!@#$%', '!@#$%^&*', 'poiuyt', 'lkjhgf', 'mnbvcx',
+].flatMap(p => [p, [...p].reverse().join('')]);
+const SPECIAL_CHARS = '!@#$%^&*()_+-=[]{}|;:,.<>?/';
+// The entropy charset historically leaves out "/".
+const ENTROPY_SPECIAL_CHARS = '!@#$%^&*()_+-=[]{}|;:,.<>?';
+const LEET = { 0: 'o', 1: 'i', 3: 'e', 4: 'a' };
+// Passphrase words are only checked against the analyser's original list.
+const LEGACY_COMMON_PASSWORDS = new Set([
+  'password', '123456', '12345678', 'qwerty', 'abc123', 'monkey', '1234567', 'letmein',
+  'trustno1', 'dragon', 'baseball', 'iloveyou', 'master', 'sunshine', 'ashley', 'bailey',
+  'shadow', '123123', '654321', 'superman', 'qazwsx', 'michael', 'football', 'password1',
+  'password123', 'welcome', 'welcome1', 'admin', 'login', 'starwars', 'hello', 'charlie',
+  'donald', 'password2',
+]);
+
 /**
  * Score a password against an optional profile. Returns:
  *   { score: 0–100 (higher = stronger), guesses, time, reasons[], rating, entropy }
+ *
+ * A port of the backend analyser's rules (backend/piicasso_strength, also
+ * used by the Python CLI): the score, entropy and findings are the ones the
+ * backend reports for the same password and profile. The frontend's
+ * piiEngine.js carries the same port.
  */
 function scorePassword(pw, profile = {}) {
   if (!pw) return { score: 0, guesses: 0, time: 'instant', reasons: [], rating: '—', entropy: 0 };
 
-  const len = pw.length;
-  const lower = /[a-z]/.test(pw);
-  const upper = /[A-Z]/.test(pw);
-  const digit = /\d/.test(pw);
-  const sym = /[^a-zA-Z0-9]/.test(pw);
-
-  let pool = 0;
-  if (lower) pool += 26;
-  if (upper) pool += 26;
-  if (digit) pool += 10;
-  if (sym)   pool += 32;
-
-  const entropy = Math.log2(Math.max(pool, 1)) * len;
-  const reasons = [];
-  let penalty = 0;
+  const chars = [...pw];
+  const len = chars.length;
   const lowPw = pw.toLowerCase();
+  const reasons = [];
+  let score = 0;
+
+  if (len >= 16) score += 25;
+  else if (len >= 12) score += 20;
+  else if (len >= 8) score += 10;
+  else if (len >= 6) score += 5;
+  else reasons.push({ kind: 'length', label: 'Password is too short (less than 6 characters)' });
+  if (len > 20) score += 10;
+
+  // The analyser's classes (Python str.islower/isupper/isdigit); non-ASCII is approximate.
+  const lower = /\p{Lowercase}/u.test(pw);
+  const upper = /\p{Uppercase}/u.test(pw);
+  const digit = /\p{Nd}/u.test(pw);
+  const special = chars.some(c => SPECIAL_CHARS.includes(c));
+  const types = lower + upper + digit + special;
+  if (types >= 4) score += 25;
+  else if (types >= 3) score += 15;
+  else if (types >= 2) score += 5;
+  else reasons.push({ kind: 'variety', label: 'Password lacks character variety' });
+  if (digit && special) score += 10;
+
+  // Common passwords: exact or de-leeted; passphrases word by word (legacy list).
+  const commonCheck = lowPw.replace(/[0134]/g, c => LEET[c]);
+  if (COMMON_PASSWORDS.has(lowPw) || COMMON_PASSWORDS.has(commonCheck)
+      || commonCheck.split(/\s+/).some(w => LEGACY_COMMON_PASSWORDS.has(w))) {
+    score = Math.max(score - 50, 5);
+    reasons.push({ kind: 'common', label: 'Password is in common password lists' });
+  }
 
-  // Profile-based PII matching
-  for (const [k, v] of Object.entries(profile)) {
-    if (!v || typeof v !== 'string' || v.length < 3) continue;
-    const lv = v.toLowerCase().replace(/[^a-z0-9]/g, '');
-    if (!lv) continue;
-    if (lowPw.includes(lv.slice(0, Math.max(3, Math.floor(lv.length * 0.5))))) {
-      penalty += 22;
-      reasons.push({ kind: 'pii', label: `Contains "${v}" (${k})` });
+  // Profile-based PII matching — first hit only.
+  let personal = false;
+  for (const v of Object.values(profile || {})) {
+    if (!v || typeof v !== 'string' || v.length <= 2) continue;
+    const lv = v.toLowerCase();
+    if (lv.length >= 4 && lowPw.includes(lv)) {
+      score = Math.max(score - 30, 5);
+      reasons.push({ kind: 'pii', label: `Contains personal information: ${lv.slice(0, 10)}...` });
+      personal = true;
+      break;
     }
   }
 
-  // Common tokens
-  const commons = ['password', 'qwerty', 'admin', 'welcome', 'letmein', '123456', 'iloveyou', 'sunshine', 'monkey', 'football', 'dragon', 'master', 'summer'];
-  for (const c of commons) {
-    if (lowPw.includes(c)) { penalty += 25; reasons.push({ kind: 'common', label: `Common token "${c}"` }); break; }
+  if (KEYBOARD_PATTERNS.some(p => lowPw.includes(p))) {
+    score = Math.max(score - 25, 5);
+    reasons.push({ kind: 'pattern', label: 'Contains keyboard pattern' });
+  }
+
+  const year = pw.match(/(19|20)\d{2}/);
+  if (year && profile && profile.dob) {
+    const dobYear = String(profile.dob).match(/(19|20)\d{2}/);
+    if (dobYear && dobYear[0] === year[0]) {
+      score = Math.max(score - 20, 5);
+      reasons.push({ kind: 'pii', label: 'Contains birth year' });
+    }
   }
-  if (/(.)\1{2,}/.test(pw))   { penalty += 8;  reasons.push({ kind: 'pattern', label: 'Repeated characters' }); }
-  if (/0123|1234|2345|3456|4567|5678|6789|abcd|qwer|asdf/i.test(pw)) {
-    penalty += 12; reasons.push({ kind: 'pattern', label: 'Sequential characters' });
+
+  if (/(.)\1{2,}/u.test(pw)) {
+    score = Math.max(score - 10, 0);
+    reasons.push({ kind: 'pattern', label: 'Contains repeated characters' });
   }
-  if (/(19|20)\d{2}$/.test(pw)) { penalty += 14; reasons.push({ kind: 'pattern', label: 'Year suffix detected' }); }
 
-  let lengthBoost = 0;
-  if (len >= 12) lengthBoost += 12;
-  if (len >= 16) lengthBoost += 8;
-  if (sym && upper && digit && lower) lengthBoost += 8;
+  let pool = 0;
+  if (lower) pool += 26;
+  if (upper) pool += 26;
+  if (digit) pool += 10;
+  if (chars.some(c => ENTROPY_SPECIAL_CHARS.includes(c))) pool += 32;
+  const entropy = pool ? Math.min(Math.trunc(len * Math.log2(pool)), 128) : 0;
 
-  const score = Math.max(0, Math.min(100, Math.round(entropy * 1.4 - penalty + lengthBoost)));
-  const guesses = Math.pow(2, Math.max(1, entropy - penalty * 0.5));
+  score = Math.max(0, Math.min(100, score));
+  // Personal information takes 20 bits off the brute-force estimate.
+  const guesses = Math.pow(2, personal ? Math.max(entropy - 20, 8) : entropy);
   const time = humanTime(guesses / 1e10); // 10B guesses/sec
   const rating = score < 25 ? 'Trivially crackable'
-              : score < 45 ? 'Weak'
-              : score < 65 ? 'Moderate'
-              : score < 82 ? 'Strong'
+              : score < 50 ? 'Weak'
+              : score < 60 ? 'Moderate'
+              : score < 75 ? 'Strong'
               :              'Excellent';
 
-  return { score, guesses, time, reasons, rating, entropy: Math.round(entropy) };
+  return { score, guesses, time, reasons, rating, entropy };
 }
 
 function humanTime(seconds) {
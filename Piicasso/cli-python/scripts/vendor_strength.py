@@ -0,0 +1,47 @@
+"""Refresh the vendored copy of the password-strength core.
+
+The source lives in the backend tree (``Piicasso/backend/piicasso_strength``,
+inside the backend's Docker build context); the CLI ships a plain copy at
+``src/piicasso_strength`` so sdists, wheels and Windows checkouts carry real
+files.  Run after changing the core::
+
+    python scripts/vendor_strength.py
+
+``tests/test_strength.py`` fails while the two trees differ.  The JS ports
+(``frontend/src/lib/piiEngine.js`` and ``cli-node/src/engine/pii.js``) read
+their own copy of the common-password list, which this refreshes too.
+"""
+
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCE = ROOT.parent / "backend" / "piicasso_strength"
+TARGET = ROOT / "src" / "piicasso_strength"
+IGNORE = shutil.ignore_patterns("__pycache__", "*.py[cod]")
+COMMON_PASSWORDS = Path("data") / "common-passwords.txt"
+JS_COPIES = (
+    ROOT.parent / "frontend" / "src" / "lib" / "data",
+    ROOT.parent / "cli-node" / "src" / "engine" / "data",
+)
+
+
+def main() -> None:
+    if not SOURCE.is_dir():
+        raise SystemExit(f"Core not found at {SOURCE}")
+    if TARGET.is_symlink() or TARGET.is_file():
+        TARGET.unlink()
+    elif TARGET.exists():
+        shutil.rmtree(TARGET)
+    shutil.copytree(SOURCE, TARGET, ignore=IGNORE)
+    print(f"Vendored {SOURCE} -> {TARGET}")
+    for target in JS_COPIES:
+        target.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(SOURCE / COMMON_PASSWORDS, target)
+        print(f"Copied {COMMON_PASSWORDS.name} -> {target}")
+
+
+if __name__ == "__main__":
+    main()
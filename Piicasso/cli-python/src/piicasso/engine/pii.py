@@ -1,15 +1,17 @@
 """Python port of ``frontend/src/lib/piiEngine.js``.
 
 The goal is byte-for-byte feature parity: same regex patterns, same weights,
-same scoring formula, same human-readable time format. Pure stdlib — no
+same scoring formula, same human-readable time format. Password scoring
+comes from the shared ``piicasso_strength`` core. Pure stdlib — no
 dependencies, no network, instant.
 """
 
 from __future__ import annotations
 
-import math
 import re
-from typing import Any, Dict, List, Mapping, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional
+
+import piicasso_strength as _strength
 
 
 # ---------------------------------------------------------------------------
@@ -172,35 +174,11 @@ def redact_to_string(text: str, mask: str = "[REDACTED:{label}]") -> str:
 
 
 # ---------------------------------------------------------------------------
-# Password scoring
+# Password scoring — served by the shared ``piicasso_strength`` core, which
+# the backend analyser uses too.
 # ---------------------------------------------------------------------------
 
 
-_COMMON_TOKENS: Tuple[str, ...] = (
-    "password",
-    "qwerty",
-    "admin",
-    "welcome",
-    "letmein",
-    "123456",
-    "iloveyou",
-    "sunshine",
-    "monkey",
-    "football",
-    "dragon",
-    "master",
-    "summer",
-)
-
-_SEQUENTIAL_RE = re.compile(
-    r"0123|1234|2345|3456|4567|5678|6789|abcd|qwer|asdf", re.IGNORECASE
-)
-_REPEAT_RE = re.compile(r"(.)\1{2,}")
-_YEAR_SUFFIX_RE = re.compile(r"(19|20)\d{2}$")
-_NON_ALNUM_RE = re.compile(r"[^a-z0-9]")
-_NON_ALNUM_MIXED_RE = re.compile(r"[^a-zA-Z0-9]")
-
-
 def score_password(
     pw: str, profile: Optional[Mapping[str, Any]] = None
 ) -> Dict[str, Any]:
@@ -211,101 +189,7 @@ def score_password(
         {"score": 0..100, "guesses": float, "time": "1.2 hours",
          "reasons": [...], "rating": "Strong", "entropy": int}
     """
-    if not pw:
-        return {
-            "score": 0,
-            "guesses": 0,
-            "time": "instant",
-            "reasons": [],
-            "rating": "—",
-            "entropy": 0,
-        }
-
-    profile = profile or {}
-
-    length = len(pw)
-    has_lower = bool(re.search(r"[a-z]", pw))
-    has_upper = bool(re.search(r"[A-Z]", pw))
-    has_digit = bool(re.search(r"\d", pw))
-    has_sym = bool(re.search(r"[^a-zA-Z0-9]", pw))
-
-    pool = 0
-    if has_lower:
-        pool += 26
-    if has_upper:
-        pool += 26
-    if has_digit:
-        pool += 10
-    if has_sym:
-        pool += 32
-
-    entropy = math.log2(max(pool, 1)) * length
-    reasons: List[Dict[str, str]] = []
-    penalty = 0
-    low_pw = pw.lower()
-
-    # Profile-based PII matching.
-    for k, v in profile.items():
-        if not isinstance(v, str) or len(v) < 3:
-            continue
-        lv = _NON_ALNUM_RE.sub("", v.lower())
-        if not lv:
-            continue
-        slice_len = max(3, math.floor(len(lv) * 0.5))
-        if lv[:slice_len] in low_pw:
-            penalty += 22
-            reasons.append({"kind": "pii", "label": f'Contains "{v}" ({k})'})
-
-    # Common tokens — first hit only, matches JS ``break``.
-    for c in _COMMON_TOKENS:
-        if c in low_pw:
-            penalty += 25
-            reasons.append({"kind": "common", "label": f'Common token "{c}"'})
-            break
-
-    if _REPEAT_RE.search(pw):
-        penalty += 8
-        reasons.append({"kind": "pattern", "label": "Repeated characters"})
-    if _SEQUENTIAL_RE.search(pw):
-        penalty += 12
-        reasons.append({"kind": "pattern", "label": "Sequential characters"})
-    if _YEAR_SUFFIX_RE.search(pw):
-        penalty += 14
-        reasons.append({"kind": "pattern", "label": "Year suffix detected"})
-
-    length_boost = 0
-    if length >= 12:
-        length_boost += 12
-    if length >= 16:
-        length_boost += 8
-    if has_sym and has_upper and has_digit and has_lower:
-        length_boost += 8
-
-    raw = round(entropy * 1.4 - penalty + length_boost)
-    score = max(0, min(100, raw))
-    # math.pow handles the same overflow profile as JS Math.pow.
-    guesses = math.pow(2, max(1, entropy - penalty * 0.5))
-    time = human_time(guesses / 1e10)  # ~10B guesses/sec
-
-    if score < 25:
-        rating = "Trivially crackable"
-    elif score < 45:
-        rating = "Weak"
-    elif score < 65:
-        rating = "Moderate"
-    elif score < 82:
-        rating = "Strong"
-    else:
-        rating = "Excellent"
-
-    return {
-        "score": score,
-        "guesses": guesses,
-        "time": time,
-        "reasons": reasons,
-        "rating": rating,
-        "entropy": round(entropy),
-    }
+    return _strength.score(pw, profile)
 
 
 def human_time(seconds: float) -> str:
@@ -315,44 +199,15 @@ def human_time(seconds: float) -> str:
     second → minute → hour → day → year → century, plural ``s`` for >=2,
     and a ``>1M centuries`` cap at the top.
     """
-    if not math.isfinite(seconds) or seconds < 1:
-        return "instant"
-
-    # (divisor, name-of-CURRENT unit). The first row says "while still under
-    # 60 of the current unit, we're in seconds"; if we cross that boundary the
-    # name becomes "minute" and we divide by 60, etc.
-    units: Tuple[Tuple[int, str], ...] = (
-        (60, "second"),
-        (60, "minute"),
-        (24, "hour"),
-        (365, "day"),
-        (100, "year"),
-        (1_000_000, "century"),
-    )
-    val = seconds
-    name = "second"
-    for div, n in units:
-        if val < div:
-            name = n
-            break
-        val /= div
-        name = n
-
-    if val > 1e6:
-        return ">1M centuries"
-    if val < 10:
-        # ``toFixed(1)`` keeps one decimal, e.g. ``1.5``.
-        text = f"{val:.1f}"
-    else:
-        text = str(int(round(val)))
-    suffix = "s" if val >= 2 else ""
-    return f"{text} {name}{suffix}"
+    return _strength.human_time(seconds)
 
 
 # ---------------------------------------------------------------------------
 # Adversarial wordlist
 # ---------------------------------------------------------------------------
 
+_NON_ALNUM_MIXED_RE = re.compile(r"[^a-zA-Z0-9]")
+
 
 def generate_wordlist(profile: Mapping[str, Any], limit: int = 40) -> List[str]:
     """Generate up to ``limit`` candidate passwords from a profile."""
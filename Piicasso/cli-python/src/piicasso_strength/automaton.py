@@ -0,0 +1,53 @@
+"""Aho–Corasick substring matcher used for the pattern checks."""
+
+from collections import deque
+
+
+class SubstringAutomaton:
+    """
+    Aho–Corasick matcher compiled to a full DFA: ``contains_any`` makes one
+    pass over the text with a single dict lookup per character.
+    """
+
+    def __init__(self, patterns):
+        goto = [{}]
+        terminal = [False]
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    terminal.append(False)
+                state = nxt
+            terminal[state] = True
+
+        alphabet = {ch for pattern in patterns for ch in pattern}
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = {ch: goto[0].get(ch, 0) for ch in alphabet}
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            terminal[state] = terminal[state] or terminal[fail[state]]
+            row = dict(delta[fail[state]])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]][ch]
+                row[ch] = nxt
+                queue.append(nxt)
+            delta[state] = row
+
+        # Drop transitions back to the root; .get(ch, 0) restores them.
+        self._delta = [{ch: s for ch, s in row.items() if s} for row in delta]
+        self._terminal = terminal
+
+    def contains_any(self, text):
+        delta, terminal = self._delta, self._terminal
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if terminal[state]:
+                return True
+        return False
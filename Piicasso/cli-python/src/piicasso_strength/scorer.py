@@ -0,0 +1,52 @@
+"""
+Scorer shape — ``scorePassword`` from ``frontend/src/lib/piiEngine.js``,
+also served by the CLI as ``piicasso.engine.pii.score_password``::
+
+    {"score": 0..100, "guesses": float, "time": "1.2 hours",
+     "reasons": [...], "rating": "Strong", "entropy": int}
+
+Score and entropy are the analyser's; ``guesses``/``time`` are its crack
+time in the scorer's units and ``reasons`` its vulnerabilities.
+"""
+
+from .core import evaluate
+from .crack_time import GUESSES_PER_SECOND, guesses, human_time
+
+_EMPTY = {
+    "score": 0,
+    "guesses": 0,
+    "time": "instant",
+    "reasons": [],
+    "rating": "—",
+    "entropy": 0,
+}
+
+
+def rating(score):
+    """Label of an analyser score: its critical and high levels, then medium split at 60."""
+    if score < 25:
+        return "Trivially crackable"
+    if score < 50:
+        return "Weak"
+    if score < 60:
+        return "Moderate"
+    if score < 75:
+        return "Strong"
+    return "Excellent"
+
+
+def score(pw, profile=None, common_passwords=None):
+    """Score *pw* against an optional profile of PII strings."""
+    if not pw:
+        return dict(_EMPTY, reasons=[])
+
+    result = evaluate(pw, profile, common_passwords)
+    n = float(guesses(result.entropy, result.personal))
+    return {
+        "score": result.score,
+        "guesses": n,
+        "time": human_time(n / GUESSES_PER_SECOND),
+        "reasons": [{"kind": f.kind, "label": f.label} for f in result.findings],
+        "rating": rating(result.score),
+        "entropy": result.entropy,
+    }
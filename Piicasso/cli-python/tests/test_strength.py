@@ -0,0 +1,105 @@
+"""Parity checks for the shared password-strength core.
+
+``data/score_golden.jsonl`` is recorded from ``piicasso_strength.score``,
+whose rules are the backend analyser's; the frontend suite checks the JS
+port (``piiEngine.js``) against the same file.
+"""
+
+from __future__ import annotations
+
+import json
+import filecmp
+import math
+from pathlib import Path
+
+import pytest
+
+import piicasso_strength
+from piicasso.engine.pii import human_time, score_password
+
+GOLDEN = Path(__file__).parent / "data" / "score_golden.jsonl"
+VENDORED = Path(piicasso_strength.__file__).parent
+BACKEND_CORE = Path(__file__).resolve().parents[2] / "backend" / "piicasso_strength"
+
+
+def _golden_cases():
+    with GOLDEN.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_score_matches_golden_corpus():
+    cases = _golden_cases()
+    assert len(cases) > 700
+    mismatches = [
+        c["password"]
+        for c in cases
+        if score_password(c["password"], c["profile"]) != c["expected"]
+    ]
+    assert mismatches == []
+
+
+def test_cli_and_core_are_the_same_implementation():
+    profile = {"name": "John Doe", "dob": "1998"}
+    assert score_password("JohnDoe1998!", profile) == piicasso_strength.score(
+        "JohnDoe1998!", profile
+    )
+    assert human_time(5400) == piicasso_strength.human_time(5400)
+
+
+@pytest.mark.parametrize(
+    "seconds, expected",
+    [
+        (0.5, "instant"),
+        (math.inf, "instant"),
+        (1, "1.0 second"),
+        (90, "1.5 minute"),
+        (12.5 * 60, "13 minutes"),
+        (86400 * 365 * 100 * 1e6 * 2e6, ">1M centuries"),
+    ],
+)
+def test_human_time_follows_js_rounding(seconds, expected):
+    assert human_time(seconds) == expected
+
+
+def test_entropy_is_capped_and_guesses_stay_finite():
+    result = score_password("Aa1!" * 100)
+    assert result["entropy"] == 128
+    assert result["guesses"] == 2.0**128
+    assert result["time"] == ">1M centuries"
+
+
+def test_unicode_character_classes():
+    # The analyser's classes: str.isdigit / islower, and only its symbol list.
+    assert piicasso_strength.score("١٢٣")["entropy"] == int(math.log2(10) * 3)
+    assert piicasso_strength.score("é")["entropy"] == 4
+    assert piicasso_strength.score("€€€€")["entropy"] == 0
+
+
+def test_analyzer_shape_reports_the_same_assessment():
+    profile = {"name": "John Doe", "dob": "1998"}
+    for pw in ("JohnDoe1998!", "qwerty123", "CorrectHorseBatteryStaple!@#123"):
+        scored = piicasso_strength.score(pw, profile)
+        analyzed = piicasso_strength.analyze(pw, profile)
+        assert analyzed["score"] == scored["score"]
+        assert analyzed["entropy"] == scored["entropy"]
+        assert analyzed["vulnerabilities"] == [r["label"] for r in scored["reasons"]][:5]
+
+
+def test_keyboard_walks_are_penalised():
+    result = score_password("zxcvbnm!")
+    assert result["score"] == 5
+    assert result["reasons"] == [{"kind": "pattern", "label": "Contains keyboard pattern"}]
+
+
+@pytest.mark.skipif(not BACKEND_CORE.is_dir(), reason="backend tree not present")
+def test_vendored_core_matches_backend():
+    """src/piicasso_strength is a copy; refresh it with scripts/vendor_strength.py."""
+    stale = []
+
+    def walk(cmp, prefix=""):
+        stale.extend(prefix + name for name in cmp.diff_files + cmp.left_only + cmp.right_only)
+        for name, sub in cmp.subdirs.items():
+            walk(sub, f"{prefix}{name}/")
+
+    walk(filecmp.dircmp(BACKEND_CORE, VENDORED, ignore=["__pycache__"]))
+    assert stale == []
@@ -0,0 +1,30 @@
+import axiosInstance from './axios';
+
+// Reports render in the background: report/pdf/<id>/ answers 202 with
+// Retry-After until the stored copy is ready, then the PDF itself.
+const MAX_WAIT_MS = 3 * 60 * 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+export const fetchReportPdf = async (historyId) => {
+  const deadline = Date.now() + MAX_WAIT_MS;
+  for (;;) {
+    const res = await axiosInstance.get(`report/pdf/${historyId}/`, { responseType: 'blob' });
+    if (res.status !== 202) return res.data;
+    if (Date.now() > deadline) throw new Error('Report is still being prepared.');
+    const retryAfter = parseFloat(res.headers['retry-after']) || 2;
+    await sleep(retryAfter * 1000);
+  }
+};
+
+export const downloadReportPdf = async (historyId) => {
+  const blob = await fetchReportPdf(historyId);
+  const url = URL.createObjectURL(blob);
+  const a = document.createElement('a');
+  a.href = url;
+  a.download = `PIICASSO_REPORT_${historyId}.pdf`;
+  document.body.appendChild(a);
+  a.click();
+  a.remove();
+  URL.revokeObjectURL(url);
+};
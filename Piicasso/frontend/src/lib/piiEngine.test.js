@@ -0,0 +1,46 @@
+import { readFileSync } from 'fs';
+import { fileURLToPath } from 'url';
+import { describe, test, expect } from 'vitest';
+import { scorePassword, humanTime } from './piiEngine';
+
+// Shared golden corpus for password scoring, recorded from the Python core
+// (backend/piicasso_strength, used by the backend and the CLI), so the port
+// cannot drift from the backend analyser.
+const GOLDEN = fileURLToPath(
+  new URL('../../../cli-python/tests/data/score_golden.jsonl', import.meta.url),
+);
+const COMMON_LISTS = [
+  '../../../backend/piicasso_strength/data/common-passwords.txt',
+  './data/common-passwords.txt',
+  '../../../cli-node/src/engine/data/common-passwords.txt',
+].map((rel) => fileURLToPath(new URL(rel, import.meta.url)));
+
+// The port only approximates Python's Unicode character classes, so
+// non-ASCII cases are Python-side only.
+const cases = readFileSync(GOLDEN, 'utf8')
+  .trim()
+  .split('\n')
+  .map((line) => JSON.parse(line))
+  .filter((c) => !/[^\x00-\x7f]/.test(c.password + JSON.stringify(c.profile)));
+
+describe('scorePassword parity', () => {
+  test('corpus is loaded', () => {
+    expect(cases.length).toBeGreaterThan(600);
+  });
+
+  test('matches the shared golden corpus', () => {
+    for (const { password, profile, expected } of cases) {
+      expect(scorePassword(password, profile), password).toEqual(expected);
+    }
+  });
+
+  test('common-password list copies match the backend', () => {
+    const [backend, ...copies] = COMMON_LISTS.map((file) => readFileSync(file, 'utf8'));
+    for (const copy of copies) expect(copy).toBe(backend);
+  });
+
+  test('humanTime rounds halves up', () => {
+    expect(humanTime(750)).toBe('13 minutes');
+    expect(humanTime(90)).toBe('1.5 minute');
+  });
+});
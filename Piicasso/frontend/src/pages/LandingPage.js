@@ -689,7 +689,7 @@ function LiveDemo() {
             <div style={{
               fontFamily: 'var(--font-sans)', fontSize: 88, lineHeight: 1,
               fontWeight: 500, letterSpacing: '-0.05em',
-              color: result.score < 45 ? 'var(--accent-500)' : result.score < 70 ? 'var(--warn)' : 'var(--good)'
+              color: result.score < 50 ? 'var(--accent-500)' : result.score < 60 ? 'var(--warn)' : 'var(--good)'
             }}>{result.score}</div>
             <div>
               <div style={{ fontSize: 17, fontWeight: 500 }}>{result.rating}</div>
@@ -705,7 +705,7 @@ function LiveDemo() {
           <div style={{ height: 8, background: 'var(--ink-3)', borderRadius: 4, margin: '20px 0 28px', overflow: 'hidden' }}>
             <div style={{
               width: `${result.score}%`, height: '100%',
-              background: result.score < 45 ? 'var(--accent-500)' : result.score < 70 ? 'var(--warn)' : 'var(--good)',
+              background: result.score < 50 ? 'var(--accent-500)' : result.score < 60 ? 'var(--warn)' : 'var(--good)',
               transition: 'width .25s ease'
             }} />
           </div>
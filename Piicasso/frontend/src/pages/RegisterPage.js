@@ -46,9 +46,9 @@ const RegisterPage = () => {
   );
 
   const scoreColor =
-    result.score < 45
+    result.score < 50
       ? 'var(--accent-500)'
-      : result.score < 70
+      : result.score < 60
       ? 'var(--warn)'
       : 'var(--good)';
 
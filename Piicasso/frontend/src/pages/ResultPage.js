@@ -1,7 +1,7 @@
 import React, { useEffect, useState, useContext } from 'react';
 import { useNavigate } from 'react-router-dom';
 import DesignAppShell from '../components/design/dashboard/DesignAppShell';
-import axiosInstance from '../api/axios';
+import { downloadReportPdf } from '../api/reports';
 import { ModeContext as ModeContextImport } from '../context/ModeContext';
 import {
   Terminal, FileText, CheckCircle, ShieldCheck,
@@ -93,14 +93,7 @@ const ResultPage = () => {
   const handleDownloadPdf = async () => {
     if (!historyId) return;
     try {
-      const res = await axiosInstance.post('download-token/', {
-        file_type: 'report', record_id: historyId,
-      });
-      const baseUrl = (process.env.REACT_APP_API_URL || '/api').replace(/\/$/, '');
-      window.open(
-        `${baseUrl}/file/report/${historyId}/?token=${encodeURIComponent(res.data.download_token)}`,
-        '_blank'
-      );
+      await downloadReportPdf(historyId);
     } catch { alert('PDF download failed. Please try again.'); }
   };
 
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import DesignAppShell from '../components/design/dashboard/DesignAppShell';
 import axiosInstance from '../api/axios';
+import { downloadReportPdf } from '../api/reports';
 import { Bookmark, BookmarkCheck, Download, FileDown, Search, FileText, RefreshCw } from 'lucide-react';
 
 const SAVED_KEY = 'piicasso_saved_ids';
@@ -90,7 +91,16 @@ const SavedPage = () => {
     };
 
     const downloadWordlist = (id) => downloadWithSignedToken('wordlist', id);
-    const downloadPDF = (id) => downloadWithSignedToken('report', id);
+    // Reports render in the background, so poll for the PDF rather than
+    // opening a link that may answer 202 after its token has expired.
+    const downloadPDF = async (id) => {
+        try {
+            await downloadReportPdf(id);
+        } catch (err) {
+            console.error('Failed to download report:', err);
+            alert('Download failed. Please try again.');
+        }
+    };
 
     const filtered = items.filter(item => {
         if (!searchTerm) return true;
@@ -41,9 +41,9 @@ function UserPasswordAnalyzer({ username, onAnalyzed }) {
 
   const previewColor = !preview
     ? 'var(--fg-3)'
-    : preview.score < 45
+    : preview.score < 50
       ? 'var(--accent-500)'
-      : preview.score < 70
+      : preview.score < 60
         ? 'var(--warn)'
         : 'var(--good)';
 